@@ -0,0 +1,109 @@
+"""
+Benchmark the sparse BM25 index against LangChain's rank-bm25 retriever.
+
+Builds a synthetic corpus with a Zipf-distributed vocabulary and reports
+build time plus per-query latency for single and batched (expanded) queries.
+
+Usage:
+    python -m benchmarks.bench_bm25 --chunks 100000 --queries 50
+"""
+
+import time
+import argparse
+
+import numpy as np
+from langchain.schema import Document
+
+from src.dashboard.bm25 import BM25Index, tokenize
+
+
+def make_corpus(
+    n_chunks: int,
+    vocab_size: int,
+    tokens_per_chunk: int,
+    seed: int
+) -> tuple[list[Document], list[str]]:
+    """Generate chunks whose word frequencies follow a Zipf distribution."""
+    rng = np.random.default_rng(seed)
+    vocab = np.array([f"w{i}" for i in range(vocab_size)])
+    ranks = np.arange(1, vocab_size + 1)
+    probs = (1.0 / ranks) / (1.0 / ranks).sum()
+
+    word_ids = rng.choice(vocab_size, size=(n_chunks, tokens_per_chunk), p=probs)
+    documents = [
+        Document(page_content=" ".join(vocab[row]), metadata={"chunk": i})
+        for i, row in enumerate(word_ids)
+    ]
+    return documents, list(vocab)
+
+
+def make_queries(vocab: list[str], n_queries: int, seed: int) -> list[str]:
+    """Queries of 3-8 mid-frequency terms, like a student question."""
+    rng = np.random.default_rng(seed + 1)
+    pool = vocab[50:5000]
+    return [
+        " ".join(rng.choice(pool, size=rng.integers(3, 9)))
+        for _ in range(n_queries)
+    ]
+
+
+def timed(fn, *args):
+    """Run fn and return (result, seconds)."""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--vocab", type=int, default=50_000)
+    parser.add_argument("--tokens", type=int, default=150, help="Tokens per chunk")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--expansions", type=int, default=4,
+                        help="Queries per batch, as produced by query expansion")
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"Generating {args.chunks:,} chunks x {args.tokens} tokens...")
+    documents, vocab = make_corpus(args.chunks, args.vocab, args.tokens, args.seed)
+    queries = make_queries(vocab, args.queries, args.seed)
+    batches = [
+        queries[i:i + args.expansions]
+        for i in range(0, len(queries), args.expansions)
+    ]
+
+    from langchain_community.retrievers import BM25Retriever
+
+    legacy, legacy_build = timed(
+        lambda: BM25Retriever.from_documents(documents, k=args.k, preprocess_func=tokenize)
+    )
+    index, sparse_build = timed(BM25Index.build, documents)
+
+    _, legacy_total = timed(lambda: [legacy.invoke(q) for q in queries])
+    _, sparse_total = timed(lambda: [index.search(q, args.k) for q in queries])
+    _, sparse_batched = timed(lambda: [index.search_batch(b, args.k) for b in batches])
+
+    # Both use the same tokenizer; check the top hit agrees on most queries
+    agree = sum(
+        legacy.invoke(q)[0].metadata["chunk"] == index.search(q, args.k)[0][0]
+        for q in queries[:20]
+    )
+
+    def per_query(total):
+        return 1000 * total / len(queries)
+
+    print()
+    print(f"{'backend':<28}{'build (s)':>12}{'ms/query':>12}")
+    print(f"{'rank-bm25 (BM25Retriever)':<28}{legacy_build:>12.2f}{per_query(legacy_total):>12.2f}")
+    print(f"{'sparse, one query':<28}{sparse_build:>12.2f}{per_query(sparse_total):>12.2f}")
+    print(f"{'sparse, batched':<28}{'':>12}{per_query(sparse_batched):>12.2f}")
+    print()
+    print(f"Speedup (single): {legacy_total / sparse_total:.1f}x, "
+          f"(batched x{args.expansions}): {legacy_total / sparse_batched:.1f}x")
+    print(f"Top-1 agreement on 20 queries: {agree}/20")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark the token chunker against the recursive character splitter.
+
+Chunks a course text (the extracted slide deck in data/ by default),
+repeated to the requested size, and reports throughput of the recursive
+splitter measured in characters, the same splitter measured in tiktoken
+tokens, and the structure-aware token chunker.
+
+Usage:
+    python -m benchmarks.bench_chunking --repeat 20 --chunk-tokens 256
+"""
+
+import time
+import argparse
+
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from src.dashboard.chunking import TokenChunker, get_tokenizer
+from src.dashboard.ingest import make_text_splitter
+
+
+def timed(fn, *args):
+    """Run fn and return (result, seconds)."""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--file", default="data/pdf_slides.txt")
+    parser.add_argument("--repeat", type=int, default=20, help="Copies of the file per document")
+    parser.add_argument("--chunk-tokens", type=int, default=256)
+    parser.add_argument("--overlap-tokens", type=int, default=32)
+    parser.add_argument("--chunk-chars", type=int, default=1000)
+    parser.add_argument("--overlap-chars", type=int, default=200)
+    parser.add_argument("--encoding", default="cl100k_base")
+    args = parser.parse_args()
+
+    with open(args.file, encoding="utf-8") as f:
+        text = f.read() * args.repeat
+    documents = [Document(page_content=text, metadata={"source": args.file})]
+    tokenizer = get_tokenizer(args.encoding)
+    total_tokens = tokenizer.count(text)
+    print(f"{len(text) / 1e6:.1f} MB, {total_tokens:,} tokens ({tokenizer.name})")
+
+    splitters = {
+        "recursive, characters": make_text_splitter(args.chunk_chars, args.overlap_chars),
+        "recursive, tokens": RecursiveCharacterTextSplitter(
+            separators=["\n\n", "\n", ". ", "? ", "! ", "; ", ", ", " ", ""],
+            chunk_size=args.chunk_tokens,
+            chunk_overlap=args.overlap_tokens,
+            length_function=tokenizer.count,
+            add_start_index=True,
+        ),
+        "token chunker": TokenChunker(args.chunk_tokens, args.overlap_tokens, args.encoding),
+    }
+
+    print()
+    print(f"{'splitter':<24}{'seconds':>10}{'MB/s':>10}{'chunks':>10}{'max tokens':>12}")
+    times = {}
+    for name, splitter in splitters.items():
+        chunks, seconds = timed(splitter.split_documents, documents)
+        times[name] = seconds
+        largest = max(tokenizer.count(chunk.page_content) for chunk in chunks)
+        print(f"{name:<24}{seconds:>10.2f}{len(text) / 1e6 / seconds:>10.1f}"
+              f"{len(chunks):>10,}{largest:>12,}")
+
+    print()
+    print(f"Token chunker vs recursive splitter measuring tokens: "
+          f"{times['recursive, tokens'] / times['token chunker']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
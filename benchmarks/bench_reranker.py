@@ -0,0 +1,121 @@
+"""
+Benchmark the int8 ONNX Runtime reranker against the PyTorch cross-encoder.
+
+Uses Piazza questions (data/posts.csv) as queries and, for each, the
+initial_k BM25 candidates from the course materials under data/, the
+same pairs the pipeline reranks. Reports pairs scored per second for
+both backends and how closely the ONNX ranking agrees with PyTorch's:
+NDCG@final_k with the PyTorch scores as graded relevance, and the
+overlap of the two top-final_k sets.
+
+Usage:
+    python -m benchmarks.bench_reranker --queries 50 --initial-k 20
+"""
+
+import csv
+import html
+import re
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from src.dashboard.bm25 import BM25Index
+from src.dashboard.indexing import iter_data_files
+from src.dashboard.ingest import load_and_split
+from src.dashboard.reranking import OnnxCrossEncoder
+
+
+def load_questions(path: str, n: int) -> list[str]:
+    """Text of the first n non-empty Piazza posts, HTML stripped."""
+    questions = []
+    with open(path, encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            text = html.unescape(re.sub(r"<[^>]+>", " ", row["content"]))
+            text = " ".join(text.split())[:500]
+            if text:
+                questions.append(text)
+            if len(questions) == n:
+                break
+    return questions
+
+
+def ndcg(relevance: np.ndarray, order: np.ndarray, k: int) -> float:
+    """NDCG@k of a ranking, given graded relevance of every candidate."""
+    discounts = 1 / np.log2(np.arange(2, k + 2))
+    ideal = np.sort(relevance)[::-1][:k]
+    idcg = float((ideal * discounts[:len(ideal)]).sum())
+    dcg = float((relevance[order[:k]] * discounts[:len(order[:k])]).sum())
+    return dcg / idcg if idcg > 0 else 1.0
+
+
+def timed_scores(model, pairs_per_query: list[list[list[str]]], batch_size: int):
+    """Scores per query and total seconds, after one warm-up query."""
+    model.predict(pairs_per_query[0], batch_size=batch_size)
+    start = time.perf_counter()
+    scores = [np.asarray(model.predict(pairs, batch_size=batch_size)) for pairs in pairs_per_query]
+    return scores, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--posts", default="data/posts.csv")
+    parser.add_argument("--model", default="cross-encoder/ms-marco-MiniLM-L-6-v2")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--initial-k", type=int, default=20)
+    parser.add_argument("--final-k", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    chunks = [
+        chunk
+        for path in iter_data_files(Path(args.data_dir))
+        if path.suffix != ".csv"
+        for chunk in load_and_split(str(path), 256, 32, chunker="tokens").chunks
+    ]
+    index = BM25Index.build(chunks)
+    questions = load_questions(args.posts, args.queries)
+    pairs_per_query = [
+        [
+            [question, index.get_document(i).page_content]
+            for i, _ in index.search(question, args.initial_k)
+        ]
+        for question in questions
+    ]
+    pairs_per_query = [pairs for pairs in pairs_per_query if pairs]
+    total_pairs = sum(len(pairs) for pairs in pairs_per_query)
+    print(f"{len(chunks):,} chunks, {len(pairs_per_query)} queries, {total_pairs:,} pairs")
+
+    from sentence_transformers import CrossEncoder
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+    torch_model = CrossEncoder(args.model)
+    onnx_model = OnnxCrossEncoder.from_pretrained(args.model, num_threads=args.threads)
+
+    reference, torch_seconds = timed_scores(torch_model, pairs_per_query, args.batch_size)
+    quantized, onnx_seconds = timed_scores(onnx_model, pairs_per_query, args.batch_size)
+
+    ndcgs = []
+    overlaps = []
+    for ref, quant in zip(reference, quantized):
+        order = np.argsort(-quant)
+        ndcgs.append(ndcg(ref, order, args.final_k))
+        top_ref = set(np.argsort(-ref)[:args.final_k])
+        overlaps.append(len(top_ref & set(order[:args.final_k])) / min(args.final_k, len(ref)))
+
+    print()
+    print(f"{'backend':<22}{'seconds':>10}{'pairs/s':>10}")
+    print(f"{'PyTorch fp32':<22}{torch_seconds:>10.2f}{total_pairs / torch_seconds:>10.0f}")
+    print(f"{'ONNX Runtime int8':<22}{onnx_seconds:>10.2f}{total_pairs / onnx_seconds:>10.0f}")
+    print()
+    print(f"Speedup: {torch_seconds / onnx_seconds:.1f}x")
+    print(f"NDCG@{args.final_k} vs PyTorch: mean {np.mean(ndcgs):.4f}, min {np.min(ndcgs):.4f}")
+    print(f"Top-{args.final_k} overlap: {np.mean(overlaps):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark LlmChain startup, loading components eagerly or in the background.
+
+Each mode runs in a fresh interpreter, so no model or module is already
+loaded. Reports the time to import src.dashboard.llm, until the
+constructor returns (when a page could render), and until the first
+question can be answered, plus how long each component took to load:
+tokenizer, embeddings, reranker and index (which includes opening Chroma,
+loading the BM25 index and building the conversation chain). Uses the
+data/ index; the first eager run builds it if missing.
+
+Usage:
+    python -m benchmarks.bench_startup --embedding-model text-embedding-3-small
+"""
+
+import sys
+import json
+import argparse
+import subprocess
+
+# Runs in the child interpreter; prints one JSON line of timings
+_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from src.dashboard.llm import LlmChain, RAGConfig
+imported = time.perf_counter()
+config = RAGConfig(background_loading=sys.argv[1] == "background", use_reranker=sys.argv[2] == "1")
+if sys.argv[3]:
+    config.provider_config.embedding_model = sys.argv[3]
+chain = LlmChain(config)
+returned = time.perf_counter()
+chain.wait_until_ready()
+ready = time.perf_counter()
+print(json.dumps({
+    "import": imported - start,
+    "constructor": returned - imported,
+    "ready": ready - imported,
+    "components": chain.load_times,
+    "status": chain.loading_status(),
+}))
+"""
+
+COMPONENTS = ["tokenizer", "embeddings", "reranker", "index", "bm25", "chain"]
+
+
+def run(mode: str, reranker: bool, embedding_model: str) -> dict:
+    """Start a chain in a fresh interpreter and return its timings."""
+    result = subprocess.run(
+        [sys.executable, "-c", _CHILD, mode, "1" if reranker else "0", embedding_model],
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--embedding-model", default="")
+    parser.add_argument("--no-reranker", action="store_true")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    results = {}
+    for mode in ("eager", "background"):
+        runs = [run(mode, not args.no_reranker, args.embedding_model) for _ in range(args.runs)]
+        # Median run by time until ready
+        results[mode] = sorted(runs, key=lambda r: r["ready"])[len(runs) // 2]
+
+    print(f"{'seconds':<24}{'eager':>12}{'background':>12}")
+    for key, label in [("import", "import llm"), ("constructor", "constructor returns"),
+                       ("ready", "ready to answer")]:
+        print(f"{label:<24}{results['eager'][key]:>12.2f}{results['background'][key]:>12.2f}")
+
+    print()
+    print("Per component (index includes bm25 and chain):")
+    for component in COMPONENTS:
+        eager = results["eager"]["components"].get(component)
+        background = results["background"]["components"].get(component)
+        if eager is None and background is None:
+            continue
+        print(f"  {component:<22}{eager or 0:>12.2f}{background or 0:>12.2f}")
+
+    failed = [name for name, state in results["background"]["status"].items() if state != "ready"]
+    if failed:
+        print(f"\nFailed to load in the background: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,487 @@
+"""
+Persistent, vectorized BM25 keyword index.
+
+The index is stored as flat NumPy arrays (term postings, document lengths,
+idf and precomputed BM25 weights) plus a JSON-lines dump of the chunks, all
+memory-mapped on load. A Streamlit session therefore opens the index without
+pulling every chunk out of Chroma or re-tokenizing the corpus.
+
+The postings double as a SciPy CSR term-document matrix, so a batch of
+queries is scored with a single sparse matrix product instead of a Python
+loop over every chunk. Filterable metadata (see filters.py) is kept as one
+array of value codes per field; a filtered search scores only the columns
+of the matching chunks, cached per filter.
+
+BM25Builder writes an index straight to disk from chunks streamed in one
+at a time, so an index build never holds the whole corpus in memory.
+"""
+
+import os
+import re
+import json
+import mmap
+import shutil
+import logging
+import threading
+from array import array
+from collections import Counter, OrderedDict
+from itertools import repeat
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from scipy import sparse
+from langchain.schema import Document
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+
+from src.dashboard.filters import (
+    FILTER_FIELDS,
+    MetadataFilters,
+    filter_key,
+    normalize_filters,
+)
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 3
+_TOKEN_PATTERN = re.compile(r"\w+")
+# Filtered postings kept per index; each holds a slice of the matrix
+MAX_CACHED_SUBSETS = 32
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokenizer shared by indexing and querying."""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an inverted index held in NumPy arrays.
+
+    Postings for term t live in doc_ids[indptr[t]:indptr[t + 1]] with the
+    matching term frequencies in term_freqs. The per-posting BM25 weights
+    are precomputed, so (indptr, doc_ids, weights) is a CSR matrix of shape
+    (vocabulary, documents) and scoring is a sparse matrix product.
+    """
+
+    def __init__(
+        self,
+        vocab: dict[str, int],
+        indptr: np.ndarray,
+        doc_ids: np.ndarray,
+        term_freqs: np.ndarray,
+        doc_lengths: np.ndarray,
+        idf: np.ndarray,
+        k1: float = 1.5,
+        b: float = 0.75,
+        weights: Optional[np.ndarray] = None,
+        documents: Optional[list[Document]] = None,
+        facets: Optional[dict[str, tuple[list[str], np.ndarray]]] = None,
+    ):
+        self.vocab = vocab
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.doc_lengths = doc_lengths
+        self.idf = idf
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+        self.weights = weights if weights is not None else self._compute_weights()
+        self.matrix = sparse.csr_matrix(
+            (self.weights, self.doc_ids, self.indptr),
+            shape=(len(vocab), len(doc_lengths)),
+            copy=False,
+        )
+        # Per filter field: distinct values and each document's value code
+        # (-1 when the document has none)
+        self.facets = facets or {}
+        self._subsets: OrderedDict[str, tuple[np.ndarray, sparse.csr_matrix]] = OrderedDict()
+        self._subsets_lock = threading.Lock()
+
+        # Either in memory (freshly built) or read lazily from the saved dump
+        self._documents = documents
+        self._doc_file = None
+        self._doc_mmap: Optional[mmap.mmap] = None
+        self._doc_offsets: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    @classmethod
+    def build(
+        cls,
+        documents: list[Document],
+        k1: float = 1.5,
+        b: float = 0.75
+    ) -> "BM25Index":
+        """Tokenize documents and build the inverted index."""
+        postings = _Postings()
+        for doc in documents:
+            postings.add(doc)
+        return postings.index(k1, b, documents=list(documents))
+
+    def _compute_weights(self) -> np.ndarray:
+        """BM25 contribution of each posting: idf * saturated, length-normalized tf."""
+        if not len(self.doc_ids):
+            return np.zeros(0, dtype=np.float32)
+
+        length_norm = self.k1 * (
+            1 - self.b + self.b * self.doc_lengths / self.avg_doc_length
+        )
+        term_ids = np.repeat(
+            np.arange(len(self.vocab), dtype=np.int32), np.diff(self.indptr)
+        )
+        tf = self.term_freqs
+        weights = self.idf[term_ids] * tf * (self.k1 + 1) / (tf + length_norm[self.doc_ids])
+        return weights.astype(np.float32)
+
+    def _query_matrix(self, queries: list[str]) -> sparse.csr_matrix:
+        """Term-count matrix of shape (queries, vocabulary)."""
+        rows, cols = [], []
+        for row, query in enumerate(queries):
+            for token in tokenize(query):
+                term_id = self.vocab.get(token)
+                if term_id is not None:
+                    rows.append(row)
+                    cols.append(term_id)
+        data = np.ones(len(rows), dtype=np.float32)
+        # Duplicate (row, col) entries are summed, giving query term counts
+        return sparse.csr_matrix(
+            (data, (np.asarray(rows, dtype=np.int32), np.asarray(cols, dtype=np.int32))),
+            shape=(len(queries), len(self.vocab))
+        )
+
+    def get_scores_batch(self, queries: list[str]) -> np.ndarray:
+        """BM25 scores of every document for each query, shape (queries, docs)."""
+        if not len(self) or not len(self.vocab):
+            return np.zeros((len(queries), len(self)), dtype=np.float32)
+        return (self._query_matrix(queries) @ self.matrix).toarray()
+
+    def get_scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document for the query."""
+        return self.get_scores_batch([query])[0]
+
+    def matching_documents(self, filters: Optional[MetadataFilters]) -> np.ndarray:
+        """Indices of the documents whose metadata passes filters."""
+        mask = np.ones(len(self), dtype=bool)
+        for field, values in normalize_filters(filters).items():
+            names, codes = self.facets.get(field, ([], np.full(len(self), -1)))
+            wanted = [code for code, name in enumerate(names) if name in values]
+            mask &= np.isin(codes, wanted)
+        return np.flatnonzero(mask)
+
+    def _subset(self, filters: MetadataFilters) -> tuple[np.ndarray, sparse.csr_matrix]:
+        """
+        Matching document indices and their columns of the BM25 matrix.
+
+        Slicing costs one pass over the postings, so slices are cached per
+        filter; queries against a cached slice cost as much as the slice.
+        """
+        key = filter_key(filters)
+        with self._subsets_lock:
+            if key in self._subsets:
+                self._subsets.move_to_end(key)
+                return self._subsets[key]
+
+        doc_ids = self.matching_documents(filters)
+        subset = (doc_ids, self.matrix[:, doc_ids].tocsr())
+        with self._subsets_lock:
+            self._subsets[key] = subset
+            while len(self._subsets) > MAX_CACHED_SUBSETS:
+                self._subsets.popitem(last=False)
+        return subset
+
+    def search_batch(
+        self,
+        queries: list[str],
+        k: int,
+        filters: Optional[MetadataFilters] = None
+    ) -> list[list[tuple[int, float]]]:
+        """
+        Return (doc index, score) of the top-k documents for each query.
+
+        With filters, only the documents matching them are scored.
+        """
+        if normalize_filters(filters):
+            doc_map, matrix = self._subset(filters)
+            scores = (self._query_matrix(queries) @ matrix).toarray()
+        else:
+            doc_map = None
+            scores = self.get_scores_batch(queries)
+        n_docs = scores.shape[1]
+        if k < n_docs:
+            candidates = np.argpartition(-scores, k, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(n_docs), scores.shape)
+
+        results = []
+        for row, row_candidates in zip(scores, candidates):
+            ranked = row_candidates[np.argsort(-row[row_candidates], kind="stable")]
+            hits = [(int(i), float(row[i])) for i in ranked if row[i] > 0]
+            if doc_map is not None:
+                hits = [(int(doc_map[i]), score) for i, score in hits]
+            results.append(hits)
+        return results
+
+    def search(
+        self,
+        query: str,
+        k: int,
+        filters: Optional[MetadataFilters] = None
+    ) -> list[tuple[int, float]]:
+        """Return (doc index, score) of the top-k matching documents."""
+        return self.search_batch([query], k, filters)[0]
+
+    def get_document(self, index: int) -> Document:
+        """Fetch a stored chunk by its position in the index."""
+        if self._documents is not None:
+            return self._documents[index]
+        start, end = self._doc_offsets[index], self._doc_offsets[index + 1]
+        record = json.loads(self._doc_mmap[start:end])
+        return Document(page_content=record["page_content"], metadata=record["metadata"])
+
+    def close(self) -> None:
+        """
+        Release the files of a loaded index once it is no longer served.
+
+        The documents file is closed and the array memory maps are dropped,
+        so the index directory can be deleted (Windows refuses to delete
+        open or mapped files). A closed index cannot be searched.
+        """
+        if self._doc_mmap is not None:
+            self._doc_mmap.close()
+            self._doc_mmap = None
+        if self._doc_file is not None:
+            self._doc_file.close()
+            self._doc_file = None
+        # NumPy unmaps each array once nothing refers to it
+        with self._subsets_lock:
+            self._subsets.clear()
+        self.matrix = self.weights = self.indptr = self.doc_ids = self.term_freqs = None
+        self.idf = self._doc_offsets = None
+        self.doc_lengths = np.zeros(0, dtype=np.int32)
+        self.facets = {}
+
+    def save(self, directory: Path, fingerprint: str) -> None:
+        """Write the index to a directory, replacing any previous one."""
+        tmp_dir = directory.with_name(directory.name + ".tmp")
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        tmp_dir.mkdir(parents=True)
+
+        offsets = [0]
+        with open(tmp_dir / "documents.jsonl", "wb") as f:
+            for index in range(len(self)):
+                offsets.append(offsets[-1] + _write_document(f, self.get_document(index)))
+        self._save_arrays(tmp_dir, offsets, fingerprint)
+
+        if directory.exists():
+            shutil.rmtree(directory)
+        os.replace(tmp_dir, directory)
+        logger.info(f"Saved BM25 index ({len(self)} chunks) to {directory}")
+
+    def _save_arrays(self, tmp_dir: Path, offsets: list[int], fingerprint: str) -> None:
+        """Write everything but the documents file next to it."""
+        np.save(tmp_dir / "doc_offsets.npy", np.asarray(offsets, dtype=np.int64))
+        np.save(tmp_dir / "indptr.npy", self.indptr)
+        np.save(tmp_dir / "doc_ids.npy", self.doc_ids)
+        np.save(tmp_dir / "term_freqs.npy", self.term_freqs)
+        np.save(tmp_dir / "doc_lengths.npy", self.doc_lengths)
+        np.save(tmp_dir / "idf.npy", self.idf)
+        np.save(tmp_dir / "weights.npy", self.weights)
+        (tmp_dir / "vocab.json").write_text(json.dumps(self.vocab))
+        (tmp_dir / "facets.json").write_text(
+            json.dumps({field: names for field, (names, _) in self.facets.items()})
+        )
+        for field, (_, codes) in self.facets.items():
+            np.save(tmp_dir / f"facet_{field}.npy", codes)
+        (tmp_dir / "meta.json").write_text(json.dumps({
+            "version": INDEX_VERSION,
+            "fingerprint": fingerprint,
+            "k1": self.k1,
+            "b": self.b,
+        }))
+
+    @classmethod
+    def load(cls, directory: Path, fingerprint: str) -> Optional["BM25Index"]:
+        """
+        Memory-map a saved index.
+
+        Returns None if it is missing, from an older format, or was built
+        for different content than the given fingerprint.
+        """
+        try:
+            meta = json.loads((directory / "meta.json").read_text())
+        except (OSError, ValueError):
+            return None
+        if meta.get("version") != INDEX_VERSION or meta.get("fingerprint") != fingerprint:
+            return None
+
+        try:
+            def load_array(name: str) -> np.ndarray:
+                return np.load(directory / f"{name}.npy", mmap_mode="r")
+
+            facets = {
+                field: (names, load_array(f"facet_{field}"))
+                for field, names in json.loads((directory / "facets.json").read_text()).items()
+            }
+
+            index = cls(
+                json.loads((directory / "vocab.json").read_text()),
+                load_array("indptr"),
+                load_array("doc_ids"),
+                load_array("term_freqs"),
+                load_array("doc_lengths"),
+                load_array("idf"),
+                k1=meta["k1"],
+                b=meta["b"],
+                weights=load_array("weights"),
+                facets=facets,
+            )
+            index._doc_offsets = load_array("doc_offsets")
+            index._doc_file = open(directory / "documents.jsonl", "rb")
+            if index._doc_offsets[-1] > 0:
+                index._doc_mmap = mmap.mmap(
+                    index._doc_file.fileno(), 0, access=mmap.ACCESS_READ
+                )
+        except Exception as e:
+            logger.warning(f"Failed to load BM25 index from {directory}: {e}")
+            return None
+
+        logger.info(f"Loaded BM25 index ({len(index)} chunks) from {directory}")
+        return index
+
+
+def _write_document(f, doc: Document) -> int:
+    """Append a chunk to a documents.jsonl file; returns the bytes written."""
+    line = json.dumps({"page_content": doc.page_content, "metadata": doc.metadata}).encode() + b"\n"
+    f.write(line)
+    return len(line)
+
+
+class _Postings:
+    """Postings, document lengths and facet codes, added one document at a time."""
+
+    def __init__(self):
+        self.vocab: dict[str, int] = {}
+        # Typed arrays: a few bytes per posting instead of a Python int each
+        self.term_ids = array("i")
+        self.doc_ids = array("i")
+        self.term_freqs = array("f")
+        self.doc_lengths = array("i")
+        self.facet_values: dict[str, dict[str, int]] = {field: {} for field in FILTER_FIELDS}
+        self.facet_codes = {field: array("i") for field in FILTER_FIELDS}
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, doc: Document) -> None:
+        doc_id = len(self.doc_lengths)
+        tokens = tokenize(doc.page_content)
+        self.doc_lengths.append(len(tokens))
+        counts = Counter(tokens)
+        self.term_ids.extend(self.vocab.setdefault(token, len(self.vocab)) for token in counts)
+        self.doc_ids.extend(repeat(doc_id, len(counts)))
+        self.term_freqs.extend(counts.values())
+        for field in FILTER_FIELDS:
+            value = doc.metadata.get(field)
+            values = self.facet_values[field]
+            self.facet_codes[field].append(
+                -1 if value is None else values.setdefault(str(value), len(values))
+            )
+
+    def index(self, k1: float, b: float, documents: Optional[list[Document]] = None) -> BM25Index:
+        # Group postings by term; a stable sort keeps doc ids ascending per term
+        n_postings = len(self.term_ids)
+        index_dtype = np.int32 if n_postings < np.iinfo(np.int32).max else np.int64
+        term_ids = np.asarray(self.term_ids).astype(index_dtype)
+        order = np.argsort(term_ids, kind="stable")
+        doc_ids = np.asarray(self.doc_ids).astype(index_dtype)[order]
+        term_freqs = np.asarray(self.term_freqs, dtype=np.float32)[order]
+
+        # SciPy keeps the arrays as-is (no copy) when both share an index dtype
+        indptr = np.zeros(len(self.vocab) + 1, dtype=index_dtype)
+        indptr[1:] = np.cumsum(np.bincount(term_ids, minlength=len(self.vocab)))
+
+        doc_freqs = np.diff(indptr).astype(np.float64)
+        n_docs = len(self)
+        idf = np.log1p((n_docs - doc_freqs + 0.5) / (doc_freqs + 0.5)).astype(np.float32)
+
+        facets = {
+            field: (list(self.facet_values[field]), np.asarray(self.facet_codes[field], dtype=np.int32))
+            for field in FILTER_FIELDS
+        }
+        return BM25Index(
+            self.vocab, indptr, doc_ids, term_freqs,
+            np.asarray(self.doc_lengths, dtype=np.int32), idf,
+            k1=k1, b=b, documents=documents, facets=facets,
+        )
+
+
+class BM25Builder:
+    """
+    Build a saved BM25Index from chunks added one at a time.
+
+    Each chunk is appended to the index's documents file as it arrives and
+    only its postings stay in memory, so a build holds compact arrays
+    rather than the corpus. finish() writes the arrays and returns the
+    index memory-mapped from directory, as BM25Index.load would.
+    """
+
+    def __init__(self, directory: Path, k1: float = 1.5, b: float = 0.75):
+        self.directory = Path(directory)
+        self.k1 = k1
+        self.b = b
+        self._tmp_dir = self.directory.with_name(self.directory.name + ".tmp")
+        if self._tmp_dir.exists():
+            shutil.rmtree(self._tmp_dir)
+        self._tmp_dir.mkdir(parents=True)
+        self._file = open(self._tmp_dir / "documents.jsonl", "wb")
+        self._offsets = array("q", [0])
+        self._postings = _Postings()
+
+    def __len__(self) -> int:
+        return len(self._postings)
+
+    def add(self, doc: Document) -> None:
+        self._offsets.append(self._offsets[-1] + _write_document(self._file, doc))
+        self._postings.add(doc)
+
+    def finish(self, fingerprint: str) -> BM25Index:
+        """Save the index under directory, replacing any previous one, and open it."""
+        self._file.close()
+        self._postings.index(self.k1, self.b)._save_arrays(self._tmp_dir, self._offsets, fingerprint)
+        if self.directory.exists():
+            shutil.rmtree(self.directory)
+        os.replace(self._tmp_dir, self.directory)
+        logger.info(f"Saved BM25 index ({len(self)} chunks) to {self.directory}")
+
+        index = BM25Index.load(self.directory, fingerprint)
+        if index is None:
+            raise RuntimeError(f"Could not open the BM25 index written to {self.directory}")
+        return index
+
+
+class BM25IndexRetriever(BaseRetriever):
+    """LangChain retriever over a BM25Index."""
+
+    index: BM25Index
+    k: int = 4
+    filters: Optional[MetadataFilters] = None  # Restrict results to matching chunks
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        return self.search_many([query])[0]
+
+    def search_many(self, queries: list[str]) -> list[list[Document]]:
+        """Retrieve for several queries with one sparse matrix product."""
+        return [
+            [self.index.get_document(doc_index) for doc_index, _ in hits]
+            for hits in self.index.search_batch(queries, self.k, self.filters)
+        ]
@@ -0,0 +1,428 @@
+"""
+Caching layers for the RAG pipeline.
+
+- EmbeddingCache: disk-backed, size-bounded store of embedding vectors keyed
+  by (embedding model, text hash), shared across rebuilds and providers
+- CachedEmbeddings: LangChain Embeddings wrapper that consults the cache
+  before calling the underlying provider
+- TTLCache: small in-memory LRU cache with expiry, used to memoize query
+  expansions per normalized question
+- SemanticAnswerCache: answers to previous questions, looked up by cosine
+  similarity of question embeddings and tied to one version of the index
+"""
+
+import re
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Hashable, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed embedding store with least-recently-used eviction.
+
+    Vectors are stored as float32 blobs. Lookups refresh an entry's
+    last-used timestamp; once the store grows past max_entries the
+    least recently used vectors are evicted.
+    """
+
+    # SQLite limits the number of bound parameters per statement
+    _QUERY_BATCH = 500
+
+    def __init__(self, path: Path, max_entries: int = 200_000):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use."""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (model, kind, text_hash)
+                )"""
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used "
+                "ON embeddings (last_used)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        """Content address of a piece of text."""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, kind: str, hashes: list[str]) -> dict[str, list[float]]:
+        """Look up vectors by text hash, returning only the ones found."""
+        found: dict[str, list[float]] = {}
+        unique = list(dict.fromkeys(hashes))
+
+        with self._lock:
+            conn = self._connect()
+            for start in range(0, len(unique), self._QUERY_BATCH):
+                batch = unique[start:start + self._QUERY_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND kind = ? AND text_hash IN ({placeholders})",
+                    [model, kind, *batch],
+                ).fetchall()
+                for text_hash, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[text_hash] = vector.tolist()
+
+            if found:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE embeddings SET last_used = ? "
+                    "WHERE model = ? AND kind = ? AND text_hash = ?",
+                    [(now, model, kind, h) for h in found],
+                )
+                conn.commit()
+
+            self.hits += len(found)
+            self.misses += len(unique) - len(found)
+
+        return found
+
+    def put_many(self, model: str, kind: str, vectors: dict[str, list[float]]) -> None:
+        """Store vectors and evict the least recently used past the size bound."""
+        if not vectors:
+            return
+
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings "
+                "(model, kind, text_hash, vector, last_used) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (model, kind, h, array("f", vector).tobytes(), now)
+                    for h, vector in vectors.items()
+                ],
+            )
+
+            (count,) = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            overflow = count - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN ("
+                    "SELECT rowid FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                    (overflow,),
+                )
+                logger.debug(f"Evicted {overflow} cached embeddings")
+            conn.commit()
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process and current store size."""
+        total = self.hits + self.misses
+        entries = 0
+        if self.path.exists():
+            with self._lock:
+                (entries,) = self._connect().execute(
+                    "SELECT COUNT(*) FROM embeddings"
+                ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+        }
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that only sends cache misses to the provider.
+
+    Documents and queries are cached separately because some providers
+    embed them differently (e.g. Cohere input types, Nomic prefixes).
+    """
+
+    def __init__(self, underlying: Embeddings, model_name: str, cache: EmbeddingCache):
+        self.underlying = underlying
+        self.model_name = model_name
+        self.cache = cache
+
+    def _split_misses(
+        self, texts: list[str], kind: str
+    ) -> tuple[list[str], dict[str, list[float]], dict[str, str]]:
+        """Return text hashes, cached vectors and the unique texts to embed."""
+        hashes = [EmbeddingCache.text_hash(text) for text in texts]
+        found = self.cache.get_many(self.model_name, kind, hashes)
+        missing = {
+            h: text for h, text in zip(hashes, texts) if h not in found
+        }
+        return hashes, found, missing
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        hashes, found, missing = self._split_misses(texts, "document")
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(self.model_name, "document", computed)
+            found.update(computed)
+        return [found[h] for h in hashes]
+
+    def embed_query(self, text: str) -> list[float]:
+        hashes, found, missing = self._split_misses([text], "query")
+        if missing:
+            vector = self.underlying.embed_query(text)
+            self.cache.put_many(self.model_name, "query", {hashes[0]: vector})
+            return vector
+        return found[hashes[0]]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        hashes, found, missing = self._split_misses(texts, "document")
+        if missing:
+            vectors = await self.underlying.aembed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(self.model_name, "document", computed)
+            found.update(computed)
+        return [found[h] for h in hashes]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        hashes, found, missing = self._split_misses([text], "query")
+        if missing:
+            vector = await self.underlying.aembed_query(text)
+            self.cache.put_many(self.model_name, "query", {hashes[0]: vector})
+            return vector
+        return found[hashes[0]]
+
+
+def normalize_question(text: str) -> str:
+    """Canonical form of a question: lowercase, single-spaced, no trailing punctuation."""
+    return re.sub(r"\s+", " ", text).strip().rstrip("?!. ").lower()
+
+
+class TTLCache:
+    """
+    Thread-safe in-memory LRU cache whose entries expire after ttl seconds.
+
+    Expired entries are dropped lazily when looked up; once more than
+    max_entries are stored the least recently used one is evicted.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self),
+            "max_entries": self.max_entries,
+        }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+@dataclass
+class CachedAnswer:
+    """A stored answer and the sources it cited."""
+    question: str
+    answer: str
+    sources: Any
+    similarity: float = 1.0
+
+
+class SemanticAnswerCache:
+    """
+    In-memory cache of answers keyed by question embedding.
+
+    A question hits when its cosine similarity to a stored question reaches
+    threshold. Every entry belongs to one index version (content hash plus
+    whatever else shapes answers); looking up or storing under a different
+    version drops all entries, so answers never outlive the materials they
+    were generated from. Entries also carry a scope, such as the metadata
+    filters they were retrieved under, and only match lookups in the same
+    scope. Past max_entries the least recently hit answer is evicted.
+    """
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 1000):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.version: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self._vectors: Optional[np.ndarray] = None  # Unit rows, one per entry
+        self._entries: list[CachedAnswer] = []
+        self._scopes: list[str] = []
+        self._last_used: list[int] = []
+        self._tick = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(vector) -> Optional[np.ndarray]:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else None
+
+    def _reset(self) -> None:
+        """Drop every entry. Caller holds the lock."""
+        self._vectors = None
+        self._entries = []
+        self._scopes = []
+        self._last_used = []
+
+    def _check_version(self, version: str) -> None:
+        """Invalidate everything when the index version changes. Caller holds the lock."""
+        if version != self.version:
+            if self._entries:
+                logger.info(f"Index changed; dropping {len(self._entries)} cached answers")
+            self.version = version
+            self._reset()
+
+    def lookup(self, vector, version: str, scope: str = "") -> Optional[CachedAnswer]:
+        """Best stored answer in scope at or above the similarity threshold, if any."""
+        query = self._normalize(vector)
+
+        with self._lock:
+            self._check_version(version)
+            if query is None or self._vectors is None or self._vectors.shape[1] != query.shape[0]:
+                self.misses += 1
+                return None
+
+            similarities = self._vectors @ query
+            similarities[np.array(self._scopes) != scope] = -np.inf
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._tick += 1
+            self._last_used[best] = self._tick
+            entry = self._entries[best]
+            return CachedAnswer(entry.question, entry.answer, entry.sources,
+                                float(similarities[best]))
+
+    def store(
+        self,
+        vector,
+        version: str,
+        question: str,
+        answer: str,
+        sources: Any,
+        scope: str = ""
+    ) -> None:
+        """Remember an answer for the given question embedding."""
+        row = self._normalize(vector)
+        if row is None:
+            return
+
+        with self._lock:
+            self._check_version(version)
+            if self._vectors is not None and self._vectors.shape[1] != row.shape[0]:
+                self._reset()  # Embedding dimension changed
+
+            self._tick += 1
+            entry = CachedAnswer(question, answer, sources)
+            if self._vectors is not None and len(self._entries) >= self.max_entries:
+                victim = int(np.argmin(self._last_used))
+                self._vectors[victim] = row
+                self._entries[victim] = entry
+                self._scopes[victim] = scope
+                self._last_used[victim] = self._tick
+                return
+
+            row = row[np.newaxis, :]
+            self._vectors = row if self._vectors is None else np.vstack([self._vectors, row])
+            self._entries.append(entry)
+            self._scopes.append(scope)
+            self._last_used.append(self._tick)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+        }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,260 @@
+"""
+Token-aware, structure-aware chunking.
+
+Embedding models and LLM context windows are limited in tokens, not
+characters, so chunk sizes are measured with a tiktoken encoding. A
+document is cut once into structural units (paragraphs, starting afresh
+at markdown headings and slide or page breaks); only units larger than a
+chunk are cut further, by lines, then sentences, then token windows. Each
+unit is tokenized once and units are packed greedily into chunks, so the
+work is linear in the length of the document.
+"""
+
+import re
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from langchain.schema import Document
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENCODING = "cl100k_base"
+
+_HEADING_RE = re.compile(r"#{1,6}\s+(.*)")
+# A line holding only a number is a slide or page number printed by the PDF
+_PAGE_NUMBER_RE = re.compile(r"\d{1,4}")
+# Finer cuts for units larger than a chunk, tried in order
+_REFINE_PATTERNS = [
+    re.compile(r"\n"),
+    re.compile(r"(?<=[.!?;])\s+"),
+]
+# Fallback tokens: words and single punctuation marks
+_WORD_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+class TiktokenTokenizer:
+    """Token counts and offsets from a tiktoken encoding."""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        self.name = encoding.name
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode_ordinary(text))
+
+    def token_starts(self, text: str) -> list[int]:
+        """Character offset at which each token of text starts."""
+        tokens = self.encoding.encode_ordinary(text)
+        return self.encoding.decode_with_offsets(tokens)[1]
+
+
+class RegexTokenizer:
+    """Approximate token counts for when no tiktoken encoding can be loaded."""
+
+    name = "regex"
+
+    def count(self, text: str) -> int:
+        return len(_WORD_TOKEN_RE.findall(text))
+
+    def token_starts(self, text: str) -> list[int]:
+        return [match.start() for match in _WORD_TOKEN_RE.finditer(text)]
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(encoding: str = DEFAULT_ENCODING):
+    """
+    Tokenizer for a tiktoken encoding or model name, loaded once per process.
+
+    tiktoken downloads encodings on first use; offline installs without a
+    cached copy fall back to approximate, word-based counts.
+    """
+    try:
+        import tiktoken
+        try:
+            return TiktokenTokenizer(tiktoken.get_encoding(encoding))
+        except ValueError:
+            return TiktokenTokenizer(tiktoken.encoding_for_model(encoding))
+    except Exception as e:
+        logger.warning(f"Tokenizer {encoding} unavailable ({e}); approximating token counts")
+        return RegexTokenizer()
+
+
+@dataclass
+class _Unit:
+    """A span of the document that is never split between chunks."""
+    start: int
+    end: int
+    tokens: int
+    boundary: bool = False  # Starts a heading section, slide or page
+    section: Optional[str] = None
+
+
+class TokenChunker:
+    """
+    Split documents into chunks of at most chunk_size tokens.
+
+    Consecutive chunks share up to chunk_overlap tokens: the whole trailing
+    units that fit, or else a token-level tail of the last unit, so text
+    cut by sentences or token windows overlaps too. A chunk ends at a heading, slide or page break once it holds at least
+    boundary_fill * chunk_size tokens, and no overlap is carried across
+    such a break. Token counts of units are summed, so a chunk may differ
+    from chunk_size by the few tokens merged across unit boundaries.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 256,
+        chunk_overlap: int = 32,
+        encoding: str = DEFAULT_ENCODING,
+        boundary_fill: float = 0.5
+    ):
+        if chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.boundary_fill = boundary_fill
+        self.encoding = encoding
+        self.tokenizer = get_tokenizer(encoding)
+
+    @property
+    def key(self) -> str:
+        """Identifies the chunking; chunks cut differently do not mix in one index."""
+        # The configured encoding, not the tokenizer loaded: an index chunked
+        # with approximate counts offline is not rebuilt once tiktoken loads
+        return f"tokens:{self.encoding}:{self.chunk_size}:{self.chunk_overlap}"
+
+    def _structure(self, text: str) -> list[_Unit]:
+        """Paragraph units covering text, flagging heading, slide and page starts."""
+        cuts: list[tuple[int, bool, Optional[str]]] = []
+        section = None
+        offset = 0
+        blank = True
+        after_break = False
+
+        for line in text.splitlines(keepends=True):
+            stripped = line.strip()
+            if stripped:
+                heading = _HEADING_RE.fullmatch(stripped)
+                if heading:
+                    section = heading.group(1).strip()
+                    cuts.append((offset, True, section))
+                elif after_break or blank:
+                    cuts.append((offset, after_break, section))
+                after_break = bool(_PAGE_NUMBER_RE.fullmatch(stripped))
+            blank = not stripped
+            if line.endswith("\f"):
+                after_break = True
+            offset += len(line)
+
+        if not cuts:
+            return []
+        # Leading whitespace belongs to the first unit
+        cuts[0] = (0,) + cuts[0][1:]
+        ends = [start for start, _, _ in cuts[1:]] + [len(text)]
+        return [
+            _Unit(start, end, self.tokenizer.count(text[start:end]), boundary, section)
+            for (start, boundary, section), end in zip(cuts, ends)
+        ]
+
+    def _refine(self, text: str, unit: _Unit, level: int = 0) -> list[_Unit]:
+        """Cut a unit larger than a chunk by lines, sentences, then tokens."""
+        if unit.tokens <= self.chunk_size:
+            return [unit]
+
+        if level < len(_REFINE_PATTERNS):
+            stops = [m.end() for m in _REFINE_PATTERNS[level].finditer(text, unit.start, unit.end)]
+            starts = [unit.start] + [stop for stop in stops if unit.start < stop < unit.end]
+            ends = starts[1:] + [unit.end]
+            pieces = []
+            for start, end in zip(starts, ends):
+                piece = _Unit(start, end, self.tokenizer.count(text[start:end]), section=unit.section)
+                pieces.extend(self._refine(text, piece, level + 1))
+        else:
+            # Windows leave room for the overlap _pack carries into the next chunk
+            step = self.chunk_size - self.chunk_overlap
+            offsets = self.tokenizer.token_starts(text[unit.start:unit.end])
+            bounds = [unit.start + offsets[i] for i in range(0, len(offsets), step)]
+            ends = bounds[1:] + [unit.end]
+            pieces = [
+                _Unit(start, end, min(step, len(offsets) - i * step), section=unit.section)
+                for i, (start, end) in enumerate(zip(bounds, ends))
+            ]
+
+        if pieces:
+            pieces[0].start = unit.start
+            pieces[0].boundary = unit.boundary
+        return pieces
+
+    def _tail(self, text: str, unit: _Unit, tokens: int) -> _Unit:
+        """The last tokens of a unit, as a unit of its own."""
+        offsets = self.tokenizer.token_starts(text[unit.start:unit.end])
+        tokens = min(tokens, len(offsets))
+        if tokens == 0:
+            return _Unit(unit.end, unit.end, 0, section=unit.section)
+        return _Unit(unit.start + offsets[-tokens], unit.end, tokens, section=unit.section)
+
+    def _pack(self, text: str, units: list[_Unit]) -> list[list[_Unit]]:
+        """Greedily group units into chunks of at most chunk_size tokens."""
+        groups = []
+        current: list[_Unit] = []
+        tokens = 0
+        fresh = False  # current holds units not yet in an emitted chunk
+
+        for unit in units:
+            if fresh and unit.boundary and tokens >= self.boundary_fill * self.chunk_size:
+                groups.append(current)
+                current, tokens, fresh = [], 0, False
+            elif fresh and tokens + unit.tokens > self.chunk_size:
+                groups.append(current)
+                # Carry whole trailing units as overlap, leaving room for unit
+                budget = min(self.chunk_overlap, self.chunk_size - unit.tokens)
+                carried = 0
+                keep = len(current)
+                while keep and carried + current[keep - 1].tokens <= budget:
+                    keep -= 1
+                    carried += current[keep].tokens
+                if keep and not carried and budget > 0:
+                    # The last unit is larger than the overlap: carry its tail
+                    tail = self._tail(text, current[keep - 1], budget)
+                    current, tokens = [tail] + current[keep:], tail.tokens
+                else:
+                    current, tokens = current[keep:], carried
+                fresh = False
+
+            while current and tokens + unit.tokens > self.chunk_size:
+                tokens -= current.pop(0).tokens
+            current.append(unit)
+            tokens += unit.tokens
+            fresh = True
+
+        if fresh:
+            groups.append(current)
+        return groups
+
+    def split_text_with_offsets(self, text: str) -> list[tuple[str, int, Optional[str]]]:
+        """Chunks of text as (chunk, start offset, enclosing section) tuples."""
+        units = [piece for unit in self._structure(text) for piece in self._refine(text, unit)]
+        chunks = []
+        for group in self._pack(text, units):
+            raw = text[group[0].start:group[-1].end]
+            chunk = raw.strip()
+            if chunk:
+                start = group[0].start + len(raw) - len(raw.lstrip())
+                chunks.append((chunk, start, group[0].section))
+        return chunks
+
+    def split_text(self, text: str) -> list[str]:
+        return [chunk for chunk, _, _ in self.split_text_with_offsets(text)]
+
+    def split_documents(self, documents: list[Document]) -> list[Document]:
+        """Split documents, recording start_index and section in chunk metadata."""
+        chunks = []
+        for doc in documents:
+            for text, start, section in self.split_text_with_offsets(doc.page_content):
+                metadata = {**doc.metadata, 'start_index': start}
+                if section is not None:
+                    metadata['section'] = section
+                chunks.append(Document(page_content=text, metadata=metadata))
+        return chunks
@@ -0,0 +1,148 @@
+"""
+Chunk deduplication before embedding.
+
+Course folders often hold the same material more than once: a PDF next to
+its extracted text, slides re-posted under a new name, a syllabus pasted
+into every lecture. Chunk ids are derived from content and the chunk's
+filterable metadata (its scope), so exact copies within a scope share an
+id; optionally, near-copies (different whitespace, extraction noise) are
+caught with MinHash signatures and locality-sensitive hashing. Either way
+the chunk is embedded and stored once. Copies tagged with another course,
+lecture or file type are kept, so filtering on them still finds them.
+"""
+
+import re
+import hashlib
+from typing import Optional
+
+import numpy as np
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so re-flowed copies hash identically."""
+    return " ".join(text.split())
+
+
+def content_id(text: str, scope: str = "") -> str:
+    """Stable chunk id derived from its normalized content and scope."""
+    key = normalize_text(text)
+    if scope:
+        key = f"{scope}\0{key}"
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def shingles(text: str, size: int = 5) -> set[str]:
+    """Overlapping word n-grams of the lowercased text."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures estimating Jaccard similarity of shingle sets."""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # Multiply-shift hashing: (a * x + b) mod 2^64, keeping the high bits;
+        # uint64 arithmetic wraps, which is exactly the mod
+        self._a = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64) * 2 + 1
+        self._b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.array([
+            int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "little")
+            for s in shingles(text, self.shingle_size)
+        ], dtype=np.uint64)
+        permuted = (np.outer(hashes, self._a) + self._b) >> np.uint64(32)
+        return permuted.min(axis=0)
+
+    @staticmethod
+    def similarity(a: np.ndarray, b: np.ndarray) -> float:
+        """Estimated Jaccard similarity of two signatures."""
+        return float(np.mean(a == b))
+
+
+class ChunkDeduplicator:
+    """
+    Decide which chunks still need to be embedded.
+
+    check() returns the id of an already kept chunk that the given chunk
+    duplicates, or None after keeping it. Signatures are split into bands
+    and bucketed per scope, so only chunks of the same scope sharing a band
+    are compared; candidates then need an estimated Jaccard similarity of
+    at least threshold. Near-duplicate detection is off by default: an
+    edited chunk (a changed due date) would otherwise lose to the old one.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        near_duplicates: bool = False,
+        num_perm: int = 128,
+        bands: int = 16
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.near_duplicates = near_duplicates
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+        self._ids: set[str] = set()
+        self._signatures: dict[str, np.ndarray] = {}
+        self._buckets: dict[tuple[str, int, bytes], list[str]] = {}
+        self.exact_duplicates = 0
+        self.near_duplicate_count = 0
+
+    def _band_keys(self, signature: np.ndarray, scope: str) -> list[tuple[str, int, bytes]]:
+        return [
+            (scope, band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def _keep(self, chunk_id: str, signature: Optional[np.ndarray], scope: str) -> None:
+        self._ids.add(chunk_id)
+        if signature is not None:
+            self._signatures[chunk_id] = signature
+            for key in self._band_keys(signature, scope):
+                self._buckets.setdefault(key, []).append(chunk_id)
+
+    def add(self, chunk_id: str, text: Optional[str] = None, scope: str = "") -> None:
+        """Register a chunk that is already stored."""
+        if chunk_id not in self._ids:
+            use_text = self.near_duplicates and text is not None
+            self._keep(chunk_id, self.hasher.signature(text) if use_text else None, scope)
+
+    def check(self, chunk_id: str, text: str, scope: str = "") -> Optional[str]:
+        """Id of the kept chunk in scope this one duplicates, or None if it is new."""
+        if chunk_id in self._ids:
+            self.exact_duplicates += 1
+            return chunk_id
+
+        signature = None
+        if self.near_duplicates:
+            signature = self.hasher.signature(text)
+            candidates = dict.fromkeys(
+                candidate
+                for key in self._band_keys(signature, scope)
+                for candidate in self._buckets.get(key, ())
+            )
+            for candidate in candidates:
+                if self.hasher.similarity(signature, self._signatures[candidate]) >= self.threshold:
+                    self.near_duplicate_count += 1
+                    return candidate
+
+        self._keep(chunk_id, signature, scope)
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "kept": len(self._ids),
+            "exact_duplicates": self.exact_duplicates,
+            "near_duplicates": self.near_duplicate_count,
+        }
@@ -379,8 +379,10 @@ class RAGEvaluationPipeline:
         ground_truth: Optional[str] = None
     ) -> EvaluationSample:
         """Create evaluation sample by querying the RAG system."""
-        # Get response and sources
-        response = self.llm_chain.get_structured_response(question)
+        # Get response and sources; fresh memory keeps questions independent
+        response = self.llm_chain.get_structured_response(
+            question, memory=self.llm_chain.new_memory()
+        )
 
         # Extract context from sources
         contexts = [src.content for src in response.sources]
@@ -0,0 +1,114 @@
+"""
+Metadata filters applied at retrieval time.
+
+Every chunk carries its file type, the course whose index it belongs to
+(see indexing.COURSES_DIRNAME; none for the default index) and, derived
+from where the file sits, the lecture or assignment it belongs to
+("lecture2" for "L02-slides.pdf", "hw3" for "homework/Homework 3.md").
+A question can then be restricted to a slice of the corpus, e.g. a
+Piazza post in the "hw3" folder, and both the vector store and the BM25
+index search only that slice.
+
+Filters map a field to one allowed value or a list of them; fields are
+combined with AND, values of one field with OR.
+"""
+
+import re
+import json
+from pathlib import PurePosixPath
+from typing import Iterable, Optional, Sequence, Union
+
+FILTER_FIELDS = ("course", "lecture", "file_type")
+
+MetadataFilters = dict[str, Union[str, Sequence[str]]]
+
+_UNIT_RE = re.compile(
+    r"(?<![a-z])(lecture|lec|l|homework|hw|assignment|ps|quiz|lab|week|project|exam)"
+    r"[\s_-]*0*(\d{1,3})(?!\d)",
+    re.IGNORECASE,
+)
+_UNIT_ALIASES = {"lec": "lecture", "l": "lecture", "homework": "hw", "assignment": "hw", "ps": "hw"}
+
+
+def lecture_tag(text: str) -> Optional[str]:
+    """Normalized lecture or assignment tag in text, e.g. "Homework 03" -> "hw3"."""
+    match = _UNIT_RE.search(text)
+    if match is None:
+        return None
+    unit = match.group(1).lower()
+    return f"{_UNIT_ALIASES.get(unit, unit)}{int(match.group(2))}"
+
+
+def path_metadata(rel_path: str, course: Optional[str] = None) -> dict[str, str]:
+    """
+    Course and lecture of a file from its path under its data directory.
+
+    The course is the one given, for a course's own data directory; folder
+    names never make one up, so shared folders such as data/lectures/ are
+    not reported as courses. The lecture comes from the file name, or else
+    the nearest folder naming one. Fields that cannot be derived are left
+    out.
+    """
+    path = PurePosixPath(rel_path)
+    metadata = {}
+    if course is not None:
+        metadata['course'] = course
+    for name in [path.stem] + list(reversed(path.parts[:-1])):
+        tag = lecture_tag(name)
+        if tag is not None:
+            metadata['lecture'] = tag
+            break
+    return metadata
+
+
+def normalize_filters(filters: Optional[MetadataFilters]) -> dict[str, tuple[str, ...]]:
+    """
+    Canonical form of filters: each field mapped to a sorted tuple of values.
+
+    Lecture values are normalized like the indexed tags, so Piazza folder
+    names such as "HW 3" can be passed as-is. Fields without values are
+    dropped; an empty result means no filtering.
+    """
+    result = {}
+    for field, values in (filters or {}).items():
+        if field not in FILTER_FIELDS:
+            raise ValueError(f"Unknown filter field: {field}")
+        if isinstance(values, str):
+            values = [values]
+        if field == 'lecture':
+            values = [lecture_tag(value) or value.lower() for value in values]
+        elif field == 'file_type':
+            values = [value.lower().lstrip('.') for value in values]
+        values = tuple(sorted(set(values)))
+        if values:
+            result[field] = values
+    return result
+
+
+def filter_key(filters: Optional[MetadataFilters]) -> str:
+    """Stable string identifying filters, for cache keys ("" for none)."""
+    normalized = normalize_filters(filters)
+    return json.dumps(normalized, sort_keys=True) if normalized else ""
+
+
+def metadata_key(metadata: dict) -> str:
+    """Stable string of the filterable fields a chunk carries ("" for none)."""
+    tags = {field: metadata[field] for field in FILTER_FIELDS if field in metadata}
+    return json.dumps(tags, sort_keys=True) if tags else ""
+
+
+def chroma_where(filters: Optional[MetadataFilters]) -> Optional[dict]:
+    """Chroma where clause selecting the chunks that match filters."""
+    clauses = [
+        {field: values[0]} if len(values) == 1 else {field: {"$in": list(values)}}
+        for field, values in normalize_filters(filters).items()
+    ]
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def filters_from_tags(tags: Iterable[str]) -> MetadataFilters:
+    """Lecture filter from Piazza folders or tags; tags naming no lecture are ignored."""
+    lectures = [tag for tag in map(lecture_tag, tags) if tag is not None]
+    return {'lecture': lectures} if lectures else {}
@@ -0,0 +1,324 @@
+"""
+Per-file index manifest for incremental re-indexing.
+
+The manifest records, for every course file under the data directory, the
+hash of its content and the ids of the chunks it produced in the vector
+store. Comparing it against a fresh scan tells us exactly which files were
+added, changed or removed, so only those need to be re-embedded.
+
+Full rebuilds go into a new, versioned collection; IndexVersions tracks
+which version serves queries, so a rebuild never takes the live index down
+and the previous version stays available for rollback.
+
+Courses with their own index live in data/courses/<course>/. Everything
+else under data/ (files at the top, data/lectures/, ...) forms the default
+index, which leaves the courses/ folder out so no file is indexed twice.
+"""
+
+import os
+import json
+import time
+import uuid
+import hashlib
+import logging
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Iterable, Optional, Iterator
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = {'.txt', '.pdf', '.csv', '.md'}
+MANIFEST_FILENAME = "manifest.json"
+# Files fully written by an interrupted build, used to resume it
+CHECKPOINT_FILENAME = "build_checkpoint.json"
+# Which index version serves queries, which it replaced, which is building
+VERSIONS_FILENAME = "versions.json"
+COLLECTION_PREFIX = "course_materials"
+# Folder of the data directory holding one subdirectory per course
+COURSES_DIRNAME = "courses"
+
+
+@dataclass
+class FileRecord:
+    """Indexed state of a single source file."""
+    path: str  # Relative to the data directory, POSIX separators
+    content_hash: str
+    size: int
+    mtime: float
+    chunk_ids: list[str] = field(default_factory=list)
+
+
+@dataclass
+class ManifestDiff:
+    """Files that differ between the manifest and the data directory."""
+    added: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+
+def is_pdf_text_copy(name: str, siblings: set[str]) -> bool:
+    """
+    Whether a file is the text copy earlier Upload pages extracted from a PDF.
+
+    That is "X.txt" or "X.pdf.txt" next to "X.pdf"; siblings holds the
+    lowercased names of the files in the same folder.
+    """
+    stem, ext = os.path.splitext(name.lower())
+    if ext != ".txt":
+        return False
+    return stem in siblings if stem.endswith(".pdf") else f"{stem}.pdf" in siblings
+
+
+def iter_data_files(data_dir: Path, exclude: Iterable[str] = ()) -> Iterator[Path]:
+    """
+    Yield supported files under the data directory, skipping hidden dirs.
+
+    Text copies of PDFs are skipped; the PDF itself is indexed page by page.
+    """
+    for root, dirs, filenames in os.walk(data_dir):
+        # Hidden directories hold our own state (.chroma_db, caches)
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        if Path(root) == Path(data_dir):
+            # Top-level folders indexed elsewhere (see COURSES_DIRNAME)
+            dirs[:] = [d for d in dirs if d not in exclude]
+        siblings = {name.lower() for name in filenames}
+        for name in sorted(filenames):
+            if (
+                os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS
+                and not is_pdf_text_copy(name, siblings)
+            ):
+                yield Path(root) / name
+
+
+def course_dir(data_dir: Path, course: Optional[str] = None) -> Path:
+    """Directory holding one course's files and index; the data directory itself for none."""
+    if course is None:
+        return Path(data_dir)
+    if not course or course != Path(course).name or course.startswith('.'):
+        raise ValueError(f"Invalid course name: {course!r}")
+    return Path(data_dir) / COURSES_DIRNAME / course
+
+
+def list_courses(data_dir: Path) -> list[str]:
+    """Courses under the data directory: the non-hidden subdirectories of courses/."""
+    courses_dir = Path(data_dir) / COURSES_DIRNAME
+    if not courses_dir.is_dir():
+        return []
+    return sorted(
+        entry.name for entry in courses_dir.iterdir()
+        if entry.is_dir() and not entry.name.startswith('.')
+    )
+
+
+def hash_file(path: Path, block_size: int = 1 << 20) -> str:
+    """Compute the SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def scan_files(
+    data_dir: Path,
+    previous: Optional["IndexManifest"] = None,
+    exclude: Iterable[str] = ()
+) -> dict[str, FileRecord]:
+    """
+    Snapshot the data directory, leaving out the top-level folders in exclude.
+
+    Content hashes from the previous manifest are reused when a file's size
+    and mtime are unchanged, so only touched files are read from disk.
+    """
+    records = {}
+    known = previous.files if previous else {}
+
+    for file_path in iter_data_files(data_dir, exclude):
+        rel_path = file_path.relative_to(data_dir).as_posix()
+        try:
+            stat = file_path.stat()
+            old = known.get(rel_path)
+            if old and old.size == stat.st_size and old.mtime == stat.st_mtime:
+                content_hash = old.content_hash
+            else:
+                content_hash = hash_file(file_path)
+        except OSError as e:
+            logger.warning(f"Skipping unreadable file {file_path}: {e}")
+            continue
+
+        records[rel_path] = FileRecord(
+            path=rel_path,
+            content_hash=content_hash,
+            size=stat.st_size,
+            mtime=stat.st_mtime,
+        )
+
+    return records
+
+
+@dataclass
+class IndexManifest:
+    """Per-file record of what is currently stored in the vector index."""
+    embedding_model: str
+    files: dict[str, FileRecord] = field(default_factory=dict)
+    chunking: str = ""  # How files were cut into chunks (splitter and sizes)
+
+    @property
+    def fingerprint(self) -> str:
+        """Hash identifying the indexed content and embedding model."""
+        digest = hashlib.md5(self.embedding_model.encode())
+        for path in sorted(self.files):
+            digest.update(f"{path}:{self.files[path].content_hash}".encode())
+        return digest.hexdigest()
+
+    def diff(self, current: dict[str, FileRecord]) -> ManifestDiff:
+        """Compare the manifest against a fresh scan of the data directory."""
+        result = ManifestDiff()
+        for path, record in current.items():
+            old = self.files.get(path)
+            if old is None:
+                result.added.append(path)
+            elif old.content_hash != record.content_hash:
+                result.changed.append(path)
+        result.removed = [path for path in self.files if path not in current]
+        return result
+
+    def chunk_ids_for(self, paths: list[str]) -> list[str]:
+        """Collect the stored chunk ids for the given files."""
+        return [
+            chunk_id
+            for path in paths if path in self.files
+            for chunk_id in self.files[path].chunk_ids
+        ]
+
+    def save(self, persist_dir: Path, filename: str = MANIFEST_FILENAME) -> None:
+        """Write the manifest atomically next to the vector store."""
+        persist_dir.mkdir(parents=True, exist_ok=True)
+        target = persist_dir / filename
+        tmp = target.with_suffix(".tmp")
+        payload = {
+            "embedding_model": self.embedding_model,
+            "chunking": self.chunking,
+            "files": [asdict(record) for record in self.files.values()],
+        }
+        tmp.write_text(json.dumps(payload))
+        os.replace(tmp, target)
+
+    @classmethod
+    def load(
+        cls,
+        persist_dir: Path,
+        filename: str = MANIFEST_FILENAME
+    ) -> Optional["IndexManifest"]:
+        """Load a saved manifest, or None if missing or unreadable."""
+        path = persist_dir / filename
+        if not path.exists():
+            return None
+        try:
+            payload = json.loads(path.read_text())
+            files = {
+                record["path"]: FileRecord(**record)
+                for record in payload["files"]
+            }
+            return cls(
+                embedding_model=payload["embedding_model"],
+                files=files,
+                chunking=payload.get("chunking", ""),
+            )
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable index manifest: {e}")
+            return None
+
+
+def version_dir(persist_dir: Path, version: str) -> Path:
+    """State directory (manifest, BM25 index, checkpoint) of an index version."""
+    return persist_dir / "versions" / version
+
+
+@dataclass
+class IndexVersions:
+    """
+    Pointer file selecting the live index version.
+
+    Each version is a Chroma collection plus a state directory (manifest,
+    BM25 index, build checkpoint) under persist_dir. A rebuild writes a new
+    version while the active one keeps serving, then activate() switches
+    over by atomically rewriting the pointer. One previous version is kept
+    for rollback; older ones are retired for the caller to delete.
+    """
+    persist_dir: Path
+    active: Optional[str] = None
+    previous: Optional[str] = None
+    building: Optional[str] = None
+
+    @staticmethod
+    def collection_name(version: str) -> str:
+        return f"{COLLECTION_PREFIX}_{version}"
+
+    def path(self, version: str) -> Path:
+        """State directory of a version."""
+        return version_dir(self.persist_dir, version)
+
+    def begin_build(self) -> str:
+        """Version to build into, resuming an interrupted build if any."""
+        if self.building is None:
+            self.building = f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}"
+            self.save()
+        return self.building
+
+    def activate(self, version: str) -> list[str]:
+        """Switch queries to version; returns versions no longer kept."""
+        retired = []
+        if self.active != version:
+            if self.previous is not None and self.previous != version:
+                retired.append(self.previous)
+            self.previous = self.active
+        self.active = version
+        if self.building == version:
+            self.building = None
+        self.save()
+        return retired
+
+    def rollback(self) -> Optional[str]:
+        """Swap back to the previous version; returns it, or None if none kept."""
+        if self.previous is None:
+            return None
+        self.active, self.previous = self.previous, self.active
+        self.save()
+        return self.active
+
+    def kept(self) -> set[str]:
+        return {v for v in (self.active, self.previous, self.building) if v}
+
+    def save(self) -> None:
+        """Write the pointer atomically; readers see the old or new version."""
+        self.persist_dir.mkdir(parents=True, exist_ok=True)
+        target = self.persist_dir / VERSIONS_FILENAME
+        tmp = target.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "active": self.active,
+            "previous": self.previous,
+            "building": self.building,
+        }))
+        os.replace(tmp, target)
+
+    @classmethod
+    def load(cls, persist_dir: Path) -> "IndexVersions":
+        """Load the pointer; a missing or unreadable one means no versions."""
+        path = persist_dir / VERSIONS_FILENAME
+        if not path.exists():
+            return cls(persist_dir)
+        try:
+            payload = json.loads(path.read_text())
+            return cls(
+                persist_dir,
+                active=payload.get("active"),
+                previous=payload.get("previous"),
+                building=payload.get("building"),
+            )
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable index version pointer: {e}")
+            return cls(persist_dir)
@@ -0,0 +1,306 @@
+"""
+Parallel, streaming document ingestion.
+
+Parsing course files (slide PDFs above all) is CPU-bound and single-threaded
+inside the LangChain loaders. Files are therefore parsed and chunked in a
+process pool and streamed back one file at a time, so callers can write
+chunks to the vector store in batches instead of holding every parsed page
+of the corpus in memory and embedding it in one call.
+
+Everything here is importable without the rest of the dashboard so worker
+processes start quickly.
+"""
+
+import os
+import time
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass, field
+from functools import lru_cache, partial
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+
+from langchain.schema import Document
+
+from src.dashboard.chunking import DEFAULT_ENCODING, TokenChunker
+from src.dashboard.dedup import content_id
+from src.dashboard.indexing import SUPPORTED_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+
+# Below this many files, starting worker processes costs more than it saves
+MIN_PARALLEL_FILES = 4
+
+
+@dataclass
+class FileChunks:
+    """Chunks produced from one source file, or the error that prevented it."""
+    file_path: str
+    chunks: list[Document] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def get_loader(
+    file_path: str,
+    ext: str,
+    pdf_cache_dir: Optional[Path] = None,
+    max_workers: Optional[int] = None
+):
+    """Get appropriate document loader for file type."""
+    # Loaders are only needed while ingesting, not to import this module
+    from langchain_community.document_loaders import TextLoader, CSVLoader
+    from src.dashboard.pdf import CachedPdfLoader
+
+    loaders = {
+        '.txt': lambda: TextLoader(file_path, encoding='utf-8'),
+        '.md': lambda: TextLoader(file_path, encoding='utf-8'),
+        '.pdf': lambda: CachedPdfLoader(file_path, pdf_cache_dir, max_workers),
+        '.csv': lambda: CSVLoader(
+            file_path,
+            csv_args={'delimiter': ',', 'quotechar': '"'}
+        )
+    }
+    loader_factory = loaders.get(ext)
+    return loader_factory() if loader_factory else None
+
+
+def load_file(
+    file_path: str,
+    pdf_cache_dir: Optional[Path] = None,
+    max_workers: Optional[int] = None
+) -> list[Document]:
+    """Load a single file and attach source metadata."""
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext not in SUPPORTED_EXTENSIONS:
+        return []
+
+    loader = get_loader(file_path, ext, pdf_cache_dir, max_workers)
+    if loader is None:
+        return []
+
+    logger.info(f"Loading {file_path}...")
+    docs = loader.load()
+
+    # Enhance metadata
+    for doc in docs:
+        doc.metadata.update({
+            'source_file': os.path.basename(file_path),
+            'file_path': file_path,
+            'file_type': ext[1:],
+        })
+
+    logger.info(f"Loaded {len(docs)} document(s) from {file_path}")
+    return docs
+
+
+def make_text_splitter(
+    chunk_size: int,
+    chunk_overlap: int,
+    chunker: str = "characters",
+    encoding: str = DEFAULT_ENCODING
+):
+    """
+    Text splitter with start offsets; sizes are in tokens for chunker="tokens".
+
+    "characters" is the recursive splitter with the pipeline's separators.
+    """
+    if chunker == "tokens":
+        return TokenChunker(chunk_size, chunk_overlap, encoding)
+    if chunker != "characters":
+        raise ValueError(f"Unknown chunker: {chunker}")
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    return RecursiveCharacterTextSplitter(
+        separators=["\n\n", "\n", ". ", "? ", "! ", "; ", ", ", " ", ""],
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        add_start_index=True,
+    )
+
+
+@lru_cache(maxsize=None)
+def _worker_splitter(chunk_size: int, chunk_overlap: int, chunker: str, encoding: str):
+    return make_text_splitter(chunk_size, chunk_overlap, chunker, encoding)
+
+
+def assign_chunk_ids(chunks: list[Document]) -> list[Document]:
+    """
+    Give each chunk an id derived from its content alone.
+
+    Ids survive files being moved or renamed. The pipeline re-derives
+    them with the chunk's filter tags once it knows where the file sits.
+    """
+    for chunk in chunks:
+        chunk.metadata['chunk_id'] = content_id(chunk.page_content)
+    return chunks
+
+
+def load_and_split(
+    file_path: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    pdf_cache_dir: Optional[Path] = None,
+    max_workers: Optional[int] = None,
+    chunker: str = "characters",
+    encoding: str = DEFAULT_ENCODING
+) -> FileChunks:
+    """Parse and chunk one file; runs in a worker process and never raises."""
+    try:
+        splitter = _worker_splitter(chunk_size, chunk_overlap, chunker, encoding)
+        documents = load_file(file_path, pdf_cache_dir, max_workers)
+        chunks = assign_chunk_ids(splitter.split_documents(documents))
+        return FileChunks(file_path, chunks)
+    except Exception as e:
+        return FileChunks(file_path, error=f"{type(e).__name__}: {e}")
+
+
+def iter_file_chunks(
+    paths: Iterable[Path],
+    chunk_size: int,
+    chunk_overlap: int,
+    max_workers: Optional[int] = None,
+    pdf_cache_dir: Optional[Path] = None,
+    chunker: str = "characters",
+    encoding: str = DEFAULT_ENCODING
+) -> Iterator[FileChunks]:
+    """
+    Parse and chunk files in parallel, yielding each file as it completes.
+
+    At most 2 * max_workers files are in flight, so memory is bounded by a
+    few files' worth of chunks no matter how large the corpus is. Results
+    arrive in completion order, not input order. With only a few files,
+    they are parsed here and large PDFs are split across pages instead.
+    """
+    paths = [str(path) for path in paths]
+    workers = min(max_workers or os.cpu_count() or 1, len(paths))
+
+    if workers <= 1 or len(paths) < MIN_PARALLEL_FILES:
+        for path in paths:
+            yield load_and_split(
+                path, chunk_size, chunk_overlap, pdf_cache_dir, max_workers, chunker, encoding
+            )
+        return
+
+    logger.info(f"Parsing {len(paths)} files with {workers} worker processes")
+    remaining = iter(paths)
+    # spawn: forking a process that runs Streamlit and client threads is unsafe
+    context = multiprocessing.get_context("spawn")
+    split = partial(
+        load_and_split,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        pdf_cache_dir=pdf_cache_dir,
+        chunker=chunker,
+        encoding=encoding,
+    )
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        pending = {
+            pool.submit(split, path)
+            for path in islice(remaining, 2 * workers)
+        }
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for path in islice(remaining, 1):
+                        pending.add(pool.submit(split, path))
+                    yield future.result()
+        finally:
+            # Consumer stopped early: do not parse files nobody will read
+            for future in pending:
+                future.cancel()
+
+
+class BatchWriter:
+    """
+    Write streamed file chunks in fixed-size batches, several at a time.
+
+    write_batch (embed + insert) runs on a thread pool with at most
+    concurrency batches in flight; pacing against provider quotas is the
+    embeddings' job (see ratelimit.py). A file is reported to on_file_done
+    only once the batch holding its last chunk and every earlier batch have
+    been written, so a checkpoint built from those reports never claims a
+    file whose chunks are partly missing.
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[list[Document]], None],
+        batch_size: int = 256,
+        concurrency: int = 4
+    ):
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.concurrency = max(1, concurrency)
+
+    def write(
+        self,
+        files: Iterable[FileChunks],
+        on_file_done: Callable[[FileChunks], None] = lambda item: None
+    ) -> int:
+        """Write every chunk of files; returns the number of chunks written."""
+        in_flight: dict[Future, int] = {}
+        completed: set[int] = set()
+        waiting: deque[tuple[int, FileChunks]] = deque()  # (last batch seq, file)
+        watermark = -1  # Every batch up to this sequence number is stored
+        next_seq = 0
+        written = 0
+        batch: list[Document] = []
+        started = time.monotonic()
+
+        def finish(done: set[Future]) -> None:
+            nonlocal watermark
+            for future in done:
+                seq = in_flight.pop(future)
+                future.result()  # Re-raise a failed batch
+                completed.add(seq)
+            while watermark + 1 in completed:
+                watermark += 1
+                completed.discard(watermark)
+            while waiting and waiting[0][0] <= watermark:
+                on_file_done(waiting.popleft()[1])
+
+        def submit(chunks: list[Document]) -> None:
+            nonlocal next_seq, written
+            if len(in_flight) >= self.concurrency:
+                finish(wait(in_flight, return_when=FIRST_COMPLETED).done)
+            in_flight[pool.submit(self.write_batch, chunks)] = next_seq
+            next_seq += 1
+            written += len(chunks)
+            logger.info(
+                f"Writing batch {next_seq} ({written} chunks, "
+                f"{time.monotonic() - started:.0f}s)"
+            )
+
+        with ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="embed-batch"
+        ) as pool:
+            try:
+                for item in files:
+                    for chunk in item.chunks:
+                        batch.append(chunk)
+                        if len(batch) >= self.batch_size:
+                            submit(batch)
+                            batch = []
+                    # The open batch gets the next sequence number when submitted
+                    waiting.append((next_seq if batch else next_seq - 1, item))
+                    finish(set())
+
+                if batch:
+                    submit(batch)
+                while in_flight:
+                    finish(wait(in_flight, return_when=FIRST_COMPLETED).done)
+            finally:
+                for future in in_flight:
+                    future.cancel()
+
+        return written
@@ -9,28 +9,44 @@ Production-grade RAG implementation with:
 - Source citations and confidence scores
 - Token tracking and cost estimation
 - Proper logging and error handling
+
+Every dashboard page imports this module, so the heavy dependencies
+(chromadb, LangChain chains and memory, BM25) are imported on first use
+rather than here; see _DEFERRED_IMPORTS.
 """
 
+from __future__ import annotations
+
 import os
+import copy
+import asyncio
 import logging
-import hashlib
+import importlib
 import shutil
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Generator
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Optional,
+    Generator,
+    AsyncIterator,
+    Iterable,
+    Iterator,
+    TypeVar,
+    Union,
+)
 from dataclasses import dataclass, field
 
-import chromadb
-from chromadb.config import Settings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_chroma import Chroma
-from langchain.memory import ConversationBufferWindowMemory
-from langchain.chains import ConversationalRetrievalChain
-from langchain_community.document_loaders import TextLoader, PyPDFLoader, CSVLoader
-from langchain.prompts import PromptTemplate
+from langchain_core.prompts import PromptTemplate
 from langchain.schema import Document
-from langchain_community.retrievers import BM25Retriever
-from langchain.retrievers import EnsembleRetriever
+from langchain_core.retrievers import BaseRetriever
 from langchain.callbacks.base import BaseCallbackHandler
+from langchain_core.messages import get_buffer_string
 from dotenv import load_dotenv
 import glob
 import zipfile
@@ -48,6 +64,88 @@ from src.dashboard.providers import (
     get_available_ollama_models,
     validate_api_keys,
 )
+from src.dashboard.dedup import ChunkDeduplicator, content_id
+from src.dashboard.cache import (
+    EmbeddingCache,
+    CachedEmbeddings,
+    SemanticAnswerCache,
+    TTLCache,
+    normalize_question,
+)
+from src.dashboard.ratelimit import RateLimitedEmbeddings, get_rate_limiter
+from src.dashboard.watcher import DataDirWatcher
+from src.dashboard.reranking import RERANKER_BACKENDS, OnnxCrossEncoder, RerankingService
+from src.dashboard.retrievers import (
+    AdaptiveDepth,
+    MultiQueryFusionRetriever,
+    RerankingRetriever,
+    RerankStats,
+    rerank_documents,
+)
+from src.dashboard.chunking import TokenChunker
+from src.dashboard.filters import (
+    MetadataFilters,
+    chroma_where,
+    filter_key,
+    metadata_key,
+    normalize_filters,
+    path_metadata,
+)
+from src.dashboard.indexing import (
+    CHECKPOINT_FILENAME,
+    COLLECTION_PREFIX,
+    COURSES_DIRNAME,
+    IndexManifest,
+    IndexVersions,
+    FileRecord,
+    course_dir,
+    iter_data_files,
+    scan_files,
+)
+from src.dashboard.ingest import (
+    BatchWriter,
+    FileChunks,
+    get_loader,
+    iter_file_chunks,
+    make_text_splitter,
+)
+
+if TYPE_CHECKING:
+    from langchain_chroma import Chroma
+    from langchain.retrievers import EnsembleRetriever
+    from langchain.chains import ConversationalRetrievalChain
+    from langchain.memory import ConversationBufferWindowMemory
+    from src.dashboard.bm25 import BM25Builder, BM25Index
+
+# Imported on first use through the module __getattr__ (PEP 562), as
+# (module, attribute); they stay patchable as attributes of this module
+_DEFERRED_IMPORTS = {
+    "chromadb": ("chromadb", None),
+    "Settings": ("chromadb.config", "Settings"),
+    "Chroma": ("langchain_chroma", "Chroma"),
+    "ConversationBufferWindowMemory": ("langchain.memory", "ConversationBufferWindowMemory"),
+    "ConversationalRetrievalChain": ("langchain.chains", "ConversationalRetrievalChain"),
+    "EnsembleRetriever": ("langchain.retrievers", "EnsembleRetriever"),
+    "BM25Index": ("src.dashboard.bm25", "BM25Index"),
+    "BM25Builder": ("src.dashboard.bm25", "BM25Builder"),
+    "BM25IndexRetriever": ("src.dashboard.bm25", "BM25IndexRetriever"),
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _DEFERRED_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attribute = _DEFERRED_IMPORTS[name]
+    module = importlib.import_module(module_name)
+    value = module if attribute is None else getattr(module, attribute)
+    globals()[name] = value
+    return value
+
+
+def _deferred(name: str) -> Any:
+    """A deferred import, or whatever is bound to its name here already (e.g. a test double)."""
+    return globals()[name] if name in globals() else __getattr__(name)
+
 
 load_dotenv()
 
@@ -58,6 +156,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+_LOADER_THREAD_PREFIX = "llmchain-loader"
+
+DEFAULT_DATA_DIR = Path(__file__).parent.parent.parent / "data"
+
+NO_MATERIALS_MESSAGE = """I don't have access to any course materials yet. Please:
+1. Go to the Upload page
+2. Upload relevant documents (syllabus, assignments, lecture slides)
+3. Come back and ask your question again
+
+This will help me provide accurate answers about your course."""
+
 
 @dataclass
 class RAGConfig:
@@ -65,12 +176,36 @@ class RAGConfig:
     # Provider configuration
     provider_config: ProviderConfig = field(default_factory=ProviderConfig)
 
+    # Load embeddings, reranker and index in background threads, so the
+    # chain is returned at once and queries wait only until they are ready
+    background_loading: bool = False
+
+    # Where course files live
+    data_dir: Optional[str] = None  # None = the repository's data/ directory
+    course: Optional[str] = None  # Folder under data_dir/courses/ with its own index
+
+    # Embedding cache settings
+    use_embedding_cache: bool = True
+    embedding_cache_max_entries: int = 200_000
+
     # Reranker settings
     reranker_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
     use_reranker: bool = True
+    reranker_backend: str = "torch"  # "torch", or "onnx" for int8 ONNX Runtime on CPU
+    rerank_batch_size: int = 64  # Pairs scored per forward pass across requests
+    rerank_max_wait_ms: float = 5.0  # How long a batch waits for concurrent requests
+    rerank_cache_size: int = 50_000  # Cached (query, chunk) scores
+    rerank_threads: Optional[int] = None  # Torch intra-op threads; None = half the cores
+    adaptive_rerank: bool = False  # Score candidates in stages, stopping once the top is clear
+    rerank_first_stage: int = 8  # Candidates scored in the first stage
+    rerank_score_gap: float = 0.1  # Lead of the final_k-th over the next that ends reranking
 
     # Chunking settings
-    chunk_size: int = 1000
+    chunker: str = "tokens"  # "tokens" (structure-aware) or "characters" (recursive)
+    chunk_tokens: int = 256
+    chunk_overlap_tokens: int = 32
+    chunk_encoding: str = "cl100k_base"  # tiktoken encoding or model name
+    chunk_size: int = 1000  # Characters, for chunker="characters"
     chunk_overlap: int = 200
 
     # Retrieval settings
@@ -78,15 +213,41 @@ class RAGConfig:
     final_k: int = 5     # After reranking
     bm25_weight: float = 0.3
     semantic_weight: float = 0.7
+    bm25_backend: str = "sparse"  # "sparse" (SciPy CSR) or "rank_bm25"
     similarity_threshold: float = 0.3
 
     # Query expansion
     use_query_expansion: bool = True
     num_expanded_queries: int = 3
+    expansion_cache_size: int = 1024
+    expansion_cache_ttl: float = 24 * 3600  # Seconds
+
+    # Answer cache for repeated standalone questions
+    use_answer_cache: bool = True
+    answer_cache_threshold: float = 0.95  # Cosine similarity of question embeddings
+    answer_cache_max_entries: int = 1000
+
+    # Ingestion
+    ingest_workers: Optional[int] = None  # Parser processes; None = one per CPU
+    insert_batch_size: int = 256  # Chunks embedded and written per batch
+    embedding_concurrency: int = 4  # Batches embedded at the same time
+    embedding_requests_per_minute: Optional[int] = None  # Overrides the model's quota
+    embedding_tokens_per_minute: Optional[int] = None
+    embedding_max_retries: int = 6  # Retries of rate-limited (429) calls
+    dedup_near_duplicates: bool = False  # MinHash check besides exact copies
+    dedup_threshold: float = 0.9  # Estimated Jaccard similarity of word 5-grams
+
+    # Background re-indexing when files in the data directory change
+    watch_data_dir: bool = False
+    watch_debounce: float = 2.0  # Seconds of quiet before re-indexing
+    watch_poll_interval: float = 2.0  # Polling period without watchdog
 
     # Memory settings
     memory_window: int = 5  # Keep last 5 conversation turns
 
+    # Streaming
+    stream_timeout: float = 60.0  # Max seconds to wait for the next token
+
     # Convenience properties for backward compatibility
     @property
     def llm_model(self) -> str:
@@ -134,93 +295,368 @@ class RAGResponse:
     model_used: str = ""
 
 
+class GenerationCancelled(Exception):
+    """Raised from the streaming callback to abort a cancelled generation."""
+
+
 class StreamingCallbackHandler(BaseCallbackHandler):
-    """Callback handler for streaming responses."""
+    """
+    Callback handler for streaming responses.
+
+    Acts as a token channel between the generating LLM and its consumers.
+    Consumers block on a condition variable (sync) or await an event
+    (async) rather than polling, so waiting for tokens costs no CPU.
+    cancel() releases consumers and aborts the generation at its next token.
+    """
+
+    # Let GenerationCancelled propagate out of the LLM call instead of
+    # being logged and swallowed by the callback manager
+    raise_error = True
 
     def __init__(self):
         self.tokens: list[str] = []
         self.finished = False
+        self.error: Optional[BaseException] = None
+        self._cond = threading.Condition()
+        self._cancelled = threading.Event()
+        self._async_waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def _notify(self) -> None:
+        """Wake every consumer. Caller must hold the condition."""
+        self._cond.notify_all()
+        for loop, event in self._async_waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # Consumer's loop already closed
 
     def on_llm_new_token(self, token: str, **kwargs) -> None:
-        self.tokens.append(token)
+        if self.cancelled:
+            raise GenerationCancelled()
+        with self._cond:
+            self.tokens.append(token)
+            self._notify()
 
     def on_llm_end(self, response, **kwargs) -> None:
-        self.finished = True
+        self._finish()
+
+    def on_llm_error(self, error: BaseException, **kwargs) -> None:
+        self._finish(error)
+
+    def _finish(self, error: Optional[BaseException] = None) -> None:
+        with self._cond:
+            self.finished = True
+            if error is not None and not isinstance(error, GenerationCancelled):
+                self.error = error
+            self._notify()
+
+    def cancel(self) -> None:
+        """Stop consumers and abort the generation, e.g. when the user leaves."""
+        self._cancelled.set()
+        with self._cond:
+            self._notify()
+
+    def get_tokens(self, timeout: Optional[float] = None) -> Generator[str, None, None]:
+        """
+        Yield tokens as they become available.
 
-    def get_tokens(self) -> Generator[str, None, None]:
-        """Yield tokens as they become available."""
+        Blocks between tokens; raises TimeoutError if no token or end of
+        generation arrives within timeout seconds, and re-raises an LLM error.
+        """
         idx = 0
-        while not self.finished or idx < len(self.tokens):
-            if idx < len(self.tokens):
-                yield self.tokens[idx]
-                idx += 1
+        while True:
+            with self._cond:
+                ready = self._cond.wait_for(
+                    lambda: idx < len(self.tokens) or self.finished or self.cancelled,
+                    timeout=timeout
+                )
+                if not ready:
+                    raise TimeoutError("Timed out waiting for LLM tokens")
+                if self.cancelled:
+                    return
+                batch = self.tokens[idx:]
+                finished = self.finished
+
+            idx += len(batch)
+            yield from batch
+
+            if finished:
+                if self.error is not None:
+                    raise self.error
+                return
+
+    async def aget_tokens(self, timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """Async variant of get_tokens; awaits new tokens without blocking the loop."""
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+        with self._cond:
+            self._async_waiters.append(waiter)
+
+        try:
+            idx = 0
+            while True:
+                # Clear before reading: a token published after the read
+                # sets the event again, so no wakeup is lost
+                event.clear()
+                with self._cond:
+                    if self.cancelled:
+                        return
+                    batch = self.tokens[idx:]
+                    finished = self.finished
+
+                idx += len(batch)
+                for token in batch:
+                    yield token
+
+                if finished:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                if not batch:
+                    await asyncio.wait_for(event.wait(), timeout)
+        finally:
+            with self._cond:
+                self._async_waiters.remove(waiter)
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self.aget_tokens()
+
+
+@lru_cache(maxsize=None)
+def _load_cross_encoder(model_name: str, backend: str = "torch"):
+    """
+    Load a cross-encoder once per process, shared by every pipeline.
+
+    If the ONNX model cannot be exported or loaded, the PyTorch model is
+    used instead: the same instance a torch configuration would load.
+    """
+    if backend not in RERANKER_BACKENDS:
+        raise ValueError(f"Unknown reranker backend: {backend}")
+    if backend == "onnx":
+        try:
+            # ONNX Runtime fixes its thread pool per session: half the cores
+            return OnnxCrossEncoder.from_pretrained(model_name)
+        except ImportError as e:
+            logger.warning(f"ONNX reranker unavailable ({e}); install the onnx extra. Using PyTorch")
+        except Exception as e:
+            logger.error(f"Could not load ONNX reranker for {model_name}: {e}. Using PyTorch",
+                         exc_info=True)
+        return _load_cross_encoder(model_name, "torch")
+    from sentence_transformers import CrossEncoder
+    return CrossEncoder(model_name)
+
+
+@lru_cache(maxsize=None)
+def _reranking_service(model_name: str, backend: str) -> RerankingService:
+    """
+    One reranking service per model, so every pipeline batches together.
+
+    Batching, cache and thread settings are not part of the key: pipelines
+    apply theirs with configure(), so changing them in Settings retunes
+    the running service instead of starting another worker and model.
+    """
+    return RerankingService(_load_cross_encoder(model_name, backend))
 
 
 class LlmChain:
     """
     Production-grade RAG implementation with multi-provider support,
     hybrid search, reranking, and source citations.
+
+    A chain holds no per-user state: conversation history lives in a memory
+    object owned by the caller (see new_memory), so one instance can be
+    shared by every session in the process.
     """
 
     def __init__(self, config: Optional[RAGConfig] = None):
         self.config = config or RAGConfig()
-        self.data_dir = Path(__file__).parent.parent.parent / "data"
+        # Every course keeps its files, collection, manifest and BM25 index
+        # in its own directory; the embedding cache is shared at the root
+        self.data_root = Path(self.config.data_dir or DEFAULT_DATA_DIR)
+        self.data_dir = course_dir(self.data_root, self.config.course)
+        # Course folders are left to their own pipelines
+        self.excluded_dirs = (COURSES_DIRNAME,) if self.config.course is None else ()
         self.persist_dir = self.data_dir / ".chroma_db"
 
         # Initialize components
         self.conversation_chain = None
         self.vectorstore = None
         self.bm25_retriever = None
+        self.bm25_index: Optional[BM25Index] = None
         self.reranker = None
+        # Candidates scored per query, to judge adaptive reranking
+        self.rerank_stats = RerankStats()
         self.documents = []
-        self._last_sources: list[RetrievalResult] = []
+        self.manifest: Optional[IndexManifest] = None
+        # Collection version being served (see IndexVersions)
+        self.index_version: Optional[str] = None
+        self.embedding_cache: Optional[EmbeddingCache] = None
+        self.watcher: Optional[DataDirWatcher] = None
+
+        # Expansions per normalized question, so repeated questions cost
+        # no extra LLM call; the client is created once on first use
+        self.expansion_cache = TTLCache(
+            max_entries=self.config.expansion_cache_size,
+            ttl=self.config.expansion_cache_ttl
+        )
+        self._expansion_llm = None
+
+        # Answers to earlier questions, invalidated when the index changes
+        self.answer_cache = SemanticAnswerCache(
+            threshold=self.config.answer_cache_threshold,
+            max_entries=self.config.answer_cache_max_entries
+        )
+
+        # Sources of the last answer, tracked per calling thread
+        self._local = threading.local()
+        # Serializes index rebuilds and provider switches
+        self._lock = threading.RLock()
+
+        # Fallback history for callers that do not pass their own memory
+        self.memory = self.new_memory()
 
         # Token tracking
         self.token_tracker = TokenTracker()
 
+        # Seconds each component took to load, for startup profiling
+        self.load_times: dict[str, float] = {}
+        # Components loading in the background, by name
+        self._loading: dict[str, Future] = {}
+        self._closed = False
+        self.embeddings = None
+
         # Text splitter with improved settings
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            separators=["\n\n", "\n", ". ", "? ", "! ", "; ", ", ", " ", ""],
-            chunk_size=self.config.chunk_size,
-            chunk_overlap=self.config.chunk_overlap,
-            length_function=len,
-            add_start_index=True,
-        )
+        self.text_splitter = self._timed("tokenizer", make_text_splitter, *self._chunking_args())
 
-        # Initialize embeddings using factory
-        self.embeddings = EmbeddingFactory.create(self.config.provider_config)
+        if self.config.background_loading:
+            self._start_loading()
+        else:
+            self._timed("embeddings", self._init_embeddings)
+            if self.config.use_reranker:
+                self._timed("reranker", self._init_reranker)
+            self._timed("index", self._setup_chain)
+
+    def _timed(self, component: str, fn: Callable[..., T], *args) -> T:
+        """Run fn, recording how long component took to load."""
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.load_times[component] = time.perf_counter() - start
+
+    def _init_embeddings(self) -> None:
+        """Initialize embeddings using factory."""
+        self.embeddings = self._create_embeddings()
         logger.info(f"Initialized embeddings: {self.config.embedding_model}")
 
-        # Initialize reranker
+    def _start_loading(self) -> None:
+        """
+        Load the reranker and the index concurrently in background threads.
+
+        The index needs embeddings first; its conversation chain is built
+        once the reranker has loaded too, since the chain's retriever
+        reranks with it.
+        """
+        pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix=_LOADER_THREAD_PREFIX)
         if self.config.use_reranker:
-            self._init_reranker()
+            self._loading["reranker"] = pool.submit(self._timed, "reranker", self._init_reranker)
+        self._loading["index"] = pool.submit(self._load_in_background)
+        # Threads exit once their component has loaded
+        pool.shutdown(wait=False)
+
+    def _load_in_background(self) -> None:
+        try:
+            self._timed("embeddings", self._init_embeddings)
+            reranker = self._loading.get("reranker")
+            if reranker is not None:
+                reranker.result()
+            self._timed("index", self._setup_chain)
+        except Exception as e:
+            logger.error(f"Error loading RAG pipeline: {e}", exc_info=True)
+            raise
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until background loading has finished; True once it has.
+
+        Failures are logged by the loader; the chain then answers as if no
+        materials were indexed. Returns at once when loading was synchronous
+        or when called from a loader thread itself.
+        """
+        if threading.current_thread().name.startswith(_LOADER_THREAD_PREFIX):
+            return True
+        _, pending = wait(list(self._loading.values()), timeout=timeout)
+        return not pending
+
+    async def await_ready(self) -> None:
+        """Async variant of wait_until_ready, waiting without blocking the event loop."""
+        if any(not future.done() for future in self._loading.values()):
+            await asyncio.to_thread(self.wait_until_ready)
 
-        self._setup_chain()
+    def loading_status(self) -> dict[str, str]:
+        """State of each background-loaded component: loading, ready or failed."""
+        return {
+            name: "loading" if not future.done() else "failed" if future.exception() else "ready"
+            for name, future in self._loading.items()
+        }
+
+    def _create_embeddings(self):
+        """Create embeddings for the configured model behind the disk cache."""
+        embeddings = self._rate_limited(EmbeddingFactory.create(self.config.provider_config))
+        if not self.config.use_embedding_cache:
+            return embeddings
+
+        # Lives outside persist_dir so it survives rebuilds and model switches
+        if self.embedding_cache is None:
+            self.embedding_cache = EmbeddingCache(
+                self.data_root / ".embedding_cache" / "embeddings.sqlite3",
+                max_entries=self.config.embedding_cache_max_entries,
+            )
+        return CachedEmbeddings(
+            embeddings, self.config.embedding_model, self.embedding_cache
+        )
+
+    def _rate_limited(self, embeddings):
+        """Pace document batches within the model's quota and retry 429s."""
+        info = EMBEDDING_MODELS.get(self.config.embedding_model)
+        rpm = self.config.embedding_requests_per_minute or (info and info.requests_per_minute)
+        tpm = self.config.embedding_tokens_per_minute or (info and info.tokens_per_minute)
+        limiter = get_rate_limiter(self.config.embedding_model, rpm or None, tpm or None)
+        return RateLimitedEmbeddings(
+            embeddings, limiter, max_retries=self.config.embedding_max_retries
+        )
 
     def _init_reranker(self) -> None:
         """Initialize the cross-encoder reranker."""
         try:
-            from sentence_transformers import CrossEncoder
-            self.reranker = CrossEncoder(self.config.reranker_model)
-            logger.info(f"Loaded reranker: {self.config.reranker_model}")
+            self.reranker = _reranking_service(
+                self.config.reranker_model, self.config.reranker_backend
+            )
+            self.reranker.configure(
+                self.config.rerank_batch_size,
+                self.config.rerank_max_wait_ms,
+                self.config.rerank_cache_size,
+                self.config.rerank_threads
+            )
+            logger.info(
+                f"Loaded reranker: {self.config.reranker_model} ({self.config.reranker_backend})"
+            )
         except Exception as e:
             logger.warning(f"Failed to load reranker: {e}. Proceeding without reranking.")
             self.reranker = None
 
+    def _scan_files(self) -> dict[str, FileRecord]:
+        """Snapshot source files, reusing known hashes for untouched files."""
+        return scan_files(self.data_dir, previous=self.manifest, exclude=self.excluded_dirs)
+
     def _compute_content_hash(self) -> str:
         """Compute hash of all documents to detect changes."""
-        content_hash = hashlib.md5()
-        # Also include embedding model in hash to rebuild if model changes
-        content_hash.update(self.config.embedding_model.encode())
-
-        for file_path in sorted(glob.glob(str(self.data_dir / "**/*"), recursive=True)):
-            if os.path.isfile(file_path) and not file_path.startswith(str(self.persist_dir)):
-                try:
-                    stat = os.stat(file_path)
-                    content_hash.update(f"{file_path}:{stat.st_mtime}:{stat.st_size}".encode())
-                except Exception:
-                    continue
-        return content_hash.hexdigest()
+        # Embedding model is part of the fingerprint so a model change rebuilds
+        return IndexManifest(self.config.embedding_model, self._scan_files()).fingerprint
 
     def _safe_extract_zip(self, zip_path: str, extract_dir: Path) -> bool:
         """Safely extract a zip file, preventing zip slip attacks."""
@@ -258,246 +694,645 @@ class LlmChain:
             except Exception as e:
                 logger.error(f"Error extracting {file_path}: {e}")
 
-    def _load_documents(self) -> list[Document]:
-        """Load all documents from the data directory with enhanced metadata."""
-        documents = []
-        self._extract_zip_if_needed()
-
-        supported_extensions = {'.txt', '.pdf', '.csv', '.md'}
-
-        for file_path in glob.glob(str(self.data_dir / "**/*"), recursive=True):
-            if not os.path.isfile(file_path):
-                continue
-            if str(self.persist_dir) in file_path:
-                continue
-
-            ext = os.path.splitext(file_path)[1].lower()
-            if ext not in supported_extensions:
-                continue
-
-            try:
-                loader = self._get_loader(file_path, ext)
-                if loader is None:
-                    continue
-
-                logger.info(f"Loading {file_path}...")
-                docs = loader.load()
+    @property
+    def pdf_cache_dir(self) -> Path:
+        """Extracted PDF pages; hidden, so never indexed as course files."""
+        # Keyed by content hash, so shared by all courses
+        return self.data_root / ".pdf_cache"
 
-                # Enhance metadata
-                for doc in docs:
-                    doc.metadata.update({
-                        'source_file': os.path.basename(file_path),
-                        'file_path': file_path,
-                        'file_type': ext[1:],
-                        'chunk_id': hashlib.md5(
-                            f"{file_path}:{doc.page_content[:100]}".encode()
-                        ).hexdigest()[:8]
-                    })
+    def _get_loader(self, file_path: str, ext: str):
+        """Get appropriate document loader for file type."""
+        return get_loader(file_path, ext, self.pdf_cache_dir, self.config.ingest_workers)
+
+    def _iter_chunks(self, paths: Iterable[Path]) -> Iterator[FileChunks]:
+        """Parse and chunk files in worker processes, one file at a time."""
+        chunk_size, chunk_overlap, chunker, encoding = self._chunking_args()
+        return iter_file_chunks(
+            paths,
+            chunk_size,
+            chunk_overlap,
+            max_workers=self.config.ingest_workers,
+            pdf_cache_dir=self.pdf_cache_dir,
+            chunker=chunker,
+            encoding=encoding
+        )
 
-                documents.extend(docs)
-                logger.info(f"Loaded {len(docs)} document(s) from {file_path}")
+    def _chunking_args(self) -> tuple[int, int, str, str]:
+        """Chunk size, overlap, chunker and encoding for make_text_splitter."""
+        if self.config.chunker == "tokens":
+            size, overlap = self.config.chunk_tokens, self.config.chunk_overlap_tokens
+        else:
+            size, overlap = self.config.chunk_size, self.config.chunk_overlap
+        return size, overlap, self.config.chunker, self.config.chunk_encoding
 
-            except Exception as e:
-                logger.error(f"Error loading {file_path}: {e}")
-                continue
+    @property
+    def chunking(self) -> str:
+        """How files are cut into chunks; an index cut differently is rebuilt."""
+        if isinstance(self.text_splitter, TokenChunker):
+            return self.text_splitter.key
+        return f"characters:{self.config.chunk_size}:{self.config.chunk_overlap}"
 
-        return documents
+    def _new_manifest(self, records: Optional[dict[str, FileRecord]] = None) -> IndexManifest:
+        return IndexManifest(self.config.embedding_model, records or {}, self.chunking)
 
-    def _get_loader(self, file_path: str, ext: str):
-        """Get appropriate document loader for file type."""
-        loaders = {
-            '.txt': lambda: TextLoader(file_path, encoding='utf-8'),
-            '.md': lambda: TextLoader(file_path, encoding='utf-8'),
-            '.pdf': lambda: PyPDFLoader(file_path),
-            '.csv': lambda: CSVLoader(
-                file_path,
-                csv_args={'delimiter': ',', 'quotechar': '"'}
-            )
-        }
-        loader_factory = loaders.get(ext)
-        return loader_factory() if loader_factory else None
+    @property
+    def index_dir(self) -> Path:
+        """State directory (manifest, BM25 index) of the version being served."""
+        if self.index_version is None:
+            return self.persist_dir
+        return IndexVersions(self.persist_dir).path(self.index_version)
 
     def _should_rebuild_index(self) -> bool:
-        """Check if vector store needs rebuilding."""
-        hash_file = self.persist_dir / "content_hash.txt"
-        current_hash = self._compute_content_hash()
-
-        if not self.persist_dir.exists() or not hash_file.exists():
+        """Check if vector store needs a full rebuild rather than a sync."""
+        self.index_version = IndexVersions.load(self.persist_dir).active
+        if self.index_version is None:
             return True
 
-        try:
-            stored_hash = hash_file.read_text().strip()
-            return stored_hash != current_hash
-        except Exception:
+        self.manifest = IndexManifest.load(self.index_dir)
+        if self.manifest is None:
             return True
 
-    def _save_content_hash(self) -> None:
-        """Save current content hash for future comparisons."""
-        hash_file = self.persist_dir / "content_hash.txt"
-        self.persist_dir.mkdir(parents=True, exist_ok=True)
-        hash_file.write_text(self._compute_content_hash())
+        if self.manifest.chunking != self.chunking:
+            logger.info(f"Chunking changed ({self.manifest.chunking or 'unknown'} -> {self.chunking})")
+            return True
 
-    def create_vectorstore(self, documents: list[Document]) -> Chroma:
-        """Create or load ChromaDB vectorstore with persistence."""
-        texts = self.text_splitter.split_documents(documents)
-        logger.info(f"Created {len(texts)} text chunks")
+        # Vectors from a different embedding model cannot be mixed
+        return self.manifest.embedding_model != self.config.embedding_model
 
-        # Store documents for BM25
-        self.documents = texts
+    def _save_manifest(self) -> None:
+        """Persist the per-file manifest next to the vector store."""
+        if self.manifest is not None:
+            self.manifest.save(self.index_dir)
 
-        # Create persistent ChromaDB
+    def _chroma_client(self):
         self.persist_dir.mkdir(parents=True, exist_ok=True)
-
-        # Initialize Chroma client with persistence
-        client = chromadb.PersistentClient(
+        return _deferred("chromadb").PersistentClient(
             path=str(self.persist_dir),
-            settings=Settings(anonymized_telemetry=False)
+            settings=_deferred("Settings")(anonymized_telemetry=False)
         )
 
-        # Delete existing collection if exists
-        try:
-            client.delete_collection("course_materials")
-        except Exception:
-            pass
+    def build_index(self) -> Optional[Chroma]:
+        """
+        Build the vector store from the data directory.
 
-        vectorstore = Chroma.from_documents(
-            documents=texts,
-            embedding=self.embeddings,
+        Files are parsed and chunked in worker processes, and their chunks
+        embedded and inserted in batches as they arrive, so memory holds a
+        few files and one insert batch rather than the parsed corpus.
+        Returns None if there are no course files.
+        """
+        self._extract_zip_if_needed()
+        paths = list(iter_data_files(self.data_dir, self.excluded_dirs))
+        if not paths:
+            return None
+        return self._write_index(self._iter_chunks(paths))
+
+    def _write_index(self, files: Iterable[FileChunks]) -> Chroma:
+        """
+        Build a new index version from the given files and switch to it.
+
+        The version being served is untouched until the new collection,
+        manifest and BM25 index are complete; only then is the version
+        pointer swapped. The replaced version is kept for rollback_index.
+        """
+        client = self._chroma_client()
+        versions = IndexVersions.load(self.persist_dir)
+        version = versions.begin_build()
+        build_dir = versions.path(version)
+        collection_name = versions.collection_name(version)
+
+        # Files an interrupted build already stored are not embedded again
+        checkpoint = IndexManifest.load(build_dir, CHECKPOINT_FILENAME)
+        if (
+            checkpoint is not None
+            and checkpoint.embedding_model == self.config.embedding_model
+            and checkpoint.chunking == self.chunking
+        ):
+            logger.info(f"Resuming index build ({len(checkpoint.files)} files already stored)")
+        else:
+            checkpoint = self._new_manifest()
+            # Leftovers of a build we cannot resume
+            try:
+                client.delete_collection(collection_name)
+            except Exception:
+                pass
+
+        vectorstore = _deferred("Chroma")(
             client=client,
-            collection_name="course_materials",
+            collection_name=collection_name,
+            embedding_function=self.embeddings,
             collection_metadata={"hnsw:space": "cosine"}
         )
 
-        self._save_content_hash()
-        logger.info(f"Created ChromaDB vectorstore at {self.persist_dir}")
+        records = scan_files(self.data_dir, exclude=self.excluded_dirs)
+        # Kept chunks go straight to the new BM25 index on disk
+        bm25 = _deferred("BM25Builder")(build_dir / "bm25")
+        self._insert_chunks(vectorstore, files, records, checkpoint, build_dir, bm25=bm25)
+        logger.info(f"Created {len(bm25)} text chunks")
+
+        # Chunks of checkpointed files that no current file refers to
+        stale_ids = self._unreferenced(
+            [chunk_id for done in checkpoint.files.values() for chunk_id in done.chunk_ids],
+            records
+        )
+        if stale_ids:
+            vectorstore.delete(ids=stale_ids)
+
+        manifest = self._new_manifest(records)
+        manifest.save(build_dir)
+        bm25_index = bm25.finish(manifest.fingerprint)
+        (build_dir / CHECKPOINT_FILENAME).unlink(missing_ok=True)
+
+        # Everything for the new version is on disk: switch over
+        replaced = self.bm25_index
+        self.documents = []  # Served from the memory-mapped BM25 index
+        self.bm25_index = bm25_index
+        self.manifest = manifest
+        self.index_version = version
+        if replaced is not None:
+            replaced.close()
+        self._drop_versions(client, versions.activate(version), versions)
+        logger.info(f"Activated index version {version} at {self.persist_dir}")
 
         return vectorstore
 
-    def _load_existing_vectorstore(self) -> Optional[Chroma]:
-        """Load existing ChromaDB vectorstore if available."""
-        try:
-            client = chromadb.PersistentClient(
-                path=str(self.persist_dir),
-                settings=Settings(anonymized_telemetry=False)
+    def _drop_versions(self, client, retired: list[str], versions: IndexVersions) -> None:
+        """Delete retired versions and collections no version points to."""
+        kept = {versions.collection_name(v) for v in versions.kept()}
+        for collection in client.list_collections():
+            name = getattr(collection, "name", collection)
+            if name.startswith(COLLECTION_PREFIX) and name not in kept:
+                logger.info(f"Dropping retired collection {name}")
+                client.delete_collection(name)
+        for version in retired:
+            shutil.rmtree(versions.path(version), ignore_errors=True)
+
+    def _insert_chunks(
+        self,
+        vectorstore: Chroma,
+        files: Iterable[FileChunks],
+        records: dict[str, FileRecord],
+        checkpoint: Optional[IndexManifest] = None,
+        checkpoint_dir: Optional[Path] = None,
+        dedup: Optional[ChunkDeduplicator] = None,
+        bm25: Optional[BM25Builder] = None
+    ) -> None:
+        """
+        Embed and add streamed file chunks to the collection.
+
+        Chunks are tagged from their file's path and get ids from their
+        content and tags. Chunks that duplicate an already kept chunk with
+        the same tags (exactly, or nearly if dedup_near_duplicates is on)
+        are not embedded; the file's record points at the kept chunk
+        instead.
+        The rest are written in insert_batch_size batches,
+        embedding_concurrency at a time. Records chunk ids per file in
+        records; files that failed to load are removed from it so the next
+        sync retries them. With a checkpoint, each file is saved to it (in
+        checkpoint_dir) once fully stored, and files it already holds
+        unchanged are skipped. Kept chunks, including those of skipped files,
+        are added to bm25 as they stream past, so no list of the corpus is
+        built up.
+        """
+        dedup = dedup or self._make_deduplicator()
+
+        def file_stream() -> Iterator[FileChunks]:
+            for item in files:
+                rel_path = Path(item.file_path).relative_to(self.data_dir).as_posix()
+                if item.error:
+                    logger.error(f"Error indexing {rel_path}: {item.error}")
+                    records.pop(rel_path, None)
+                    continue
+
+                kept: list[Document] = []
+                chunk_ids: list[str] = []
+                filterable = path_metadata(rel_path, self.config.course)
+                for chunk in item.chunks:
+                    chunk.metadata.update(filterable)
+                    # Copies are only shared by chunks that filter alike
+                    scope = metadata_key(chunk.metadata)
+                    chunk.metadata['chunk_id'] = content_id(chunk.page_content, scope)
+                    duplicate_of = dedup.check(
+                        chunk.metadata['chunk_id'], chunk.page_content, scope
+                    )
+                    if duplicate_of is None:
+                        kept.append(chunk)
+                    chunk_ids.append(duplicate_of or chunk.metadata['chunk_id'])
+                chunk_ids = list(dict.fromkeys(chunk_ids))
+
+                if rel_path in records:
+                    records[rel_path].chunk_ids = chunk_ids
+                if bm25 is not None:
+                    for chunk in kept:
+                        bm25.add(chunk)
+
+                done = checkpoint.files.get(rel_path) if checkpoint else None
+                if done is not None and done.chunk_ids == chunk_ids:
+                    continue
+                yield FileChunks(item.file_path, kept)
+
+        def on_file_done(item: FileChunks) -> None:
+            rel_path = Path(item.file_path).relative_to(self.data_dir).as_posix()
+            if checkpoint is not None and rel_path in records:
+                checkpoint.files[rel_path] = records[rel_path]
+                checkpoint.save(checkpoint_dir, CHECKPOINT_FILENAME)
+
+        writer = BatchWriter(
+            lambda batch: vectorstore.add_documents(
+                batch, ids=[chunk.metadata['chunk_id'] for chunk in batch]
+            ),
+            batch_size=self.config.insert_batch_size,
+            concurrency=self.config.embedding_concurrency
+        )
+        writer.write(file_stream(), on_file_done=on_file_done)
+
+        stats = dedup.stats()
+        if stats["exact_duplicates"] or stats["near_duplicates"]:
+            logger.info(
+                f"Skipped {stats['exact_duplicates']} duplicate and "
+                f"{stats['near_duplicates']} near-duplicate chunks"
             )
 
-            vectorstore = Chroma(
+    def _make_deduplicator(self) -> ChunkDeduplicator:
+        return ChunkDeduplicator(
+            threshold=self.config.dedup_threshold,
+            near_duplicates=self.config.dedup_near_duplicates
+        )
+
+    @staticmethod
+    def _unreferenced(chunk_ids: list[str], records: dict[str, FileRecord]) -> list[str]:
+        """Chunk ids no file in records still refers to; shared chunks stay."""
+        live = {chunk_id for record in records.values() for chunk_id in record.chunk_ids}
+        return [chunk_id for chunk_id in dict.fromkeys(chunk_ids) if chunk_id not in live]
+
+    def _sync_index(self, vectorstore: Chroma) -> bool:
+        """
+        Bring an existing collection up to date with the data directory.
+
+        Only chunks of added, changed or removed files are touched, so an
+        upload re-embeds that one file instead of the whole corpus.
+        Returns True if the collection was modified.
+        """
+        if self.manifest is None:
+            return False
+
+        current = self._scan_files()
+        diff = self.manifest.diff(current)
+        if not diff:
+            return False
+
+        logger.info(
+            f"Syncing index: {len(diff.added)} added, {len(diff.changed)} changed, "
+            f"{len(diff.removed)} removed"
+        )
+
+        # New chunks are checked against what unchanged files keep stored
+        dedup = self._make_deduplicator()
+        for rel_path, record in current.items():
+            if rel_path in self.manifest.files and rel_path not in diff.changed:
+                record.chunk_ids = self.manifest.files[rel_path].chunk_ids
+        kept_ids = {chunk_id for record in current.values() for chunk_id in record.chunk_ids}
+        # Exact matching only needs the ids; near-duplicate matching needs the text
+        if self.config.dedup_near_duplicates:
+            for doc in self._stored_documents():
+                if doc.metadata.get('chunk_id') in kept_ids:
+                    dedup.add(
+                        doc.metadata['chunk_id'], doc.page_content, metadata_key(doc.metadata)
+                    )
+        for chunk_id in kept_ids:
+            dedup.add(chunk_id)
+
+        self._insert_chunks(
+            vectorstore,
+            self._iter_chunks(self.data_dir / rel_path for rel_path in diff.added + diff.changed),
+            current,
+            dedup=dedup
+        )
+
+        # Deleted last: a moved or copied file may still refer to old chunks
+        stale_ids = self._unreferenced(
+            self.manifest.chunk_ids_for(diff.changed + diff.removed), current
+        )
+        if stale_ids:
+            vectorstore.delete(ids=stale_ids)
+
+        self.manifest = self._new_manifest(current)
+        self._save_manifest()
+        return True
+
+    def _stored_documents(self) -> list[Document]:
+        """Chunks of the served index, as far as they are held in memory."""
+        if self.documents:
+            return self.documents
+        if self.bm25_index is not None:
+            return [self.bm25_index.get_document(i) for i in range(len(self.bm25_index))]
+        return []
+
+    def _load_existing_vectorstore(self, sync: bool = True) -> Optional[Chroma]:
+        """Load the active index version's vectorstore if available."""
+        try:
+            client = self._chroma_client()
+            collection_name = IndexVersions.collection_name(self.index_version)
+
+            vectorstore = _deferred("Chroma")(
                 client=client,
-                collection_name="course_materials",
+                collection_name=collection_name,
                 embedding_function=self.embeddings
             )
 
-            # Load documents for BM25 from vectorstore
-            collection = client.get_collection("course_materials")
-            if collection.count() > 0:
-                results = collection.get(include=['documents', 'metadatas'])
-                self.documents = [
-                    Document(page_content=doc, metadata=meta or {})
-                    for doc, meta in zip(results['documents'], results['metadatas'])
-                ]
-                logger.info(f"Loaded {len(self.documents)} documents from existing vectorstore")
-                return vectorstore
+            # Apply any file changes since the last run before loading
+            if sync:
+                self._sync_index(vectorstore)
+
+            collection = client.get_collection(collection_name)
+            if collection.count() == 0:
+                return None
+
+            self.bm25_index = self._timed("bm25", self._load_bm25_index, vectorstore)
+            return vectorstore
 
         except Exception as e:
             logger.warning(f"Failed to load existing vectorstore: {e}")
 
         return None
 
-    def _create_hybrid_retriever(self) -> EnsembleRetriever:
-        """Create hybrid retriever combining BM25 and semantic search."""
-        if not self.documents:
-            raise ValueError("No documents available for retrieval")
+    def _load_bm25_index(self, vectorstore: Chroma) -> BM25Index:
+        """
+        Reuse the saved BM25 index unless the content changed.
+
+        Otherwise the stored chunks are streamed into a new index on disk,
+        which is then served memory-mapped like a saved one.
+        """
+        bm25_dir = self.index_dir / "bm25"
+        bm25_index = _deferred("BM25Index").load(bm25_dir, self.manifest.fingerprint)
+        if bm25_index is None:
+            results = vectorstore.get(include=['documents', 'metadatas'])
+            builder = _deferred("BM25Builder")(bm25_dir)
+            for doc, meta in zip(results['documents'], results['metadatas']):
+                builder.add(Document(page_content=doc, metadata=meta or {}))
+            logger.info(f"Loaded {len(builder)} documents from existing vectorstore")
+            bm25_index = builder.finish(self.manifest.fingerprint)
+        return bm25_index
+
+    def _create_hybrid_retriever(
+        self,
+        vectorstore: Optional[Chroma] = None,
+        filters: Optional[MetadataFilters] = None
+    ) -> EnsembleRetriever:
+        """
+        Create hybrid retriever combining BM25 and semantic search.
+
+        With filters, both searches are restricted to the matching chunks:
+        Chroma through a where clause, BM25 through its filtered postings.
+        """
+        if self.bm25_index is None:
+            if not self.documents:
+                raise ValueError("No documents available for retrieval")
+            self.bm25_index = _deferred("BM25Index").build(self.documents)
 
         # BM25 retriever for keyword matching
-        self.bm25_retriever = BM25Retriever.from_documents(
-            self.documents,
-            k=self.config.initial_k
-        )
+        bm25_retriever = self._create_bm25_retriever(filters)
+        if not filters:
+            self.bm25_retriever = bm25_retriever
 
         # Semantic retriever
-        semantic_retriever = self.vectorstore.as_retriever(
+        search_kwargs = {
+            "k": self.config.initial_k,
+            "score_threshold": self.config.similarity_threshold
+        }
+        where = chroma_where(filters)
+        if where is not None:
+            search_kwargs["filter"] = where
+        semantic_retriever = (vectorstore or self.vectorstore).as_retriever(
             search_type="similarity_score_threshold",
-            search_kwargs={
-                "k": self.config.initial_k,
-                "score_threshold": self.config.similarity_threshold
-            }
+            search_kwargs=search_kwargs
         )
 
         # Ensemble retriever with weighted combination
-        hybrid_retriever = EnsembleRetriever(
-            retrievers=[self.bm25_retriever, semantic_retriever],
+        hybrid_retriever = _deferred("EnsembleRetriever")(
+            retrievers=[bm25_retriever, semantic_retriever],
             weights=[self.config.bm25_weight, self.config.semantic_weight]
         )
 
         logger.info("Created hybrid retriever (BM25 + Semantic)")
         return hybrid_retriever
 
+    def _create_bm25_retriever(self, filters: Optional[MetadataFilters] = None):
+        """Create the keyword retriever for the configured BM25 backend."""
+        # Filtered searches always use the sparse index, which has the postings
+        if self.config.bm25_backend == "rank_bm25" and not filters:
+            # Legacy pure-Python scorer, kept for comparison
+            from langchain_community.retrievers import BM25Retriever
+
+            documents = self.documents or [
+                self.bm25_index.get_document(i) for i in range(len(self.bm25_index))
+            ]
+            return BM25Retriever.from_documents(documents, k=self.config.initial_k)
+
+        return _deferred("BM25IndexRetriever")(index=self.bm25_index, k=self.config.initial_k, filters=filters)
+
+    def filter_values(self) -> dict[str, list[str]]:
+        """Values of each filter field present in the served index."""
+        if self.bm25_index is None:
+            return {}
+        return {
+            field: sorted(names)
+            for field, (names, _) in self.bm25_index.facets.items() if names
+        }
+
+    def _retriever_for(
+        self,
+        chain: ConversationalRetrievalChain,
+        filters: Optional[MetadataFilters]
+    ) -> BaseRetriever:
+        """The chain's retriever, or the same pipeline restricted to filters."""
+        if not normalize_filters(filters):
+            return chain.retriever
+        return self._build_retriever(self._create_hybrid_retriever(filters=filters))
+
+    def _chain_for(self, filters: Optional[MetadataFilters]) -> ConversationalRetrievalChain:
+        """The conversation chain, retrieving only chunks that match filters."""
+        if not normalize_filters(filters):
+            return self.conversation_chain
+        chain = self.conversation_chain
+        return chain.model_copy(update={"retriever": self._retriever_for(chain, filters)})
+
+    def _get_expansion_llm(self):
+        """LLM client for query expansion, created once per provider config."""
+        if self._expansion_llm is None:
+            with self._lock:
+                if self._expansion_llm is None:
+                    self._expansion_llm = LLMFactory.create(self.config.provider_config)
+        return self._expansion_llm
+
+    def _expansion_key(self, query: str) -> tuple:
+        return (self.config.llm_model, self.config.num_expanded_queries, normalize_question(query))
+
     def _expand_query(self, query: str) -> list[str]:
         """Expand query into multiple related queries for better retrieval."""
         if not self.config.use_query_expansion:
             return [query]
 
-        try:
-            llm = LLMFactory.create(self.config.provider_config)
+        key = self._expansion_key(query)
+        expansions = self.expansion_cache.get(key)
+        if expansions is not None:
+            return [query] + expansions
 
-            expansion_prompt = f"""Generate {self.config.num_expanded_queries} alternative phrasings of this question for better document retrieval.
-Return only the questions, one per line, without numbering or explanations.
+        try:
+            response = self._get_expansion_llm().invoke(self._expansion_prompt(query))
+            expansions = self._parse_expansions(response.content)
+            self.expansion_cache.put(key, expansions)
+            return [query] + expansions
 
-Original question: {query}
+        except Exception as e:
+            logger.warning(f"Query expansion failed: {e}")
+            return [query]
 
-Alternative questions:"""
+    async def _aexpand_query(self, query: str) -> list[str]:
+        """Async variant of _expand_query."""
+        if not self.config.use_query_expansion:
+            return [query]
 
-            response = llm.invoke(expansion_prompt)
-            expanded = response.content.strip().split('\n')
-            expanded = [q.strip() for q in expanded if q.strip()][:self.config.num_expanded_queries]
+        key = self._expansion_key(query)
+        expansions = self.expansion_cache.get(key)
+        if expansions is not None:
+            return [query] + expansions
 
-            return [query] + expanded
+        try:
+            response = await self._get_expansion_llm().ainvoke(self._expansion_prompt(query))
+            expansions = self._parse_expansions(response.content)
+            self.expansion_cache.put(key, expansions)
+            return [query] + expansions
 
         except Exception as e:
             logger.warning(f"Query expansion failed: {e}")
             return [query]
 
+    def _expansion_prompt(self, query: str) -> str:
+        return f"""Generate {self.config.num_expanded_queries} alternative phrasings of this question for better document retrieval.
+Return only the questions, one per line, without numbering or explanations.
+
+Original question: {query}
+
+Alternative questions:"""
+
+    def _parse_expansions(self, text: str) -> list[str]:
+        expanded = text.strip().split('\n')
+        return [q.strip() for q in expanded if q.strip()][:self.config.num_expanded_queries]
+
+    @property
+    def rerank_depth(self) -> Optional[AdaptiveDepth]:
+        """Staged reranking settings, or None to score every candidate."""
+        if not self.config.adaptive_rerank:
+            return None
+        return AdaptiveDepth(self.config.rerank_first_stage, self.config.rerank_score_gap)
+
     def _rerank_documents(self, query: str, documents: list[Document]) -> list[Document]:
         """Rerank documents using cross-encoder."""
-        if not self.reranker or not documents:
-            return documents[:self.config.final_k]
+        return rerank_documents(
+            self.reranker, query, documents, self.config.final_k,
+            self.rerank_depth, self.rerank_stats
+        )
 
-        # Prepare pairs for reranking
-        pairs = [[query, doc.page_content] for doc in documents]
+    def _answer_cache_version(self) -> Optional[str]:
+        """
+        Version that cached answers are valid for.
 
-        # Get reranking scores
-        scores = self.reranker.predict(pairs)
+        The manifest fingerprint is the content hash of the indexed files
+        (see _compute_content_hash) as of the last build or sync, so cached
+        answers are dropped as soon as the index changes. Answers retrieved
+        under different filters are kept apart by their scope, not their
+        version, so one filtered question does not drop the others.
+        """
+        if not self.config.use_answer_cache or self.manifest is None:
+            return None
+        return f"{self.manifest.fingerprint}:{self.config.llm_model}"
 
-        # Sort by score and return top k
-        scored_docs = list(zip(documents, scores))
-        scored_docs.sort(key=lambda x: x[1], reverse=True)
+    def _question_vector(self, question: str, chat_history: list) -> Optional[list[float]]:
+        """
+        Embedding used to key the answer cache, or None if it does not apply.
 
-        # Store scores in metadata for citation
-        reranked = []
-        for doc, score in scored_docs[:self.config.final_k]:
-            doc.metadata['relevance_score'] = float(score)
-            reranked.append(doc)
+        Follow-up questions depend on the conversation, so only questions
+        asked without history are cached.
+        """
+        if chat_history or self._answer_cache_version() is None:
+            return None
+        try:
+            return self.embeddings.embed_query(question)
+        except Exception as e:
+            logger.warning(f"Answer cache lookup skipped: {e}")
+            return None
 
-        logger.debug(f"Reranked {len(documents)} docs, kept top {len(reranked)}")
-        return reranked
+    async def _aquestion_vector(self, question: str, chat_history: list) -> Optional[list[float]]:
+        """Async variant of _question_vector."""
+        if chat_history or self._answer_cache_version() is None:
+            return None
+        try:
+            return await self.embeddings.aembed_query(question)
+        except Exception as e:
+            logger.warning(f"Answer cache lookup skipped: {e}")
+            return None
+
+    def _cached_answer(
+        self,
+        vector: Optional[list[float]],
+        filters: Optional[MetadataFilters] = None
+    ):
+        if vector is None:
+            return None
+        cached = self.answer_cache.lookup(
+            vector, self._answer_cache_version(), filter_key(filters)
+        )
+        if cached is not None:
+            logger.info(f"Answer cache hit (similarity {cached.similarity:.3f})")
+        return cached
+
+    def _cache_answer(
+        self,
+        vector: Optional[list[float]],
+        question: str,
+        answer: str,
+        sources: list[RetrievalResult],
+        filters: Optional[MetadataFilters] = None
+    ) -> None:
+        if vector is not None and answer:
+            self.answer_cache.store(
+                vector, self._answer_cache_version(), question, answer, sources,
+                filter_key(filters)
+            )
+
+    @property
+    def _last_sources(self) -> list[RetrievalResult]:
+        return getattr(self._local, "sources", [])
+
+    @_last_sources.setter
+    def _last_sources(self, sources: list[RetrievalResult]) -> None:
+        self._local.sources = sources
+
+    def new_memory(self) -> ConversationBufferWindowMemory:
+        """Create conversation memory for one user session."""
+        return _deferred("ConversationBufferWindowMemory")(
+            memory_key="chat_history",
+            input_key="question",
+            output_key="answer",
+            return_messages=True,
+            k=self.config.memory_window
+        )
 
     def get_conversation_chain(
         self,
         vectorstore: Chroma,
         memory: ConversationBufferWindowMemory = None
     ) -> ConversationalRetrievalChain:
-        """Create conversation chain with hybrid retrieval and reranking."""
+        """
+        Create conversation chain with hybrid retrieval and reranking.
+
+        Without a memory the chain is stateless and expects chat_history
+        as an input, which lets sessions share it.
+        """
 
         llm = LLMFactory.create(self.config.provider_config)
         logger.info(f"Initialized LLM: {self.config.llm_model}")
 
-        if memory is None:
-            memory = ConversationBufferWindowMemory(
-                memory_key="chat_history",
-                return_messages=True,
-                k=self.config.memory_window
-            )
-
         # Enhanced prompt template with citation instructions
         prompt_template = """You are a knowledgeable teaching assistant helping students with course materials.
 
@@ -522,101 +1357,407 @@ Helpful Answer:"""
             input_variables=["context", "question"]
         )
 
-        # Create hybrid retriever
-        hybrid_retriever = self._create_hybrid_retriever()
-
-        return ConversationalRetrievalChain.from_llm(
+        return _deferred("ConversationalRetrievalChain").from_llm(
             llm=llm,
-            retriever=hybrid_retriever,
+            retriever=self._build_retriever(self._create_hybrid_retriever(vectorstore)),
             memory=memory,
             verbose=False,
             combine_docs_chain_kwargs={"prompt": PROMPT},
             return_source_documents=True
         )
 
+    def _build_retriever(self, candidates: BaseRetriever) -> BaseRetriever:
+        """
+        Wrap candidate retrieval in the query expansion and reranking stages.
+
+        Expanded queries are retrieved concurrently and fused into at most
+        initial_k candidates, which are reranked down to the final_k chunks
+        that go into the prompt.
+        """
+        if self.config.use_query_expansion:
+            candidates = MultiQueryFusionRetriever(
+                base_retriever=candidates,
+                expander=self._expand_query,
+                aexpander=self._aexpand_query,
+                max_results=self.config.initial_k
+            )
+
+        return RerankingRetriever(
+            base_retriever=candidates,
+            reranker=self.reranker,
+            top_k=self.config.final_k,
+            depth=self.rerank_depth,
+            stats=self.rerank_stats
+        )
+
     def _setup_chain(self) -> None:
         """Initialize the conversation chain with smart caching."""
         try:
             # Check if we can use existing vectorstore
             if not self._should_rebuild_index():
                 logger.info("Loading existing vectorstore...")
-                self.vectorstore = self._load_existing_vectorstore()
+                # A watcher catches up on file changes in the background
+                self.vectorstore = self._load_existing_vectorstore(
+                    sync=not self.config.watch_data_dir
+                )
 
             if self.vectorstore is None:
                 logger.info("Building new vectorstore...")
-                documents = self._load_documents()
-                if documents:
-                    logger.info(f"Loaded {len(documents)} documents")
-                    self.vectorstore = self.create_vectorstore(documents)
-                else:
-                    logger.warning("No documents found in data directory")
-                    return
+                self.vectorstore = self.build_index()
 
-            self.conversation_chain = self.get_conversation_chain(self.vectorstore)
-            logger.info("Successfully initialized RAG pipeline")
+            if self.vectorstore is None:
+                logger.warning("No documents found in data directory")
+            else:
+                self.conversation_chain = self._timed(
+                    "chain", self.get_conversation_chain, self.vectorstore
+                )
+                logger.info("Successfully initialized RAG pipeline")
 
         except Exception as e:
             logger.error(f"Error setting up chain: {e}", exc_info=True)
 
-    def get_response(self, question: str) -> str:
-        """Generate an answer with source citations."""
-        if not self.conversation_chain:
-            return """I don't have access to any course materials yet. Please:
-1. Go to the Upload page
-2. Upload relevant documents (syllabus, assignments, lecture slides)
-3. Come back and ask your question again
+        if self.config.watch_data_dir:
+            self.start_watcher()
+
+    def start_watcher(self) -> None:
+        """Re-index changed course files in the background as they change."""
+        # A chain closed while still loading must not start watching
+        if self.watcher is None and not self._closed:
+            self.watcher = DataDirWatcher(
+                self.data_dir,
+                self.sync_index,
+                debounce=self.config.watch_debounce,
+                poll_interval=self.config.watch_poll_interval,
+                exclude=self.excluded_dirs
+            )
+            self.watcher.start()
 
-This will help me provide accurate answers about your course."""
+    def close(self) -> None:
+        """Stop background work; the pipeline still answers questions."""
+        self._closed = True
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+
+    def sync_index(self) -> bool:
+        """
+        Apply data directory changes to the served index.
+
+        Changed files are re-embedded incrementally and the keyword index and
+        conversation chain refreshed; the first files added to an empty data
+        directory trigger a full build. Returns True if the index changed.
+        """
+        self.wait_until_ready()
+        with self._lock:
+            if self.vectorstore is None:
+                vectorstore = self.build_index()
+                if vectorstore is None:
+                    return False
+            else:
+                vectorstore = self.vectorstore
+                if not self._sync_index(vectorstore):
+                    return False
+                replaced = self.bm25_index
+                self.documents = []
+                self.bm25_index = self._load_bm25_index(vectorstore)
+                if replaced is not None and replaced is not self.bm25_index:
+                    replaced.close()
+
+            self.vectorstore = vectorstore
+            self.conversation_chain = self.get_conversation_chain(vectorstore)
+            logger.info("Index synced with data directory")
+            return True
+
+    def get_response(
+        self,
+        question: str,
+        memory: Optional[ConversationBufferWindowMemory] = None,
+        filters: Optional[MetadataFilters] = None
+    ) -> str:
+        """
+        Generate an answer with source citations.
+
+        Pass the session's memory (from new_memory) when the chain is shared;
+        otherwise the chain's own fallback memory is used. filters restrict
+        retrieval to matching chunks, e.g. {"lecture": "hw3"} (see filters.py).
+        """
+        self.wait_until_ready()
+        if not self.conversation_chain:
+            return NO_MATERIALS_MESSAGE
 
         try:
+            memory = memory if memory is not None else self.memory
+            chat_history = memory.load_memory_variables({})["chat_history"]
+
+            vector = self._question_vector(question, chat_history)
+            cached = self._cached_answer(vector, filters)
+            if cached is not None:
+                memory.save_context({"question": question}, {"answer": cached.answer})
+                self._last_sources = cached.sources
+                return cached.answer
+
             # Get response with source documents
-            response = self.conversation_chain.invoke({"question": question})
+            response = self._chain_for(filters).invoke({
+                "question": question,
+                "chat_history": chat_history,
+            })
             answer = response["answer"]
+            memory.save_context({"question": question}, {"answer": answer})
+            # Already reranked by the chain's retriever
             source_docs = response.get("source_documents", [])
 
-            # Apply reranking to source documents
-            if source_docs:
-                source_docs = self._rerank_documents(question, source_docs)
-
             # Store sources for retrieval
-            self._last_sources = [
-                RetrievalResult(
-                    content=doc.page_content[:200] + "...",
-                    source=doc.metadata.get('source_file', 'Unknown'),
-                    page=doc.metadata.get('page'),
-                    relevance_score=doc.metadata.get('relevance_score', 0.0),
-                    chunk_id=doc.metadata.get('chunk_id', 'unknown')
-                )
-                for doc in source_docs
-            ]
+            self._last_sources = self._to_sources(source_docs)
+            self._cache_answer(vector, question, answer, self._last_sources, filters)
 
             return answer
 
         except Exception as e:
-            error_msg = str(e)
-            logger.error(f"Error generating response: {error_msg}", exc_info=True)
+            return self._error_message(e)
+
+    def stream_response(
+        self,
+        question: str,
+        memory: Optional[ConversationBufferWindowMemory] = None,
+        filters: Optional[MetadataFilters] = None
+    ) -> Generator[Union[str, list[RetrievalResult]], None, None]:
+        """
+        Stream an answer token by token, then its sources.
+
+        Runs the same steps as the conversation chain (condense the question
+        against the history, retrieve, stuff the prompt), but generates in a
+        worker thread and yields each token as it arrives. The final item is
+        the list of reranked RetrievalResult sources. Closing the generator
+        early (e.g. the user navigates away) cancels the generation.
+        """
+        self.wait_until_ready()
+        if not self.conversation_chain:
+            yield NO_MATERIALS_MESSAGE
+            yield []
+            return
+
+        chain = self.conversation_chain
+        memory = memory if memory is not None else self.memory
+        handler = StreamingCallbackHandler()
+
+        try:
+            chat_history = memory.load_memory_variables({})["chat_history"]
+            vector = self._question_vector(question, chat_history)
+            cached = self._cached_answer(vector, filters)
+            if cached is not None:
+                memory.save_context({"question": question}, {"answer": cached.answer})
+                self._last_sources = cached.sources
+                yield cached.answer
+                yield cached.sources
+                return
+
+            standalone = question
+            if chat_history:
+                standalone = chain.question_generator.invoke({
+                    "question": question,
+                    "chat_history": get_buffer_string(chat_history),
+                })["text"]
+
+            source_docs = self._retriever_for(chain, filters).invoke(standalone)
+            prompt = self._format_qa_prompt(chain, standalone, source_docs)
+
+            worker = threading.Thread(
+                target=self._generate_into,
+                args=(chain.combine_docs_chain.llm_chain.llm, prompt, handler),
+                daemon=True
+            )
+            worker.start()
+            yield from handler.get_tokens(timeout=self.config.stream_timeout)
+
+        except GeneratorExit:
+            raise
+        except Exception as e:
+            yield self._error_message(e)
+            yield []
+            return
+        finally:
+            if not handler.finished:
+                handler.cancel()
+
+        answer = "".join(handler.tokens)
+        memory.save_context({"question": question}, {"answer": answer})
+
+        self._last_sources = self._to_sources(source_docs)
+        self._cache_answer(vector, question, answer, self._last_sources, filters)
+        yield self._last_sources
+
+    async def astream_response(
+        self,
+        question: str,
+        memory: Optional[ConversationBufferWindowMemory] = None,
+        filters: Optional[MetadataFilters] = None
+    ) -> AsyncIterator[Union[str, list[RetrievalResult]]]:
+        """
+        Async variant of stream_response for serving many questions per process.
+
+        Retrieval goes through the chain's retriever asynchronously: query
+        expansions are gathered concurrently, each through the hybrid
+        retriever whose BM25 and semantic branches also run concurrently.
+        Generation uses the provider's native async client, and CPU-bound
+        reranking runs in a worker thread so the event loop stays free.
+        """
+        await self.await_ready()
+        if not self.conversation_chain:
+            yield NO_MATERIALS_MESSAGE
+            yield []
+            return
+
+        chain = self.conversation_chain
+        llm = chain.combine_docs_chain.llm_chain.llm
+        memory = memory if memory is not None else self.memory
+        tokens = []
+
+        try:
+            chat_history = memory.load_memory_variables({})["chat_history"]
+            vector = await self._aquestion_vector(question, chat_history)
+            cached = self._cached_answer(vector, filters)
+            if cached is not None:
+                memory.save_context({"question": question}, {"answer": cached.answer})
+                yield cached.answer
+                yield cached.sources
+                return
+
+            standalone = question
+            if chat_history:
+                condensed = await chain.question_generator.ainvoke({
+                    "question": question,
+                    "chat_history": get_buffer_string(chat_history),
+                })
+                standalone = condensed["text"]
+
+            source_docs = await self._retriever_for(chain, filters).ainvoke(standalone)
+            prompt = self._format_qa_prompt(chain, standalone, source_docs)
+
+            async for chunk in llm.astream(prompt):
+                if isinstance(chunk.content, str) and chunk.content:
+                    tokens.append(chunk.content)
+                    yield chunk.content
+
+        except Exception as e:
+            yield self._error_message(e)
+            yield []
+            return
+
+        answer = "".join(tokens)
+        memory.save_context({"question": question}, {"answer": answer})
+        sources = self._to_sources(source_docs)
+        self._cache_answer(vector, question, answer, sources, filters)
+        yield sources
 
-            if "api" in error_msg.lower() or "key" in error_msg.lower():
-                return f"Error: API connection failed. Please check your API key for {self.config.llm_model}."
-            if "ollama" in error_msg.lower():
-                return "Error: Could not connect to Ollama. Make sure Ollama is running locally."
-            return f"Error generating response: {error_msg}"
+    async def aget_structured_response(
+        self,
+        question: str,
+        memory: Optional[ConversationBufferWindowMemory] = None,
+        filters: Optional[MetadataFilters] = None
+    ) -> RAGResponse:
+        """
+        Async variant of get_structured_response.
+
+        Sources are returned on the response rather than through
+        get_last_sources, which concurrent coroutines would overwrite.
+        """
+        tokens = []
+        sources = []
+        async for item in self.astream_response(question, memory=memory, filters=filters):
+            if isinstance(item, str):
+                tokens.append(item)
+            else:
+                sources = item
+
+        model_info = LLM_MODELS.get(self.config.llm_model)
+        return RAGResponse(
+            answer="".join(tokens),
+            sources=sources,
+            confidence=self.estimate_confidence(sources),
+            tokens_used=0,
+            cost=model_info.output_cost_per_1k * 0.5 if model_info else 0.0,
+            model_used=self.config.llm_model
+        )
+
+    async def aget_response(
+        self,
+        question: str,
+        memory: Optional[ConversationBufferWindowMemory] = None,
+        filters: Optional[MetadataFilters] = None
+    ) -> str:
+        """Async variant of get_response."""
+        response = await self.aget_structured_response(question, memory=memory, filters=filters)
+        return response.answer
+
+    @staticmethod
+    def _format_qa_prompt(chain, question: str, documents: list[Document]) -> str:
+        """Fill the chain's QA prompt the way its stuff-documents step does."""
+        qa_chain = chain.combine_docs_chain
+        context = qa_chain.document_separator.join(doc.page_content for doc in documents)
+        return qa_chain.llm_chain.prompt.format(context=context, question=question)
+
+    @staticmethod
+    def _generate_into(llm, prompt: str, handler: StreamingCallbackHandler) -> None:
+        """Stream a completion into handler; runs in a worker thread."""
+        try:
+            for chunk in llm.stream(prompt):
+                if isinstance(chunk.content, str) and chunk.content:
+                    handler.on_llm_new_token(chunk.content)
+            handler.on_llm_end(None)
+        except GenerationCancelled:
+            logger.debug("Streaming generation cancelled")
+        except Exception as e:
+            handler.on_llm_error(e)
+
+    @staticmethod
+    def _to_sources(documents: list[Document]) -> list[RetrievalResult]:
+        """Citation records for the documents behind an answer."""
+        return [
+            RetrievalResult(
+                content=doc.page_content[:200] + "...",
+                source=doc.metadata.get('source_file', 'Unknown'),
+                page=doc.metadata.get('page'),
+                relevance_score=doc.metadata.get('relevance_score', 0.0),
+                chunk_id=doc.metadata.get('chunk_id', 'unknown')
+            )
+            for doc in documents
+        ]
+
+    def _error_message(self, error: Exception) -> str:
+        """Log a generation failure and turn it into a user-facing message."""
+        error_msg = str(error)
+        logger.error(f"Error generating response: {error_msg}", exc_info=True)
+
+        if "api" in error_msg.lower() or "key" in error_msg.lower():
+            return f"Error: API connection failed. Please check your API key for {self.config.llm_model}."
+        if "ollama" in error_msg.lower():
+            return "Error: Could not connect to Ollama. Make sure Ollama is running locally."
+        return f"Error generating response: {error_msg}"
+
+    @staticmethod
+    def estimate_confidence(sources: list[RetrievalResult]) -> float:
+        """Confidence in an answer from the relevance of its sources."""
+        if not sources:
+            return 0.0
+        avg_relevance = sum(s.relevance_score for s in sources) / len(sources)
+        return min(1.0, max(0.0, avg_relevance))
 
     def get_last_sources(self) -> list[RetrievalResult]:
         """Get source documents from the last query."""
         return self._last_sources
 
-    def get_structured_response(self, question: str) -> RAGResponse:
+    def get_structured_response(
+        self,
+        question: str,
+        memory: Optional[ConversationBufferWindowMemory] = None,
+        filters: Optional[MetadataFilters] = None
+    ) -> RAGResponse:
         """Get a fully structured response with metadata."""
-        answer = self.get_response(question)
+        answer = self.get_response(question, memory=memory, filters=filters)
         sources = self.get_last_sources()
 
         # Calculate confidence based on relevance scores
-        if sources:
-            avg_relevance = sum(s.relevance_score for s in sources) / len(sources)
-            confidence = min(1.0, max(0.0, avg_relevance))
-        else:
-            confidence = 0.0
+        confidence = self.estimate_confidence(sources)
 
         # Get cost info
         model_info = LLM_MODELS.get(self.config.llm_model)
@@ -635,24 +1776,67 @@ This will help me provide accurate answers about your course."""
         )
 
     def rebuild_index(self) -> bool:
-        """Force rebuild of the vector index."""
-        try:
-            # Clear existing data
-            if self.persist_dir.exists():
-                shutil.rmtree(self.persist_dir)
-
-            # Rebuild
-            documents = self._load_documents()
-            if documents:
-                self.vectorstore = self.create_vectorstore(documents)
-                self.conversation_chain = self.get_conversation_chain(self.vectorstore)
-                logger.info("Successfully rebuilt index")
-                return True
-            return False
+        """
+        Force rebuild of the vector index.
 
-        except Exception as e:
-            logger.error(f"Error rebuilding index: {e}", exc_info=True)
-            return False
+        The current index keeps answering questions until the new version
+        is complete; if the rebuild fails, it simply stays in service.
+        """
+        self.wait_until_ready()
+        with self._lock:
+            try:
+                vectorstore = self.build_index()
+                if vectorstore is not None:
+                    self.vectorstore = vectorstore
+                    self.conversation_chain = self.get_conversation_chain(vectorstore)
+                    logger.info("Successfully rebuilt index")
+                    return True
+                return False
+
+            except Exception as e:
+                logger.error(f"Error rebuilding index: {e}", exc_info=True)
+                return False
+
+    def rollback_index(self) -> bool:
+        """Switch back to the index version the last rebuild replaced."""
+        self.wait_until_ready()
+        with self._lock:
+            versions = IndexVersions.load(self.persist_dir)
+            previous = versions.previous
+            manifest = IndexManifest.load(versions.path(previous)) if previous else None
+            if manifest is None:
+                logger.warning("No previous index version to roll back to")
+                return False
+            if manifest.embedding_model != self.config.embedding_model:
+                logger.warning(
+                    f"Previous index version was built with {manifest.embedding_model}; "
+                    f"switch embeddings to it before rolling back"
+                )
+                return False
+
+            current = (self.index_version, self.manifest, self.bm25_index, self.documents)
+            try:
+                self.index_version, self.manifest = previous, manifest
+                self.bm25_index, self.documents = None, []
+                # Serve it as it was; syncing would redo what is being undone
+                vectorstore = self._load_existing_vectorstore(sync=False)
+                if vectorstore is None:
+                    raise ValueError(f"Index version {previous} is empty")
+                conversation_chain = self.get_conversation_chain(vectorstore)
+            except Exception as e:
+                logger.error(f"Error rolling back index: {e}", exc_info=True)
+                if self.bm25_index is not None:
+                    self.bm25_index.close()
+                self.index_version, self.manifest, self.bm25_index, self.documents = current
+                return False
+
+            if current[2] is not None:
+                current[2].close()
+            versions.rollback()
+            self.vectorstore = vectorstore
+            self.conversation_chain = conversation_chain
+            logger.info(f"Rolled back to index version {previous}")
+            return True
 
     def switch_provider(
         self,
@@ -662,28 +1846,43 @@ This will help me provide accurate answers about your course."""
         """
         Switch to a different LLM or embedding provider.
         Rebuilds index if embedding model changes.
-        """
-        rebuild_needed = False
-
-        if embedding_model and embedding_model != self.config.embedding_model:
-            self.config.provider_config.embedding_model = embedding_model
-            self.embeddings = EmbeddingFactory.create(self.config.provider_config)
-            rebuild_needed = True
-            logger.info(f"Switched embeddings to: {embedding_model}")
 
-        if llm_model:
-            self.config.provider_config.llm_model = llm_model
-            logger.info(f"Switched LLM to: {llm_model}")
+        If that rebuild fails, the previous provider settings and embeddings
+        are restored, so the index version still being served is never
+        queried with vectors from another model.
+        """
+        self.wait_until_ready()
+        with self._lock:
+            rebuild_needed = False
+            previous_config = copy.copy(self.config.provider_config)
+            previous_embeddings = self.embeddings
+
+            if embedding_model and embedding_model != self.config.embedding_model:
+                self.config.provider_config.embedding_model = embedding_model
+                self.embeddings = self._create_embeddings()
+                rebuild_needed = True
+                logger.info(f"Switched embeddings to: {embedding_model}")
+
+            if llm_model:
+                self.config.provider_config.llm_model = llm_model
+                self._expansion_llm = None
+                logger.info(f"Switched LLM to: {llm_model}")
+
+            if rebuild_needed:
+                if self.rebuild_index():
+                    return True
+                self.config.provider_config = previous_config
+                self.embeddings = previous_embeddings
+                self._expansion_llm = None
+                logger.warning(f"Rebuild failed; keeping {previous_config.embedding_model}")
+                return False
+            elif self.vectorstore:
+                # Just rebuild the chain with new LLM
+                self.conversation_chain = self.get_conversation_chain(self.vectorstore)
+                return True
 
-        if rebuild_needed:
-            return self.rebuild_index()
-        elif self.vectorstore:
-            # Just rebuild the chain with new LLM
-            self.conversation_chain = self.get_conversation_chain(self.vectorstore)
             return True
 
-        return True
-
     def get_provider_status(self) -> dict:
         """Get status of available providers."""
         return {
@@ -691,7 +1890,20 @@ This will help me provide accurate answers about your course."""
             "ollama_models": get_available_ollama_models() if check_ollama_availability() else [],
             "current_llm": self.config.llm_model,
             "current_embeddings": self.config.embedding_model,
-            "token_usage": self.token_tracker.get_summary()
+            "token_usage": self.token_tracker.get_summary(),
+            "embedding_cache": (
+                self.embedding_cache.stats() if self.embedding_cache else None
+            ),
+            "expansion_cache": self.expansion_cache.stats(),
+            "answer_cache": self.answer_cache.stats(),
+            "rerank_cache": (
+                self.reranker.stats() if isinstance(self.reranker, RerankingService) else None
+            ),
+            "rerank_depth": self.rerank_stats.summary(),
+            "course": self.config.course,
+            "index_version": self.index_version,
+            "loading": self.loading_status(),
+            "load_times": dict(self.load_times),
         }
 
 
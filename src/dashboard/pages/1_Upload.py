@@ -2,8 +2,6 @@ import os
 import re
 import streamlit as st
 from datetime import datetime
-import PyPDF2
-from io import BytesIO
 
 # Set page config
 st.set_page_config(page_title="Upload", page_icon="📤", layout="wide", initial_sidebar_state="expanded")
@@ -61,31 +59,6 @@ def list_files(directory):
             })
     return files
 
-def process_pdf(uploaded_file):
-    """Extract text from PDF and save as TXT."""
-    try:
-        pdf_reader = PyPDF2.PdfReader(BytesIO(uploaded_file.getvalue()))
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-
-        # Sanitize filename and save as txt file
-        safe_name = sanitize_filename(uploaded_file.name)
-        txt_filename = os.path.splitext(safe_name)[0] + ".txt"
-        txt_path = os.path.join(DATA_DIR, txt_filename)
-
-        # Validate path is within DATA_DIR
-        if not validate_file_path(txt_path):
-            st.error("Invalid file path detected.")
-            return False
-
-        with open(txt_path, "w", encoding="utf-8") as f:
-            f.write(text)
-        return True
-    except Exception as e:
-        st.error(f"Error processing PDF: {str(e)}")
-        return False
-
 def save_file(uploaded_file):
     """Save an uploaded file with security validations."""
     if uploaded_file is not None:
@@ -113,17 +86,10 @@ def save_file(uploaded_file):
                 st.error("Invalid file path detected.")
                 return
 
-            # Handle PDFs
-            if uploaded_file.type == "application/pdf":
-                if process_pdf(uploaded_file):
-                    st.success(f"PDF {safe_name} processed and saved as text!")
-                else:
-                    return
-
-            # Save original file
+            # Save original file; PDFs are extracted page by page at indexing
             with open(file_path, "wb") as f:
                 f.write(uploaded_file.getbuffer())
-            st.success(f"File {safe_name} saved successfully!")
+            st.success(f"File {safe_name} saved successfully! It will be searchable in a few seconds.")
 
             # Update files list and clear cache
             list_files.clear()
@@ -150,10 +116,11 @@ def delete_file(filename):
         if os.path.exists(file_path):
             os.remove(file_path)
 
-        # Also remove corresponding txt file if it exists
-        txt_path = os.path.splitext(file_path)[0] + ".txt"
-        if validate_file_path(txt_path) and os.path.exists(txt_path):
-            os.remove(txt_path)
+        # Also remove the text copy earlier versions extracted from PDFs
+        if safe_name.lower().endswith(".pdf"):
+            txt_path = os.path.splitext(file_path)[0] + ".txt"
+            if validate_file_path(txt_path) and os.path.exists(txt_path):
+                os.remove(txt_path)
 
         st.success(f"File {safe_name} deleted successfully!")
         # Update files list and clear cache
@@ -171,7 +138,7 @@ st.write(
     """
     Upload your course materials here to provide context for the bot's responses.
     Supported file types:
-    - PDF files (will be converted to text)
+    - PDF files (text is extracted page by page, so answers cite page numbers)
     - Text files (.txt)
     - Markdown files (.md)
     - CSV files (for structured data)
@@ -182,7 +149,7 @@ st.write(
 uploaded_file = st.file_uploader(
     "Choose files to upload",
     type=["txt", "pdf", "csv", "md"],
-    help="Upload your course materials here. PDFs will be automatically converted to text for better processing.",
+    help="Upload your course materials here. PDF text is extracted automatically when the file is indexed.",
     accept_multiple_files=False
 )
 
@@ -3,8 +3,9 @@ Enhanced chat interface with source citations and confidence scores.
 """
 
 import html
+import itertools
 import streamlit as st
-from src.dashboard.llm import LlmChain, RAGConfig
+from src.dashboard.registry import get_pipeline
 import os
 
 
@@ -48,9 +49,10 @@ st.markdown("""
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
-# Initialize LLM chain with config
-if "llm_chain" not in st.session_state:
-    st.session_state.llm_chain = LlmChain()
+# Shared, process-wide RAG pipeline; only the conversation memory is per session
+llm_chain = get_pipeline()
+if "chat_memory" not in st.session_state:
+    st.session_state.chat_memory = llm_chain.new_memory()
 
 # Initialize sources storage
 if "last_sources" not in st.session_state:
@@ -67,15 +69,23 @@ with st.sidebar:
     st.markdown("### RAG Configuration")
 
     # Show current config
-    config = st.session_state.llm_chain.config
+    config = llm_chain.config
+    chunk_size = (
+        f"{config.chunk_tokens} tokens" if config.chunker == "tokens"
+        else f"{config.chunk_size} characters"
+    )
     st.info(f"""
     **Model:** {config.llm_model}
     **Embeddings:** {config.embedding_model}
-    **Chunk Size:** {config.chunk_size}
+    **Chunk Size:** {chunk_size}
     **Top-K:** {config.final_k}
     """)
 
     st.markdown("### Context Status")
+    # Models and the index load in the background; questions wait for them
+    loading = [name for name, state in llm_chain.loading_status().items() if state == "loading"]
+    if loading:
+        st.info(f"⏳ Loading {', '.join(loading)}; the first answer waits until ready")
     data_dir = os.path.join(os.path.dirname(__file__), "..", "..", "..", "data")
 
     try:
@@ -103,12 +113,22 @@ with st.sidebar:
             Please go to the Upload page and upload your course materials first.
         """)
 
+    st.markdown("### Search Scope")
+    available = llm_chain.filter_values()
+    search_filters = {
+        field: st.multiselect(label, available.get(field, []), help="Leave empty to search everything")
+        for field, label in (
+            ("lecture", "Lecture / Assignment"),
+            ("file_type", "File Type"),
+        )
+    }
+
     st.divider()
 
     # Actions
     if st.button("🔄 Rebuild Index"):
         with st.spinner("Rebuilding vector index..."):
-            success = st.session_state.llm_chain.rebuild_index()
+            success = llm_chain.rebuild_index()
             if success:
                 st.success("Index rebuilt successfully!")
             else:
@@ -117,6 +137,7 @@ with st.sidebar:
     if st.button("🗑️ Clear Chat History"):
         st.session_state.messages = []
         st.session_state.last_sources = []
+        st.session_state.chat_memory.clear()
         st.rerun()
 
 # Main content area with two columns
@@ -159,55 +180,69 @@ with col1:
 
             # Display assistant response
             with st.chat_message("assistant"):
-                with st.spinner("🔍 Searching and analyzing..."):
-                    try:
-                        # Get structured response with sources
-                        response = st.session_state.llm_chain.get_structured_response(prompt)
-
-                        # Display answer
-                        st.markdown(response.answer)
-
-                        # Store sources for sidebar display
-                        sources_data = [
-                            {
-                                'source': src.source,
-                                'page': src.page,
-                                'relevance': src.relevance_score,
-                                'content': src.content
-                            }
-                            for src in response.sources
-                        ]
-                        st.session_state.last_sources = sources_data
-
-                        # Show sources in expander
-                        if sources_data:
-                            with st.expander("📚 View Sources"):
-                                for src in sources_data:
-                                    # Escape user-controlled content to prevent XSS
-                                    safe_source = escape_html(src['source'])
-                                    safe_page = escape_html(str(src['page'])) if src.get('page') else ""
-                                    safe_content = escape_html(src['content'][:150])
-                                    st.markdown(f"""
-                                    <div class="source-card">
-                                        <strong>{safe_source}</strong>
-                                        {f" (Page {safe_page})" if safe_page else ""}
-                                        <br><small>Relevance: {src['relevance']:.1%}</small>
-                                        <br><small style="color: #666;">{safe_content}...</small>
-                                    </div>
-                                    """, unsafe_allow_html=True)
-
-                        # Add to history with sources
-                        st.session_state.messages.append({
-                            "role": "assistant",
-                            "content": response.answer,
-                            "sources": sources_data,
-                            "confidence": response.confidence
-                        })
-
-                    except Exception as e:
-                        st.error(f"Error generating response: {str(e)}")
-                        if "openai" in str(e).lower():
-                            st.warning("Please check if your OpenAI API key is properly set in the .env file")
+                try:
+                    # Stream tokens as they arrive; the last item is the sources
+                    sources = []
+
+                    def answer_tokens():
+                        for item in llm_chain.stream_response(
+                            prompt,
+                            memory=st.session_state.chat_memory,
+                            filters=search_filters
+                        ):
+                            if isinstance(item, str):
+                                yield item
+                            else:
+                                sources.extend(item)
+
+                    # Spin during retrieval, until the first token arrives
+                    stream = answer_tokens()
+                    with st.spinner("🔍 Searching and analyzing..."):
+                        first_token = next(stream, "")
+                    answer = st.write_stream(itertools.chain([first_token], stream))
+                    confidence = llm_chain.estimate_confidence(sources)
+
+                    # Store sources for sidebar display
+                    sources_data = [
+                        {
+                            'source': src.source,
+                            'page': src.page,
+                            'relevance': src.relevance_score,
+                            'content': src.content
+                        }
+                        for src in sources
+                    ]
+                    st.session_state.last_sources = sources_data
+
+                    # Show sources in expander
+                    if sources_data:
+                        with st.expander("📚 View Sources"):
+                            for src in sources_data:
+                                # Escape user-controlled content to prevent XSS
+                                safe_source = escape_html(src['source'])
+                                safe_page = escape_html(str(src['page'])) if src.get('page') else ""
+                                safe_content = escape_html(src['content'][:150])
+                                st.markdown(f"""
+                                <div class="source-card">
+                                    <strong>{safe_source}</strong>
+                                    {f" (Page {safe_page})" if safe_page else ""}
+                                    <br><small>Relevance: {src['relevance']:.1%}</small>
+                                    <br><small style="color: #666;">{safe_content}...</small>
+                                </div>
+                                """, unsafe_allow_html=True)
+
+                    # Add to history with sources
+                    st.session_state.messages.append({
+                        "role": "assistant",
+                        "content": answer,
+                        "sources": sources_data,
+                        "confidence": confidence
+                    })
+
+                except Exception as e:
+                    st.error(f"Error generating response: {str(e)}")
+                    if "openai" in str(e).lower():
+                        st.warning("Please check if your OpenAI API key is properly set in the .env file")
 
 with col2:
     st.markdown("### Response Metrics")
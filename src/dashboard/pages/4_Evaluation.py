@@ -10,7 +10,7 @@ import plotly.express as px
 import pandas as pd
 from datetime import datetime
 
-from src.dashboard.llm import LlmChain
+from src.dashboard.registry import get_pipeline
 from src.dashboard.evaluation import (
     RAGASEvaluator,
     RAGEvaluationPipeline,
@@ -36,8 +36,7 @@ Evaluate your RAG system using RAGAS (Retrieval Augmented Generation Assessment)
 """)
 
 # Initialize components
-if "llm_chain" not in st.session_state:
-    st.session_state.llm_chain = LlmChain()
+llm_chain = get_pipeline()
 
 if "evaluation_results" not in st.session_state:
     st.session_state.evaluation_results = None
@@ -60,7 +59,7 @@ with st.sidebar:
             try:
                 evaluator = RAGASEvaluator(model=eval_model)
                 pipeline = RAGEvaluationPipeline(
-                    st.session_state.llm_chain,
+                    llm_chain,
                     evaluator
                 )
 
@@ -248,7 +247,7 @@ with tab2:
                 try:
                     evaluator = RAGASEvaluator(model=eval_model)
                     pipeline = RAGEvaluationPipeline(
-                        st.session_state.llm_chain,
+                        llm_chain,
                         evaluator
                     )
 
@@ -2,8 +2,10 @@
 Settings page for configuring RAG providers and parameters.
 """
 
+import copy
+
 import streamlit as st
-from src.dashboard.llm import LlmChain, RAGConfig
+from src.dashboard.registry import get_pipeline, get_registry
 from src.dashboard.providers import (
     LLM_MODELS,
     EMBEDDING_MODELS,
@@ -29,11 +31,8 @@ st.set_page_config(
 st.title("Settings")
 st.markdown("Configure your RAG system providers, models, and parameters.")
 
-# Initialize LLM chain if not exists
-if "llm_chain" not in st.session_state:
-    st.session_state.llm_chain = LlmChain()
-
-chain = st.session_state.llm_chain
+# Shared pipeline; settings apply to every session in this process
+chain = get_pipeline()
 
 # Provider status
 st.markdown("## Provider Status")
@@ -145,6 +144,23 @@ with col2:
         help="Use cross-encoder to rerank retrieved documents for better relevance"
     )
 
+    reranker_backend = st.radio(
+        "Reranker Backend",
+        ["torch", "onnx"],
+        index=["torch", "onnx"].index(chain.config.reranker_backend),
+        format_func={"torch": "PyTorch (fp32)", "onnx": "ONNX Runtime (int8)"}.get,
+        horizontal=True,
+        disabled=not use_reranker,
+        help="The int8 ONNX model is faster on CPU-only servers; requires the onnx extra"
+    )
+
+    adaptive_rerank = st.checkbox(
+        "Adaptive Reranking Depth",
+        value=chain.config.adaptive_rerank,
+        disabled=not use_reranker,
+        help="Score the top candidates first and stop once the best ones clearly lead"
+    )
+
 # Embedding Configuration
 st.markdown("---")
 st.markdown("## Embedding Configuration")
@@ -238,27 +254,57 @@ with col2:
 st.markdown("---")
 st.markdown("## Document Chunking")
 
-col1, col2 = st.columns(2)
+chunkers = ["tokens", "characters"]
+chunker = st.radio(
+    "Measure Chunks In",
+    chunkers,
+    index=chunkers.index(chain.config.chunker),
+    horizontal=True,
+    help="Tokens: structure-aware chunks sized for the model. Characters: recursive splitter."
+)
 
-with col1:
-    chunk_size = st.number_input(
-        "Chunk Size",
-        min_value=100,
-        max_value=4000,
-        value=chain.config.chunk_size,
-        step=100,
-        help="Size of text chunks in characters"
-    )
+col1, col2 = st.columns(2)
 
-with col2:
-    chunk_overlap = st.number_input(
-        "Chunk Overlap",
-        min_value=0,
-        max_value=500,
-        value=chain.config.chunk_overlap,
-        step=50,
-        help="Overlap between consecutive chunks"
-    )
+if chunker == "tokens":
+    with col1:
+        chunk_size = st.number_input(
+            "Chunk Size",
+            min_value=32,
+            max_value=2048,
+            value=chain.config.chunk_tokens,
+            step=32,
+            help="Size of text chunks in tokens"
+        )
+
+    with col2:
+        chunk_overlap = st.number_input(
+            "Chunk Overlap",
+            min_value=0,
+            max_value=256,
+            value=chain.config.chunk_overlap_tokens,
+            step=8,
+            help="Tokens shared by consecutive chunks"
+        )
+else:
+    with col1:
+        chunk_size = st.number_input(
+            "Chunk Size",
+            min_value=100,
+            max_value=4000,
+            value=chain.config.chunk_size,
+            step=100,
+            help="Size of text chunks in characters"
+        )
+
+    with col2:
+        chunk_overlap = st.number_input(
+            "Chunk Overlap",
+            min_value=0,
+            max_value=500,
+            value=chain.config.chunk_overlap,
+            step=50,
+            help="Overlap between consecutive chunks"
+        )
 
 # Apply Changes
 st.markdown("---")
@@ -272,28 +318,34 @@ with col1:
                 # Check if embedding model changed (requires rebuild)
                 embed_changed = selected_embed != chain.config.embedding_model
 
-                # Update configuration
-                chain.config.provider_config.llm_model = selected_model
-                chain.config.provider_config.temperature = temperature
-                chain.config.use_query_expansion = use_query_expansion
-                chain.config.use_reranker = use_reranker
-                chain.config.initial_k = initial_k
-                chain.config.final_k = final_k
-                chain.config.bm25_weight = bm25_weight
-                chain.config.semantic_weight = 1.0 - bm25_weight
-                chain.config.similarity_threshold = similarity_threshold
-                chain.config.chunk_size = chunk_size
-                chain.config.chunk_overlap = chunk_overlap
-
-                # Switch provider (handles embedding changes)
+                # Build the new configuration without touching the live one
+                new_config = copy.deepcopy(chain.config)
+                new_config.provider_config.llm_model = selected_model
+                new_config.provider_config.embedding_model = selected_embed
+                new_config.provider_config.temperature = temperature
+                new_config.use_query_expansion = use_query_expansion
+                new_config.use_reranker = use_reranker
+                new_config.reranker_backend = reranker_backend
+                new_config.adaptive_rerank = adaptive_rerank
+                new_config.initial_k = initial_k
+                new_config.final_k = final_k
+                new_config.bm25_weight = bm25_weight
+                new_config.semantic_weight = 1.0 - bm25_weight
+                new_config.similarity_threshold = similarity_threshold
+                new_config.chunker = chunker
+                if chunker == "tokens":
+                    new_config.chunk_tokens = chunk_size
+                    new_config.chunk_overlap_tokens = chunk_overlap
+                else:
+                    new_config.chunk_size = chunk_size
+                    new_config.chunk_overlap = chunk_overlap
+
+                # Swap the shared pipeline (rebuilds index if embeddings changed)
                 if embed_changed:
                     st.warning("Embedding model changed. Rebuilding vector index...")
-                    success = chain.switch_provider(
-                        llm_model=selected_model,
-                        embedding_model=selected_embed
-                    )
-                else:
-                    success = chain.switch_provider(llm_model=selected_model)
+                chain = get_registry().reconfigure(new_config)
+                chain.wait_until_ready()
+                success = chain.conversation_chain is not None
 
                 if success:
                     st.success("Configuration applied successfully!")
@@ -311,6 +363,12 @@ with col2:
             else:
                 st.error("Failed to rebuild index")
 
+    if st.button("Roll Back Index", help="Serve the index version the last rebuild replaced"):
+        if chain.rollback_index():
+            st.success("Rolled back to the previous index version")
+        else:
+            st.error("No previous index version to roll back to")
+
 # Current Configuration Summary
 st.markdown("---")
 st.markdown("## Current Configuration")
@@ -320,13 +378,12 @@ config_data = {
     "Embedding Model": chain.config.embedding_model,
     "Temperature": chain.config.temperature,
     "Query Expansion": "Enabled" if chain.config.use_query_expansion else "Disabled",
-    "Reranking": "Enabled" if chain.config.use_reranker else "Disabled",
+    "Reranking": f"Enabled ({chain.config.reranker_backend})" if chain.config.use_reranker else "Disabled",
     "Initial K": chain.config.initial_k,
     "Final K": chain.config.final_k,
     "BM25 Weight": f"{chain.config.bm25_weight:.1f}",
     "Semantic Weight": f"{chain.config.semantic_weight:.1f}",
-    "Chunk Size": chain.config.chunk_size,
-    "Chunk Overlap": chain.config.chunk_overlap,
+    "Chunking": chain.chunking,
 }
 
 col1, col2 = st.columns(2)
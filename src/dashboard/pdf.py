@@ -0,0 +1,149 @@
+"""
+PDF text extraction with a per-page cache.
+
+Every PDF goes through this one stage: it is parsed once, its page texts
+are cached on disk keyed by the file's content hash, and later rebuilds,
+syncs or chunking changes read the cache instead of parsing again. Each
+page becomes its own document, so page numbers survive into citations.
+Large slide decks are split into page ranges extracted in parallel.
+"""
+
+import os
+import json
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+import pypdf
+from pypdf import PdfReader
+from langchain.schema import Document
+from langchain_core.document_loaders import BaseLoader
+
+from src.dashboard.indexing import hash_file
+
+logger = logging.getLogger(__name__)
+
+# Below this many pages, starting worker processes costs more than it saves
+MIN_PARALLEL_PAGES = 32
+
+
+@dataclass
+class PdfPages:
+    """Extracted text and printed label of every page of a PDF."""
+    texts: list[str]
+    labels: list[str]
+
+
+def _extractor_version() -> str:
+    return f"pypdf-{pypdf.__version__}"
+
+
+def _extract_range(file_path: str, start: int, stop: int) -> list[str]:
+    """Text of pages [start, stop); runs in a worker process for large files."""
+    reader = PdfReader(file_path)
+    return [reader.pages[i].extract_text().strip() for i in range(start, stop)]
+
+
+def extract_pages(file_path: str, max_workers: Optional[int] = None) -> PdfPages:
+    """
+    Extract the text of every page.
+
+    Files of at least MIN_PARALLEL_PAGES pages are split into page ranges
+    parsed by worker processes, unless this already runs in one (parallel
+    ingestion parses whole files per worker instead).
+    """
+    reader = PdfReader(file_path)
+    num_pages = len(reader.pages)
+    labels = list(reader.page_labels)
+    # At least half of MIN_PARALLEL_PAGES pages per worker
+    workers = min(max_workers or os.cpu_count() or 1, num_pages * 2 // MIN_PARALLEL_PAGES)
+
+    if num_pages < MIN_PARALLEL_PAGES or workers <= 1 or multiprocessing.parent_process():
+        return PdfPages([page.extract_text().strip() for page in reader.pages], labels)
+
+    logger.info(f"Extracting {num_pages} pages of {file_path} with {workers} worker processes")
+    bounds = [num_pages * i // (2 * workers) for i in range(2 * workers + 1)]
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        ranges = pool.map(_extract_range, [file_path] * (len(bounds) - 1), bounds[:-1], bounds[1:])
+        texts = [text for page_texts in ranges for text in page_texts]
+    return PdfPages(texts, labels)
+
+
+class PageCache:
+    """Extracted pages on disk, one JSON file per PDF content hash."""
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+
+    def _path(self, content_hash: str) -> Path:
+        return self.cache_dir / f"{content_hash}.json"
+
+    def get(self, content_hash: str) -> Optional[PdfPages]:
+        path = self._path(content_hash)
+        if not path.exists():
+            return None
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+            # Text from another extractor version may differ; parse again
+            if payload["extractor"] != _extractor_version():
+                return None
+            return PdfPages(payload["texts"], payload["labels"])
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable page cache {path}: {e}")
+            return None
+
+    def put(self, content_hash: str, pages: PdfPages) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        target = self._path(content_hash)
+        # Unique temp name: several ingestion workers may write at once
+        tmp = target.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({
+            "extractor": _extractor_version(),
+            "texts": pages.texts,
+            "labels": pages.labels,
+        }), encoding="utf-8")
+        os.replace(tmp, target)
+
+
+class CachedPdfLoader(BaseLoader):
+    """Load a PDF as one document per page, through the page cache."""
+
+    def __init__(
+        self,
+        file_path: str,
+        cache_dir: Optional[Path] = None,
+        max_workers: Optional[int] = None
+    ):
+        self.file_path = file_path
+        self.cache = PageCache(cache_dir) if cache_dir is not None else None
+        self.max_workers = max_workers
+
+    def load_pages(self) -> PdfPages:
+        if self.cache is None:
+            return extract_pages(self.file_path, self.max_workers)
+
+        content_hash = hash_file(Path(self.file_path))
+        pages = self.cache.get(content_hash)
+        if pages is None:
+            pages = extract_pages(self.file_path, self.max_workers)
+            self.cache.put(content_hash, pages)
+        else:
+            logger.info(f"Using cached text of {self.file_path}")
+        return pages
+
+    def lazy_load(self) -> Iterator[Document]:
+        pages = self.load_pages()
+        for number, (text, label) in enumerate(zip(pages.texts, pages.labels)):
+            yield Document(
+                page_content=text,
+                metadata={
+                    'source': self.file_path,
+                    'page': number,
+                    'page_label': label,
+                    'total_pages': len(pages.texts),
+                }
+            )
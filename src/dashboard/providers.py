@@ -67,6 +67,9 @@ class EmbeddingInfo:
     cost_per_1k: float  # USD per 1K tokens
     is_local: bool = False
     description: str = ""
+    # Provider quotas used to pace index builds; None means unlimited
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
 
 
 # Available models registry
@@ -232,14 +235,18 @@ EMBEDDING_MODELS: dict[str, EmbeddingInfo] = {
         provider=EmbeddingProvider.OPENAI,
         dimensions=3072,
         cost_per_1k=0.00013,
-        description="Best OpenAI embeddings"
+        description="Best OpenAI embeddings",
+        requests_per_minute=3000,  # OpenAI usage tier 1
+        tokens_per_minute=1_000_000,
     ),
     "text-embedding-3-small": EmbeddingInfo(
         name="text-embedding-3-small",
         provider=EmbeddingProvider.OPENAI,
         dimensions=1536,
         cost_per_1k=0.00002,
-        description="Fast and affordable OpenAI embeddings"
+        description="Fast and affordable OpenAI embeddings",
+        requests_per_minute=3000,  # OpenAI usage tier 1
+        tokens_per_minute=1_000_000,
     ),
 
     # Cohere
@@ -248,14 +255,16 @@ EMBEDDING_MODELS: dict[str, EmbeddingInfo] = {
         provider=EmbeddingProvider.COHERE,
         dimensions=1024,
         cost_per_1k=0.0001,
-        description="Cohere English embeddings"
+        description="Cohere English embeddings",
+        requests_per_minute=2000,  # Cohere production key
     ),
     "embed-multilingual-v3.0": EmbeddingInfo(
         name="embed-multilingual-v3.0",
         provider=EmbeddingProvider.COHERE,
         dimensions=1024,
         cost_per_1k=0.0001,
-        description="Cohere multilingual embeddings"
+        description="Cohere multilingual embeddings",
+        requests_per_minute=2000,  # Cohere production key
     ),
 
     # Ollama (Local)
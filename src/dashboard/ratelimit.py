@@ -0,0 +1,232 @@
+"""
+Client-side rate limiting for embedding providers.
+
+Hosted embedding APIs enforce requests-per-minute and tokens-per-minute
+quotas. Index builds embed many batches concurrently, so every document
+batch goes through a RateLimiter shared by all pipelines using the same
+model. Query embeddings are not budgeted, so live questions never queue
+behind an ingest; any call the provider still rejects with HTTP 429 is
+retried with backoff.
+"""
+
+import time
+import random
+import asyncio
+import logging
+import threading
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Rough size of a token in characters, for budgeting before tokenization
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(texts: list[str]) -> int:
+    return sum(len(text) // CHARS_PER_TOKEN + 1 for text in texts)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Whether a provider error means "slow down" (HTTP 429)."""
+    status = getattr(error, "status_code", None) or getattr(error, "http_status", None)
+    if status == 429:
+        return True
+    message = str(error).lower()
+    return "429" in message or "rate limit" in message or "too many requests" in message
+
+
+class RateLimiter:
+    """
+    Token-bucket limiter for a requests and a tokens per-minute budget.
+
+    acquire() blocks until the call fits both budgets. Each bucket holds at
+    most one minute of budget, so an idle limiter permits a burst of one
+    minute's quota and then settles at the configured rate.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._clock = clock
+        self._sleep = sleep
+        self._requests = float(requests_per_minute or 0)
+        self._tokens = float(tokens_per_minute or 0)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed_minutes = (now - self._updated) / 60.0
+        self._updated = now
+        if self.requests_per_minute:
+            self._requests = min(
+                self.requests_per_minute,
+                self._requests + elapsed_minutes * self.requests_per_minute
+            )
+        if self.tokens_per_minute:
+            self._tokens = min(
+                self.tokens_per_minute,
+                self._tokens + elapsed_minutes * self.tokens_per_minute
+            )
+
+    def _wait_time(self, tokens: int) -> float:
+        """Seconds until the call fits; 0 if it fits now. Caller holds the lock."""
+        wait = 0.0
+        if self.requests_per_minute and self._requests < 1:
+            wait = max(wait, (1 - self._requests) * 60.0 / self.requests_per_minute)
+        if self.tokens_per_minute:
+            # A single call larger than the bucket only waits for a full bucket
+            needed = min(tokens, self.tokens_per_minute)
+            if self._tokens < needed:
+                wait = max(wait, (needed - self._tokens) * 60.0 / self.tokens_per_minute)
+        return wait
+
+    def _try_acquire(self, tokens: int) -> float:
+        """Take the budget for one call if it fits; else seconds to wait first."""
+        with self._lock:
+            self._refill()
+            wait = self._wait_time(tokens)
+            if wait <= 0:
+                if self.requests_per_minute:
+                    self._requests -= 1
+                if self.tokens_per_minute:
+                    self._tokens -= min(tokens, self.tokens_per_minute)
+            return wait
+
+    def acquire(self, tokens: int = 0) -> None:
+        """Block until one request of the given token count is within budget."""
+        if not self.requests_per_minute and not self.tokens_per_minute:
+            return
+
+        while (wait := self._try_acquire(tokens)) > 0:
+            self._sleep(wait)
+
+    async def aacquire(self, tokens: int = 0) -> None:
+        """Async variant of acquire, waiting without blocking the event loop."""
+        if not self.requests_per_minute and not self.tokens_per_minute:
+            return
+
+        while (wait := self._try_acquire(tokens)) > 0:
+            await asyncio.sleep(wait)
+
+
+_limiters: dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    key: str,
+    requests_per_minute: Optional[int],
+    tokens_per_minute: Optional[int]
+) -> RateLimiter:
+    """Process-wide limiter for a model, shared by every pipeline using it."""
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if (
+            limiter is None
+            or limiter.requests_per_minute != requests_per_minute
+            or limiter.tokens_per_minute != tokens_per_minute
+        ):
+            limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+            _limiters[key] = limiter
+        return limiter
+
+
+def call_with_retry(
+    fn: Callable[[], T],
+    max_retries: int = 6,
+    base_delay: float = 1.0,
+    max_delay: float = 60.0,
+    sleep: Callable[[float], None] = time.sleep
+) -> T:
+    """Call fn, retrying rate-limit errors with jittered exponential backoff."""
+    for attempt in range(max_retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == max_retries or not is_rate_limit_error(e):
+                raise
+            delay = _backoff(attempt, base_delay, max_delay)
+            logger.warning(f"Rate limited ({e}); retrying in {delay:.1f}s")
+            sleep(delay)
+
+
+def _backoff(attempt: int, base_delay: float, max_delay: float) -> float:
+    return min(max_delay, base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+async def acall_with_retry(
+    fn: Callable[[], Awaitable[T]],
+    max_retries: int = 6,
+    base_delay: float = 1.0,
+    max_delay: float = 60.0
+) -> T:
+    """Async variant of call_with_retry."""
+    for attempt in range(max_retries + 1):
+        try:
+            return await fn()
+        except Exception as e:
+            if attempt == max_retries or not is_rate_limit_error(e):
+                raise
+            delay = _backoff(attempt, base_delay, max_delay)
+            logger.warning(f"Rate limited ({e}); retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+class RateLimitedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that budgets document batches and retries 429 responses.
+
+    Only embed_documents, the ingest path, waits on the limiter; queries are
+    retried but never queued behind index builds.
+    """
+
+    def __init__(self, underlying: Embeddings, limiter: RateLimiter, max_retries: int = 6):
+        self.underlying = underlying
+        self.limiter = limiter
+        self.max_retries = max_retries
+
+    def _call(self, fn: Callable[[], T], texts: list[str]) -> T:
+        tokens = estimate_tokens(texts)
+
+        def attempt() -> T:
+            self.limiter.acquire(tokens)
+            return fn()
+
+        return call_with_retry(attempt, max_retries=self.max_retries)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        return self._call(lambda: self.underlying.embed_documents(texts), texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return call_with_retry(
+            lambda: self.underlying.embed_query(text), max_retries=self.max_retries
+        )
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        tokens = estimate_tokens(texts)
+
+        async def attempt() -> list[list[float]]:
+            await self.limiter.aacquire(tokens)
+            return await self.underlying.aembed_documents(texts)
+
+        return await acall_with_retry(attempt, max_retries=self.max_retries)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return await acall_with_retry(
+            lambda: self.underlying.aembed_query(text), max_retries=self.max_retries
+        )
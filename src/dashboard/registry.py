@@ -0,0 +1,207 @@
+"""
+Process-wide registry of RAG pipelines.
+
+Streamlit serves every browser session from one process. Instead of each
+session building its own LlmChain (embeddings client, cross-encoder, Chroma
+client, BM25 index), sessions fetch a shared pipeline from this registry
+and keep only their conversation memory in session state.
+
+One worker can serve many courses: each course has its own pipeline (and
+so its own collection, BM25 index and manifest), built on its first
+query. When more courses are in use than max_pipelines, or the process
+grows past max_memory_mb, the least recently used pipeline is closed
+and rebuilt from its on-disk index when asked for again. Courses are a
+library API (get_course, courses) for embedding applications; the
+dashboard pages serve the default pipeline only.
+"""
+
+import gc
+import os
+import copy
+import json
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import asdict
+from pathlib import Path
+from typing import Callable, Optional
+
+from src.dashboard.indexing import list_courses
+from src.dashboard.llm import DEFAULT_DATA_DIR, LlmChain, RAGConfig
+
+logger = logging.getLogger(__name__)
+
+
+def config_key(config: RAGConfig) -> str:
+    """Stable key identifying a pipeline configuration."""
+    return json.dumps(asdict(config), sort_keys=True, default=str)
+
+
+def resident_memory_mb() -> Optional[float]:
+    """Resident set size of this process in MB, or None where unknown."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class PipelineRegistry:
+    """
+    Thread-safe cache of LlmChain instances keyed by RAGConfig.
+
+    Construction happens outside the registry lock with a per-key lock, so
+    a slow first build of one configuration does not block lookups of
+    others, and concurrent first requests build the pipeline only once.
+    Pipelines are kept in least recently used order. Each build evicts at
+    most one other pipeline, the oldest: at once if more than max_pipelines
+    are loaded, or else if resident memory exceeds max_memory_mb once the
+    new pipeline has finished loading. Memory is rarely returned to the OS
+    after a pipeline is closed, so it is not re-measured to evict more.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[RAGConfig], LlmChain] = LlmChain,
+        max_pipelines: Optional[int] = None,
+        max_memory_mb: Optional[float] = None
+    ):
+        self._factory = factory
+        self.max_pipelines = max_pipelines
+        self.max_memory_mb = max_memory_mb
+        self._pipelines: OrderedDict[str, LlmChain] = OrderedDict()
+        self._build_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        # The app picks up uploads without a manual rebuild, and pages
+        # render while models and the index load in the background
+        self.default_config = RAGConfig(watch_data_dir=True, background_loading=True)
+
+    def get(self, config: Optional[RAGConfig] = None) -> LlmChain:
+        """Return the shared pipeline for a configuration, building it once."""
+        config = config or self.default_config
+        key = config_key(config)
+
+        with self._lock:
+            pipeline = self._pipelines.get(key)
+            if pipeline is not None:
+                self._pipelines.move_to_end(key)
+                return pipeline
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+
+        with build_lock:
+            with self._lock:
+                pipeline = self._pipelines.get(key)
+            if pipeline is None:
+                course = f" for course {config.course}" if config.course else ""
+                logger.info(f"Building shared RAG pipeline{course}")
+                # Private copy so later edits to the caller's config cannot
+                # drift away from the key it is registered under
+                pipeline = self._factory(copy.deepcopy(config))
+                with self._lock:
+                    self._pipelines[key] = pipeline
+                    self._build_locks.pop(key, None)
+                self._evict(key, pipeline)
+
+        return pipeline
+
+    def get_course(self, course: str) -> LlmChain:
+        """
+        Shared pipeline for one course under the default configuration.
+
+        Library API: no dashboard page routes through it.
+        """
+        config = copy.deepcopy(self.default_config)
+        config.course = course
+        return self.get(config)
+
+    def courses(self) -> list[str]:
+        """Courses found under the default configuration's data directory (library API)."""
+        return list_courses(Path(self.default_config.data_dir or DEFAULT_DATA_DIR))
+
+    def _evict(self, key: str, pipeline: LlmChain) -> None:
+        """Evict one other pipeline if adding the one under key broke a limit."""
+        with self._lock:
+            over = self.max_pipelines is not None and len(self._pipelines) > self.max_pipelines
+        if over:
+            self._evict_oldest(keep=key)
+        elif self.max_memory_mb is not None:
+            # With background loading the new pipeline holds little yet
+            threading.Thread(
+                target=self._evict_for_memory, args=(key, pipeline),
+                name="pipeline-evictor", daemon=True
+            ).start()
+
+    def _evict_for_memory(self, key: str, pipeline: LlmChain) -> None:
+        pipeline.wait_until_ready()
+        used = resident_memory_mb()
+        if used is not None and used > self.max_memory_mb:
+            logger.info(f"Resident memory {used:.0f} MB is over {self.max_memory_mb:.0f} MB")
+            self._evict_oldest(keep=key)
+
+    def _evict_oldest(self, keep: str) -> None:
+        """Close the least recently used pipeline other than keep."""
+        with self._lock:
+            victim = next((k for k in self._pipelines if k != keep), None)
+            if victim is None:
+                return
+            pipeline = self._pipelines.pop(victim)
+        course = pipeline.config.course
+        logger.info(f"Evicting RAG pipeline{f' for course {course}' if course else ''}")
+        self._close([pipeline])
+        del pipeline
+        gc.collect()
+
+    def reconfigure(self, config: RAGConfig) -> LlmChain:
+        """
+        Make a configuration the process-wide default.
+
+        Pipelines for other configurations are dropped: they share the
+        on-disk index, which the new configuration may have rebuilt.
+        """
+        pipeline = self.get(config)
+        key = config_key(config)
+        with self._lock:
+            self.default_config = copy.deepcopy(config)
+            dropped = [p for k, p in self._pipelines.items() if k != key]
+            self._pipelines = OrderedDict({key: pipeline})
+        self._close(dropped)
+        return pipeline
+
+    def clear(self) -> None:
+        """Drop every cached pipeline."""
+        with self._lock:
+            dropped = list(self._pipelines.values())
+            self._pipelines.clear()
+        self._close(dropped)
+
+    @staticmethod
+    def _close(pipelines: list[LlmChain]) -> None:
+        # Stop their watchers so only live pipelines write to the index
+        for pipeline in pipelines:
+            pipeline.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pipelines)
+
+
+def _env_number(name: str, cast: Callable[[str], float]) -> Optional[float]:
+    value = os.getenv(name)
+    return cast(value) if value else None
+
+
+_registry = PipelineRegistry(
+    max_pipelines=_env_number("TALKER_MAX_PIPELINES", int),
+    max_memory_mb=_env_number("TALKER_MAX_MEMORY_MB", float),
+)
+
+
+def get_registry() -> PipelineRegistry:
+    """The registry shared by the whole process."""
+    return _registry
+
+
+def get_pipeline(config: Optional[RAGConfig] = None) -> LlmChain:
+    """Shared pipeline for a configuration (the current default if omitted)."""
+    return _registry.get(config)
@@ -0,0 +1,288 @@
+"""
+Shared cross-encoder reranking service.
+
+Reranked on each request's own thread, concurrent questions each run a
+small forward pass and compete with the web server and each other for
+cores. The service instead queues the (query, chunk) pairs of every
+request; one worker thread gathers what arrives within a short window
+and scores it in a single batch, on a bounded number of torch threads.
+Scores are cached per (query, chunk id), so a repeated question, or one
+whose candidates overlap an earlier answer's, only scores new chunks.
+
+OnnxCrossEncoder is an optional backend for CPU-only deployments: the
+cross-encoder is exported to ONNX once, its weights quantized to int8,
+and scored with ONNX Runtime (install the `onnx` extra).
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+from langchain.schema import Document
+
+from src.dashboard.cache import EmbeddingCache, TTLCache
+
+logger = logging.getLogger(__name__)
+
+RERANKER_BACKENDS = ("torch", "onnx")
+# Exported models are shared by every data directory and process
+ONNX_CACHE_DIR = Path.home() / ".cache" / "talker" / "onnx"
+MAX_PAIR_TOKENS = 512
+
+
+@dataclass
+class _Request:
+    """Pairs of one caller, answered through its future."""
+    pairs: list[list[str]]
+    future: Future
+
+
+def _limit_torch_threads(num_threads: int) -> None:
+    try:
+        import torch
+    except ImportError:
+        return
+    if torch.get_num_threads() > num_threads:
+        torch.set_num_threads(num_threads)
+        logger.info(f"Limited torch to {num_threads} intra-op threads for reranking")
+
+
+class RerankingService:
+    """
+    Micro-batching, caching front end to a cross-encoder.
+
+    model is anything with a CrossEncoder-style predict(pairs, batch_size).
+    A batch is scored once max_batch_size pairs are waiting or max_wait_ms
+    after its first request arrived, whichever comes first. num_threads
+    caps torch's intra-op threads (half the cores by default). The
+    settings can be changed while the service runs with configure().
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        cache_size: int = 50_000,
+        num_threads: Optional[int] = None
+    ):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.num_threads = num_threads or max(1, (os.cpu_count() or 2) // 2)
+        # Scores never go stale: chunk ids are derived from chunk content
+        self.scores = TTLCache(max_entries=cache_size, ttl=float("inf"))
+        self.batches = 0
+        self.pairs_scored = 0
+        self._queue: queue.Queue[_Request] = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def configure(
+        self,
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        cache_size: Optional[int] = None,
+        num_threads: Optional[int] = None
+    ) -> None:
+        """Apply new batching, cache and thread settings; None keeps a setting."""
+        if max_batch_size is not None:
+            self.max_batch_size = max_batch_size
+        if max_wait_ms is not None:
+            self.max_wait = max_wait_ms / 1000
+        if cache_size is not None:
+            self.scores.max_entries = cache_size  # Shrinks on the next insert
+        if num_threads is not None and num_threads != self.num_threads:
+            self.num_threads = num_threads
+            with self._lock:
+                if self._worker is not None:
+                    _limit_torch_threads(num_threads)
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                _limit_torch_threads(self.num_threads)
+                self._worker = threading.Thread(target=self._run, name="reranker", daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0].pairs)
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                size += len(request.pairs)
+            self._score_batch(batch)
+
+    def _score_batch(self, batch: list[_Request]) -> None:
+        pairs = [pair for request in batch for pair in request.pairs]
+        try:
+            scores = self.model.predict(pairs, batch_size=self.max_batch_size)
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.pairs_scored += len(pairs)
+        offset = 0
+        for request in batch:
+            end = offset + len(request.pairs)
+            request.future.set_result([float(score) for score in scores[offset:end]])
+            offset = end
+
+    def predict(self, pairs: list[list[str]]) -> list[float]:
+        """Scores of [query, text] pairs, batched with concurrent callers."""
+        if not pairs:
+            return []
+        self._ensure_worker()
+        request = _Request(pairs, Future())
+        self._queue.put(request)
+        return request.future.result()
+
+    def score(self, query: str, documents: list[Document]) -> list[float]:
+        """Relevance of each document to query, scoring only uncached chunks."""
+        query_hash = EmbeddingCache.text_hash(query)
+        keys = [
+            (query_hash, doc.metadata.get("chunk_id") or EmbeddingCache.text_hash(doc.page_content))
+            for doc in documents
+        ]
+        scores = [self.scores.get(key) for key in keys]
+        missing = [i for i, score in enumerate(scores) if score is None]
+
+        if missing:
+            fresh = self.predict([[query, documents[i].page_content] for i in missing])
+            for i, score in zip(missing, fresh):
+                scores[i] = score
+                self.scores.put(keys[i], score)
+        return scores
+
+    def stats(self) -> dict:
+        """Score cache counters and how well requests were batched."""
+        return {
+            **self.scores.stats(),
+            "batches": self.batches,
+            "mean_batch_pairs": self.pairs_scored / self.batches if self.batches else 0.0,
+            "threads": self.num_threads,
+        }
+
+
+def export_onnx(model_name: str, output_dir: Path, quantize: bool = True) -> Path:
+    """
+    Export a Hugging Face cross-encoder to ONNX, with int8 weights by default.
+
+    Dynamic quantization stores weights as int8 and quantizes activations
+    on the fly, which needs no calibration data. The tokenizer is saved
+    next to the model, so loading it later needs no network.
+    """
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+
+    sample = dict(tokenizer(["query"], ["passage"], return_tensors="pt"))
+    input_names = list(sample)
+    fp32_path = output_dir / "model.onnx"
+    with torch.no_grad():
+        # A trailing dict passes the inputs by name, whatever their order
+        torch.onnx.export(
+            model,
+            (sample,),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes={
+                **{name: {0: "batch", 1: "sequence"} for name in input_names},
+                "logits": {0: "batch"},
+            },
+            opset_version=17,
+        )
+    tokenizer.save_pretrained(output_dir)
+
+    if not quantize:
+        return fp32_path
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    int8_path = output_dir / "model-int8.onnx"
+    quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+    fp32_path.unlink()
+    return int8_path
+
+
+class OnnxCrossEncoder:
+    """
+    Cross-encoder scored with ONNX Runtime, a drop-in for CrossEncoder.predict.
+
+    Like sentence-transformers' CrossEncoder, single-logit models return
+    sigmoid scores, so scores of both backends are comparable.
+    """
+
+    def __init__(self, model_path: Path, num_threads: Optional[int] = None):
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        model_path = Path(model_path)
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = num_threads or max(1, (os.cpu_count() or 2) // 2)
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(
+            str(model_path), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path.parent)
+
+    @classmethod
+    def from_pretrained(
+        cls,
+        model_name: str,
+        cache_dir: Path = ONNX_CACHE_DIR,
+        quantize: bool = True,
+        num_threads: Optional[int] = None
+    ) -> "OnnxCrossEncoder":
+        """Load a cached export of model_name, exporting it on first use."""
+        output_dir = Path(cache_dir) / model_name.replace("/", "--")
+        model_path = output_dir / ("model-int8.onnx" if quantize else "model.onnx")
+        if not model_path.exists():
+            logger.info(f"Exporting {model_name} to ONNX in {output_dir}")
+            model_path = export_onnx(model_name, output_dir, quantize)
+        return cls(model_path, num_threads)
+
+    def predict(self, pairs: list[list[str]], batch_size: int = 32) -> np.ndarray:
+        scores = []
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start:start + batch_size]
+            features = self.tokenizer(
+                [query for query, _ in batch],
+                [text for _, text in batch],
+                padding=True,
+                truncation=True,
+                max_length=MAX_PAIR_TOKENS,
+                return_tensors="np",
+            )
+            feeds = {
+                name: array.astype(np.int64)
+                for name, array in features.items() if name in self.input_names
+            }
+            logits = self.session.run(None, feeds)[0]
+            if logits.shape[-1] == 1:
+                scores.append(1 / (1 + np.exp(-logits[:, 0])))
+            else:
+                scores.append(logits)
+        return np.concatenate(scores) if scores else np.array([])
@@ -0,0 +1,305 @@
+"""
+Retrieval building blocks shared by the sync and async RAG pipelines.
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from langchain.schema import Document
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.retrievers import BaseRetriever
+
+from src.dashboard.reranking import RerankingService
+
+logger = logging.getLogger(__name__)
+
+# Damping constant from the original reciprocal rank fusion paper
+RRF_CONSTANT = 60
+
+# Shared by every MultiQueryFusionRetriever; retrieval is I/O bound
+# (embedding API, Chroma) or releases the GIL (SciPy BM25)
+_query_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="multi-query")
+
+
+def document_key(doc: Document) -> str:
+    """Identity of a chunk across result lists."""
+    return doc.metadata.get("chunk_id") or doc.page_content
+
+
+def reciprocal_rank_fusion(
+    result_lists: list[list[Document]],
+    c: int = RRF_CONSTANT
+) -> list[Document]:
+    """
+    Merge ranked result lists, best first.
+
+    Each document scores the sum of 1 / (c + rank) over the lists it
+    appears in, so chunks found by several queries rise to the top.
+    """
+    scores: dict[str, float] = {}
+    documents: dict[str, Document] = {}
+
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            key = document_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (c + rank)
+            documents.setdefault(key, doc)
+
+    return [documents[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
+@dataclass
+class AdaptiveDepth:
+    """
+    Rerank candidates in growing stages instead of all at once.
+
+    The first first_stage candidates (in retrieval order) are scored, then
+    twice as many, and so on. Scoring stops early once the top_k are
+    settled: they lead the next-best scored candidate by at least
+    score_gap, or a stage left the top_k unchanged.
+    """
+    first_stage: int = 8
+    score_gap: float = 0.1
+
+
+class RerankStats:
+    """Thread-safe counters of how deep reranking went per query."""
+
+    def __init__(self):
+        self.queries = 0
+        self.candidates = 0
+        self.pairs_scored = 0
+        self.early_exits = 0
+        self._lock = threading.Lock()
+
+    def record(self, candidates: int, scored: int) -> None:
+        with self._lock:
+            self.queries += 1
+            self.candidates += candidates
+            self.pairs_scored += scored
+            self.early_exits += scored < candidates
+
+    def summary(self) -> dict:
+        with self._lock:
+            queries = self.queries or 1
+            return {
+                "queries": self.queries,
+                "mean_candidates": self.candidates / queries,
+                "mean_pairs_scored": self.pairs_scored / queries,
+                "early_exit_rate": self.early_exits / queries,
+            }
+
+
+def _score(reranker: Any, query: str, documents: list[Document]) -> list[float]:
+    if not documents:
+        return []
+    if isinstance(reranker, RerankingService):
+        return reranker.score(query, documents)
+    return [float(s) for s in reranker.predict([[query, doc.page_content] for doc in documents])]
+
+
+def _score_adaptively(
+    reranker: Any,
+    query: str,
+    documents: list[Document],
+    top_k: int,
+    depth: AdaptiveDepth
+) -> list[float]:
+    """Scores of a prefix of documents, long enough to settle the top_k."""
+    scores: list[float] = []
+    previous_top = None
+    stage = max(depth.first_stage, top_k + 1)
+
+    while len(scores) < len(documents):
+        scores += _score(reranker, query, documents[len(scores):stage])
+        if len(scores) == len(documents):
+            break
+        order = sorted(range(len(scores)), key=scores.__getitem__, reverse=True)
+        top = set(order[:top_k])
+        if scores[order[top_k - 1]] - scores[order[top_k]] >= depth.score_gap or top == previous_top:
+            break
+        previous_top = top
+        stage *= 2
+    return scores
+
+
+def rerank_documents(
+    reranker: Optional[Any],
+    query: str,
+    documents: list[Document],
+    top_k: int,
+    depth: Optional[AdaptiveDepth] = None,
+    stats: Optional[RerankStats] = None
+) -> list[Document]:
+    """
+    Order documents by cross-encoder relevance and keep the top_k.
+
+    Returns copies carrying the score as metadata["relevance_score"], so
+    documents shared with the retriever's own store are never mutated.
+    Without a reranker the first top_k are kept in retrieval order. A
+    RerankingService scores through its cache and shared batches. With a
+    depth, only as many candidates as needed to settle the top_k are
+    scored; unscored candidates are dropped.
+    """
+    if reranker is None or not documents:
+        return documents[:top_k]
+
+    if depth is not None and top_k > 0:
+        scores = _score_adaptively(reranker, query, documents, top_k, depth)
+    else:
+        scores = _score(reranker, query, documents)
+    if stats is not None:
+        stats.record(len(documents), len(scores))
+    scored_docs = sorted(zip(documents, scores), key=lambda x: x[1], reverse=True)
+
+    reranked = [
+        Document(
+            page_content=doc.page_content,
+            metadata={**doc.metadata, "relevance_score": float(score)}
+        )
+        for doc, score in scored_docs[:top_k]
+    ]
+    logger.debug(f"Reranked {len(scores)} of {len(documents)} docs, kept top {len(reranked)}")
+    return reranked
+
+
+class RerankingRetriever(BaseRetriever):
+    """
+    Retrieve a wide candidate set, then keep the best top_k by reranker score.
+
+    Placed in front of the LLM so only the reranked top_k chunks are
+    stuffed into the prompt.
+    """
+
+    base_retriever: BaseRetriever
+    reranker: Optional[Any] = None
+    top_k: int = 5
+    depth: Optional[AdaptiveDepth] = None
+    stats: Optional[RerankStats] = None
+
+    def rerank(self, query: str, documents: list[Document]) -> list[Document]:
+        return rerank_documents(
+            self.reranker, query, documents, self.top_k, self.depth, self.stats
+        )
+
+    async def arerank(self, query: str, documents: list[Document]) -> list[Document]:
+        """Rerank in a worker thread; cross-encoder scoring is CPU-bound."""
+        return await asyncio.to_thread(self.rerank, query, documents)
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        documents = self.base_retriever.invoke(
+            query, config={"callbacks": run_manager.get_child()}
+        )
+        return self.rerank(query, documents)
+
+    async def _aget_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        documents = await self.base_retriever.ainvoke(
+            query, config={"callbacks": run_manager.get_child()}
+        )
+        return await self.arerank(query, documents)
+
+
+class MultiQueryFusionRetriever(BaseRetriever):
+    """
+    Retrieve for a query and its expansions concurrently and fuse the results.
+
+    expander maps a question to the list of queries to run (the question
+    itself first). Queries are retrieved in parallel, on a shared thread
+    pool or with asyncio.gather, and merged by reciprocal rank fusion.
+
+    When the base retriever is an ensemble (the hybrid BM25 + semantic
+    retriever), branches with a search_many method score all queries in one
+    call, e.g. one sparse matrix product for BM25, while the other branches
+    run per query; each query's branch results are then fused with the
+    ensemble's own weighted fusion.
+    """
+
+    base_retriever: BaseRetriever
+    expander: Callable[[str], list[str]]
+    aexpander: Optional[Callable[[str], Awaitable[list[str]]]] = None
+    max_results: int = 20
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        queries = list(dict.fromkeys(self.expander(query)))
+        config = {"callbacks": run_manager.get_child()}
+
+        if len(queries) == 1:
+            results = [self.base_retriever.invoke(queries[0], config=config)]
+        elif self._batched_branches():
+            branches = self.base_retriever.retrievers
+            # Batched branches run in the background while the others fan out
+            batches = [
+                _query_pool.submit(branch.search_many, queries)
+                if hasattr(branch, "search_many") else None
+                for branch in branches
+            ]
+            results = self._fuse_branches([
+                batch.result() if batch is not None
+                else list(_query_pool.map(lambda q, b=branch: b.invoke(q, config=config), queries))
+                for branch, batch in zip(branches, batches)
+            ])
+        else:
+            results = list(_query_pool.map(
+                lambda q: self.base_retriever.invoke(q, config=config), queries
+            ))
+        return reciprocal_rank_fusion(results)[:self.max_results]
+
+    async def _aget_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        if self.aexpander is not None:
+            queries = await self.aexpander(query)
+        else:
+            queries = await asyncio.to_thread(self.expander, query)
+        queries = list(dict.fromkeys(queries))
+        config = {"callbacks": run_manager.get_child()}
+
+        if len(queries) > 1 and self._batched_branches():
+            results = self._fuse_branches(await asyncio.gather(*(
+                asyncio.to_thread(branch.search_many, queries)
+                if hasattr(branch, "search_many")
+                else asyncio.gather(*(branch.ainvoke(q, config=config) for q in queries))
+                for branch in self.base_retriever.retrievers
+            )))
+        else:
+            results = await asyncio.gather(
+                *(self.base_retriever.ainvoke(q, config=config) for q in queries)
+            )
+        return reciprocal_rank_fusion(list(results))[:self.max_results]
+
+    def _batched_branches(self) -> bool:
+        """Whether the base retriever is an ensemble with a batch-capable branch."""
+        branches = getattr(self.base_retriever, "retrievers", None) or []
+        return any(hasattr(branch, "search_many") for branch in branches)
+
+    def _fuse_branches(self, per_branch: list[list[list[Document]]]) -> list[list[Document]]:
+        """Per-query ensemble results from each branch's per-query results."""
+        return [
+            self.base_retriever.weighted_reciprocal_rank(list(branch_results))
+            for branch_results in zip(*per_branch)
+        ]
@@ -0,0 +1,171 @@
+"""
+Background watcher that keeps the index in sync with the data directory.
+
+Instead of scanning data/ whenever a pipeline is constructed, a watcher
+thread notices added, changed and removed course files and calls back so
+the pipeline can re-index them incrementally. It uses filesystem events
+(inotify and friends, via the optional watchdog package) and falls back
+to polling file sizes and mtimes when watchdog is not installed.
+"""
+
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from src.dashboard.indexing import SUPPORTED_EXTENSIONS, iter_data_files
+
+logger = logging.getLogger(__name__)
+
+
+def snapshot_files(data_dir: Path, exclude: Iterable[str] = ()) -> dict[str, tuple[int, int]]:
+    """Size and mtime of every course file; stat only, nothing is read."""
+    snapshot = {}
+    for path in iter_data_files(data_dir, exclude):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        snapshot[path.relative_to(data_dir).as_posix()] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+
+class DataDirWatcher:
+    """
+    Call on_change from a background thread when course files change.
+
+    Bursts of changes (an upload, an editor's save, copying a folder) are
+    settled for debounce seconds and reported as one call. on_change also
+    runs once at start, so changes made while nothing was watching are
+    picked up without blocking whoever started the watcher. Errors raised
+    by on_change are logged and watching continues. Top-level folders in
+    exclude are not watched.
+    """
+
+    def __init__(
+        self,
+        data_dir: Path,
+        on_change: Callable[[], None],
+        debounce: float = 2.0,
+        poll_interval: float = 2.0,
+        use_watchdog: bool = True,
+        exclude: Iterable[str] = ()
+    ):
+        self.data_dir = Path(data_dir)
+        self.exclude = frozenset(exclude)
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_watchdog = use_watchdog
+
+        self._observer = None
+        self._thread: Optional[threading.Thread] = None
+        self._changed = threading.Event()
+        self._stopped = threading.Event()
+        self._snapshot: dict[str, tuple[int, int]] = {}
+
+    @property
+    def backend(self) -> Optional[str]:
+        """"watchdog" or "polling" once started, None before."""
+        if self._thread is None:
+            return None
+        return "watchdog" if self._observer is not None else "polling"
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        if self.use_watchdog:
+            self._observer = self._start_observer()
+        self._thread = threading.Thread(
+            target=self._run, name="data-dir-watcher", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Watching {self.data_dir} for changes ({self.backend})")
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        self._stopped.set()
+        self._changed.set()  # Wake the worker
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _is_relevant(self, path: str, is_directory: bool) -> bool:
+        try:
+            rel_path = Path(path).relative_to(self.data_dir)
+        except ValueError:
+            return False
+        # Hidden directories hold our own state (.chroma_db, caches)
+        if any(part.startswith('.') for part in rel_path.parts):
+            return False
+        if rel_path.parts and rel_path.parts[0] in self.exclude:
+            return False
+        return is_directory or rel_path.suffix.lower() in SUPPORTED_EXTENSIONS
+
+    def _start_observer(self):
+        """Start a watchdog observer, or return None to fall back to polling."""
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            logger.info("watchdog not installed; polling the data directory instead")
+            return None
+
+        watcher = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.event_type in ("opened", "closed_no_write"):
+                    return
+                paths = [event.src_path, getattr(event, "dest_path", "")]
+                if any(p and watcher._is_relevant(p, event.is_directory) for p in paths):
+                    watcher._changed.set()
+
+        try:
+            self.data_dir.mkdir(parents=True, exist_ok=True)
+            observer = Observer()
+            observer.schedule(Handler(), str(self.data_dir), recursive=True)
+            observer.start()
+            return observer
+        except Exception as e:
+            logger.warning(f"Could not watch {self.data_dir} ({e}); polling instead")
+            return None
+
+    def _wait_for_change(self) -> bool:
+        """Block until files changed and settled; False once stopped."""
+        if self._observer is not None:
+            self._changed.wait()
+            # Settle: keep waiting while events are still arriving
+            while not self._stopped.is_set():
+                self._changed.clear()
+                if not self._changed.wait(self.debounce):
+                    break
+        else:
+            while not self._stopped.wait(self.poll_interval):
+                snapshot = snapshot_files(self.data_dir, self.exclude)
+                if snapshot == self._snapshot:
+                    continue
+                # Settle: a file still being written changes between polls
+                while not self._stopped.wait(self.debounce):
+                    settled = snapshot_files(self.data_dir, self.exclude)
+                    if settled == snapshot:
+                        break
+                    snapshot = settled
+                self._snapshot = snapshot
+                break
+        return not self._stopped.is_set()
+
+    def _notify(self) -> None:
+        try:
+            self.on_change()
+        except Exception as e:
+            logger.error(f"Error handling data directory change: {e}", exc_info=True)
+
+    def _run(self) -> None:
+        if self._observer is None:
+            self._snapshot = snapshot_files(self.data_dir, self.exclude)
+        # Catch up on changes made while nothing was watching
+        self._notify()
+        while self._wait_for_change():
+            self._notify()
@@ -119,6 +119,8 @@ class PiazzaBot:
             "post_id": post["nr"],
             "status": status,
             "timestamp": created_timestamp,
+            # Piazza folders (e.g. "hw3"), usable to filter retrieval
+            "folders": post.get("folders", []),
         }
 
     def already_answered(self, post):
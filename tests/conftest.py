@@ -86,6 +86,51 @@ Key concepts:
     return files
 
 
+def write_pdf(path, pages):
+    """Write a minimal PDF with one line of Helvetica text per page."""
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{4 + 2 * i} 0 R' for i in range(len(pages)))}] "
+        f"/Count {len(pages)} >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(pages):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode()
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    Path(path).write_bytes(out)
+    return Path(path)
+
+
+@pytest.fixture
+def pdf_writer():
+    """The write_pdf helper, for tests that need their own PDFs."""
+    return write_pdf
+
+
+@pytest.fixture
+def sample_pdf(temp_data_dir):
+    """A three-page lecture PDF in the data directory."""
+    return write_pdf(temp_data_dir / "slides.pdf", [
+        "Gradient descent minimizes the loss function.",
+        "Backpropagation computes gradients layer by layer.",
+        "Regularization reduces overfitting.",
+    ])
+
+
 @pytest.fixture
 def mock_openai_embeddings():
     """Mock OpenAI embeddings for testing without API calls."""
@@ -120,6 +165,20 @@ def mock_cross_encoder():
         yield mock_instance
 
 
+@pytest.fixture
+def make_chain():
+    """Factory for LlmChains with mocked providers and no reranker or retrieval chain."""
+    from src.dashboard.llm import LlmChain, RAGConfig
+
+    def make(**config):
+        config.setdefault("use_reranker", False)
+        with patch('src.dashboard.llm.EmbeddingFactory'):
+            with patch.object(LlmChain, '_setup_chain'):
+                return LlmChain(config=RAGConfig(**config))
+
+    return make
+
+
 @pytest.fixture
 def rag_config():
     """Create a test RAG configuration."""
@@ -0,0 +1,182 @@
+"""
+Tests for the persistent BM25 index.
+"""
+
+import numpy as np
+
+from src.dashboard.bm25 import BM25Builder, BM25Index, BM25IndexRetriever, tokenize
+
+
+class TestTokenize:
+    """Tests for the shared tokenizer."""
+
+    def test_lowercases_and_strips_punctuation(self):
+        """Test that tokens are lowercase words."""
+        assert tokenize("The Final-Exam is worth 40%!") == [
+            "the", "final", "exam", "is", "worth", "40"
+        ]
+
+
+class TestBM25Index:
+    """Tests for BM25 scoring and persistence."""
+
+    def test_search_ranks_matching_documents(self, sample_documents):
+        """Test that the best keyword match ranks first."""
+        index = BM25Index.build(sample_documents)
+
+        results = index.search("final exam grade", k=3)
+
+        assert results[0][0] == 1
+        assert all(score > 0 for _, score in results)
+
+    def test_search_skips_non_matching(self, sample_documents):
+        """Test that documents without query terms are not returned."""
+        index = BM25Index.build(sample_documents)
+
+        assert index.search("quantum chromodynamics", k=3) == []
+
+    def test_search_respects_k(self, sample_documents):
+        """Test that at most k results are returned, sorted by score."""
+        index = BM25Index.build(sample_documents)
+
+        results = index.search("the of a", k=2)
+
+        assert len(results) <= 2
+        scores = [score for _, score in results]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_search_batch_matches_single_queries(self, sample_documents):
+        """Test that batched scoring equals scoring each query alone."""
+        index = BM25Index.build(sample_documents)
+        queries = ["final exam", "office hours", "unknown words", "neural networks"]
+
+        batched = index.search_batch(queries, k=3)
+
+        assert batched == [index.search(q, k=3) for q in queries]
+        np.testing.assert_allclose(
+            index.get_scores_batch(queries)[1], index.get_scores("office hours")
+        )
+
+    def test_repeated_query_terms_count(self, sample_documents):
+        """Test that a repeated query term weighs more, as in Okapi BM25."""
+        index = BM25Index.build(sample_documents)
+
+        once = index.get_scores("exam")
+        twice = index.get_scores("exam exam")
+
+        np.testing.assert_allclose(twice, 2 * once)
+
+    def test_save_and_load_roundtrip(self, sample_documents, temp_data_dir):
+        """Test that a loaded index scores and returns documents identically."""
+        index = BM25Index.build(sample_documents)
+        directory = temp_data_dir / "bm25"
+        index.save(directory, fingerprint="abc")
+
+        loaded = BM25Index.load(directory, fingerprint="abc")
+
+        assert loaded is not None
+        assert len(loaded) == len(sample_documents)
+        np.testing.assert_allclose(
+            loaded.get_scores("office hours tuesday"),
+            index.get_scores("office hours tuesday"),
+        )
+        doc = loaded.get_document(2)
+        assert doc.page_content == sample_documents[2].page_content
+        assert doc.metadata == sample_documents[2].metadata
+
+    def test_close_releases_the_files(self, sample_documents, temp_data_dir):
+        """Test that a closed index holds no open file or memory map."""
+        directory = temp_data_dir / "bm25"
+        BM25Index.build(sample_documents).save(directory, fingerprint="abc")
+        loaded = BM25Index.load(directory, fingerprint="abc")
+        doc_file = loaded._doc_file
+        doc_mmap = loaded._doc_mmap
+        loaded.search("office hours", k=2, filters={"file_type": "pdf"})
+
+        loaded.close()
+
+        assert doc_file.closed
+        assert doc_mmap.closed
+        assert loaded.matrix is None and loaded._subsets == {}
+        assert len(loaded) == 0
+        loaded.close()  # Closing twice is harmless
+
+    def test_load_rejects_stale_fingerprint(self, sample_documents, temp_data_dir):
+        """Test that an index built for other content is not reused."""
+        directory = temp_data_dir / "bm25"
+        BM25Index.build(sample_documents).save(directory, fingerprint="old")
+
+        assert BM25Index.load(directory, fingerprint="new") is None
+        assert BM25Index.load(temp_data_dir / "missing", fingerprint="old") is None
+
+    def test_filtered_search_scores_only_the_slice(self, sample_documents, temp_data_dir):
+        """Test that filters restrict results and survive save and load."""
+        for doc in sample_documents:
+            doc.metadata["file_type"] = "pdf"
+            doc.metadata["lecture"] = "lecture1" if doc.metadata["source"] != "syllabus.pdf" else None
+        index = BM25Index.build(sample_documents)
+        index.save(temp_data_dir / "bm25", fingerprint="abc")
+        loaded = BM25Index.load(temp_data_dir / "bm25", fingerprint="abc")
+
+        for candidate in (index, loaded):
+            assert [i for i, _ in candidate.search("the of a", k=5, filters={"lecture": "L01"})] \
+                == [i for i, _ in index.search("the of a", k=5) if i in (0, 3)]
+            hits = candidate.search("final exam", k=3, filters={"file_type": "pdf"})
+            assert hits == index.search("final exam", k=3)
+            assert candidate.search("final exam", k=3, filters={"course": "dsci552"}) == []
+
+    def test_builder_streams_to_disk(self, sample_documents, temp_data_dir):
+        """Test that an index built chunk by chunk matches one built in memory."""
+        sample_documents[0].metadata["lecture"] = "lecture1"
+        builder = BM25Builder(temp_data_dir / "bm25")
+        for doc in sample_documents:
+            builder.add(doc)
+
+        streamed = builder.finish(fingerprint="abc")
+        index = BM25Index.build(sample_documents)
+
+        assert streamed._documents is None  # Read from the documents file
+        assert len(streamed) == len(index)
+        np.testing.assert_allclose(streamed.get_scores("final exam"), index.get_scores("final exam"))
+        assert streamed.facets["lecture"][0] == ["lecture1"]
+        assert streamed.get_document(1).page_content == sample_documents[1].page_content
+        assert BM25Index.load(temp_data_dir / "bm25", fingerprint="abc") is not None
+
+    def test_empty_index(self, temp_data_dir):
+        """Test that an empty corpus builds, saves and searches."""
+        index = BM25Index.build([])
+        index.save(temp_data_dir / "bm25", fingerprint="empty")
+
+        loaded = BM25Index.load(temp_data_dir / "bm25", fingerprint="empty")
+
+        assert loaded.search("anything", k=5) == []
+
+
+class TestBM25IndexRetriever:
+    """Tests for the LangChain retriever wrapper."""
+
+    def test_returns_documents(self, sample_documents):
+        """Test that the retriever returns the matching chunks."""
+        retriever = BM25IndexRetriever(index=BM25Index.build(sample_documents), k=2)
+
+        docs = retriever.invoke("neural networks layers")
+
+        assert docs[0].page_content.startswith("Neural networks")
+
+    def test_search_many(self, sample_documents):
+        """Test retrieving for several queries at once."""
+        retriever = BM25IndexRetriever(index=BM25Index.build(sample_documents), k=1)
+
+        results = retriever.search_many(["office hours", "online portal"])
+
+        assert [docs[0].metadata["page"] for docs in results] == [2, 6]
+
+    def test_filters(self, sample_documents):
+        """Test that a filtered retriever only returns matching chunks."""
+        for doc in sample_documents:
+            doc.metadata["lecture"] = "lecture2" if doc.metadata["source"] == "lecture2.pdf" else None
+        retriever = BM25IndexRetriever(
+            index=BM25Index.build(sample_documents), k=5, filters={"lecture": ["lecture2"]}
+        )
+
+        assert [doc.metadata["source"] for doc in retriever.invoke("the networks of")] == ["lecture2.pdf"]
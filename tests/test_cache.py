@@ -0,0 +1,218 @@
+"""
+Tests for the RAG caching layers.
+"""
+
+import pytest
+from unittest.mock import MagicMock
+
+from src.dashboard.cache import (
+    EmbeddingCache,
+    CachedEmbeddings,
+    SemanticAnswerCache,
+    TTLCache,
+    normalize_question,
+)
+
+
+@pytest.fixture
+def embedding_cache(temp_data_dir):
+    """Create an embedding cache in a temporary directory."""
+    cache = EmbeddingCache(temp_data_dir / ".embedding_cache" / "embeddings.sqlite3")
+    yield cache
+    cache.close()
+
+
+def _fake_provider():
+    """Embeddings mock returning a vector derived from the text length."""
+    provider = MagicMock()
+    provider.embed_documents.side_effect = lambda texts: [
+        [float(len(t)), 1.0] for t in texts
+    ]
+    provider.embed_query.side_effect = lambda text: [float(len(text)), 0.0]
+    return provider
+
+
+class TestEmbeddingCache:
+    """Tests for the disk-backed embedding store."""
+
+    def test_roundtrip_and_counters(self, embedding_cache):
+        """Test storing and retrieving vectors with hit/miss counting."""
+        h = EmbeddingCache.text_hash("hello")
+
+        assert embedding_cache.get_many("model", "document", [h]) == {}
+        embedding_cache.put_many("model", "document", {h: [0.5, 0.25]})
+
+        assert embedding_cache.get_many("model", "document", [h]) == {h: [0.5, 0.25]}
+        stats = embedding_cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["entries"] == 1
+
+    def test_keyed_by_model(self, embedding_cache):
+        """Test that vectors from one model are not served for another."""
+        h = EmbeddingCache.text_hash("hello")
+        embedding_cache.put_many("model-a", "document", {h: [1.0]})
+
+        assert embedding_cache.get_many("model-b", "document", [h]) == {}
+
+    def test_evicts_least_recently_used(self, temp_data_dir):
+        """Test size-bounded eviction keeps recently used entries."""
+        cache = EmbeddingCache(temp_data_dir / "small.sqlite3", max_entries=2)
+        cache.put_many("m", "document", {"a": [1.0]})
+        cache.put_many("m", "document", {"b": [2.0]})
+        cache.get_many("m", "document", ["a"])  # Refresh "a"
+        cache.put_many("m", "document", {"c": [3.0]})
+
+        remaining = cache.get_many("m", "document", ["a", "b", "c"])
+        cache.close()
+
+        assert set(remaining) == {"a", "c"}
+
+    def test_persists_across_instances(self, temp_data_dir):
+        """Test that vectors survive reopening the cache."""
+        path = temp_data_dir / "persist.sqlite3"
+        first = EmbeddingCache(path)
+        first.put_many("m", "query", {"q": [1.0, 2.0]})
+        first.close()
+
+        second = EmbeddingCache(path)
+        assert second.get_many("m", "query", ["q"]) == {"q": [1.0, 2.0]}
+        second.close()
+
+
+class TestCachedEmbeddings:
+    """Tests for the caching embeddings wrapper."""
+
+    def test_only_misses_reach_provider(self, embedding_cache):
+        """Test that cached texts are not re-embedded."""
+        provider = _fake_provider()
+        embeddings = CachedEmbeddings(provider, "model", embedding_cache)
+
+        first = embeddings.embed_documents(["alpha", "beta"])
+        second = embeddings.embed_documents(["beta", "gamma", "alpha"])
+
+        assert first == [[5.0, 1.0], [4.0, 1.0]]
+        assert second == [[4.0, 1.0], [5.0, 1.0], [5.0, 1.0]]
+        assert provider.embed_documents.call_count == 2
+        provider.embed_documents.assert_called_with(["gamma"])
+
+    def test_duplicate_texts_embedded_once(self, embedding_cache):
+        """Test that duplicates within a batch are embedded once."""
+        provider = _fake_provider()
+        embeddings = CachedEmbeddings(provider, "model", embedding_cache)
+
+        result = embeddings.embed_documents(["same", "same"])
+
+        assert result == [[4.0, 1.0], [4.0, 1.0]]
+        provider.embed_documents.assert_called_once_with(["same"])
+
+    def test_switching_models_back_is_free(self, embedding_cache):
+        """Test that returning to a previous model hits the cache."""
+        provider_a, provider_b = _fake_provider(), _fake_provider()
+        texts = ["chunk one", "chunk two"]
+
+        CachedEmbeddings(provider_a, "model-a", embedding_cache).embed_documents(texts)
+        CachedEmbeddings(provider_b, "model-b", embedding_cache).embed_documents(texts)
+        CachedEmbeddings(provider_a, "model-a", embedding_cache).embed_documents(texts)
+
+        assert provider_a.embed_documents.call_count == 1
+        assert provider_b.embed_documents.call_count == 1
+
+    def test_queries_cached_separately(self, embedding_cache):
+        """Test that query vectors do not collide with document vectors."""
+        provider = _fake_provider()
+        embeddings = CachedEmbeddings(provider, "model", embedding_cache)
+
+        embeddings.embed_documents(["text"])
+        assert embeddings.embed_query("text") == [4.0, 0.0]
+        assert embeddings.embed_query("text") == [4.0, 0.0]
+        provider.embed_query.assert_called_once()
+
+
+class TestTTLCache:
+    """Tests for the in-memory LRU/TTL cache."""
+
+    def test_entries_expire(self):
+        """Test that entries are not returned after their TTL."""
+        now = [0.0]
+        cache = TTLCache(max_entries=10, ttl=60, clock=lambda: now[0])
+        cache.put("q", ["a"])
+
+        now[0] = 59
+        assert cache.get("q") == ["a"]
+        now[0] = 61
+        assert cache.get("q") is None
+        assert len(cache) == 0
+
+    def test_evicts_least_recently_used(self):
+        """Test that a lookup protects an entry from eviction."""
+        cache = TTLCache(max_entries=2, ttl=60)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+
+        cache.put("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.stats()["hits"] == 2
+
+    def test_normalize_question(self):
+        """Test that trivially different phrasings share a key."""
+        assert normalize_question("When is the  Final?") == normalize_question("when is the final")
+
+
+class TestSemanticAnswerCache:
+    """Tests for the embedding-keyed answer cache."""
+
+    def test_similar_question_hits(self):
+        """Test that a near-duplicate question returns the stored answer."""
+        cache = SemanticAnswerCache(threshold=0.95)
+        cache.store([1.0, 0.0, 0.1], "v1", "late policy?", "10% per day", ["syllabus"])
+
+        hit = cache.lookup([1.0, 0.0, 0.12], "v1")
+
+        assert hit.answer == "10% per day"
+        assert hit.sources == ["syllabus"]
+        assert hit.similarity > 0.99
+
+    def test_dissimilar_question_misses(self):
+        """Test that questions below the threshold are not served."""
+        cache = SemanticAnswerCache(threshold=0.95)
+        cache.store([1.0, 0.0, 0.0], "v1", "late policy?", "10% per day", [])
+
+        assert cache.lookup([0.6, 0.8, 0.0], "v1") is None
+        assert cache.stats()["misses"] == 1
+
+    def test_new_index_version_invalidates(self):
+        """Test that answers are dropped when the index content changes."""
+        cache = SemanticAnswerCache()
+        cache.store([1.0, 0.0], "v1", "q", "old answer", [])
+
+        assert cache.lookup([1.0, 0.0], "v2") is None
+        assert len(cache) == 0
+
+    def test_scopes_are_kept_apart(self):
+        """Test that answers only match lookups in their own scope, and survive others."""
+        cache = SemanticAnswerCache()
+        cache.store([1.0, 0.0], "v1", "q", "all courses", [])
+
+        assert cache.lookup([1.0, 0.0], "v1", scope="lecture=hw3") is None
+        cache.store([1.0, 0.0], "v1", "q", "hw3 only", [], scope="lecture=hw3")
+
+        assert len(cache) == 2
+        assert cache.lookup([1.0, 0.0], "v1").answer == "all courses"
+        assert cache.lookup([1.0, 0.0], "v1", scope="lecture=hw3").answer == "hw3 only"
+
+    def test_evicts_least_recently_hit(self):
+        """Test that the size bound keeps recently used answers."""
+        cache = SemanticAnswerCache(max_entries=2)
+        cache.store([1.0, 0.0, 0.0], "v1", "a", "A", [])
+        cache.store([0.0, 1.0, 0.0], "v1", "b", "B", [])
+        cache.lookup([1.0, 0.0, 0.0], "v1")
+
+        cache.store([0.0, 0.0, 1.0], "v1", "c", "C", [])
+
+        assert cache.lookup([1.0, 0.0, 0.0], "v1").answer == "A"
+        assert cache.lookup([0.0, 1.0, 0.0], "v1") is None
+        assert cache.lookup([0.0, 0.0, 1.0], "v1").answer == "C"
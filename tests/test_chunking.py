@@ -0,0 +1,137 @@
+"""
+Tests for token-aware chunking.
+"""
+
+from unittest.mock import patch
+
+import pytest
+from langchain.schema import Document
+
+from src.dashboard.chunking import RegexTokenizer, TokenChunker, get_tokenizer
+from src.dashboard.ingest import make_text_splitter
+
+SENTENCE = "The learning rate controls how far each gradient step moves the weights. "
+
+
+def _assert_covers(text, chunks):
+    """Every chunk is the slice of text at its start_index, in order."""
+    starts = [chunk.metadata['start_index'] for chunk in chunks]
+    assert starts == sorted(starts)
+    for chunk, start in zip(chunks, starts):
+        assert text[start:start + len(chunk.page_content)] == chunk.page_content
+
+
+class TestTokenizer:
+    """Tests for loading tokenizers."""
+
+    def test_encoder_is_cached(self):
+        """Test that each encoding is loaded once per process."""
+        assert get_tokenizer("cl100k_base") is get_tokenizer("cl100k_base")
+
+    def test_falls_back_when_encoding_unavailable(self):
+        """Test that a failed download falls back to approximate counts."""
+        with patch("tiktoken.get_encoding", side_effect=OSError("offline")):
+            tokenizer = get_tokenizer.__wrapped__("cl100k_base")
+
+        assert isinstance(tokenizer, RegexTokenizer)
+        assert tokenizer.count("Gradient descent, again.") == 5
+        assert tokenizer.token_starts("a bc") == [0, 2]
+
+    def test_fallback_keeps_chunking_key(self):
+        """Test that an index chunked offline is not rebuilt once tiktoken loads."""
+        with patch("src.dashboard.chunking.get_tokenizer", return_value=RegexTokenizer()):
+            offline = TokenChunker(256, 32)
+
+        assert offline.key == TokenChunker(256, 32).key == "tokens:cl100k_base:256:32"
+
+
+class TestTokenChunker:
+    """Tests for the structure-aware token chunker."""
+
+    def test_chunks_fit_and_cover_text(self):
+        """Test that chunks stay within the token budget and map back to the text."""
+        text = "\n\n".join(SENTENCE * (i % 5 + 1) for i in range(40))
+        chunker = TokenChunker(chunk_size=64, chunk_overlap=8)
+        chunks = chunker.split_documents([Document(page_content=text, metadata={'source': 'a'})])
+
+        assert len(chunks) > 1
+        assert all(chunk.metadata['source'] == 'a' for chunk in chunks)
+        # Units are tokenized separately; allow for merges across their edges
+        assert max(chunker.tokenizer.count(c.page_content) for c in chunks) <= 64 + 4
+        _assert_covers(text, chunks)
+
+    def test_consecutive_chunks_overlap(self):
+        """Test that whole trailing paragraphs are repeated as overlap."""
+        paragraphs = [f"Paragraph {i} is short." for i in range(60)]
+        chunker = TokenChunker(chunk_size=40, chunk_overlap=12)
+        chunks = chunker.split_text("\n\n".join(paragraphs))
+
+        for first, second in zip(chunks, chunks[1:]):
+            assert second.split("\n\n")[0] in first.split("\n\n")
+
+    def test_headings_start_sections(self):
+        """Test that a filled chunk ends at a heading and records its section."""
+        text = "# Intro\n\n" + SENTENCE * 5 + "\n\n## Gradient descent\n\n" + SENTENCE * 2
+        # Both sections fit one chunk, but the first fills more than half
+        chunker = TokenChunker(chunk_size=120, chunk_overlap=16)
+        chunks = chunker.split_documents([Document(page_content=text)])
+
+        assert [c.metadata['section'] for c in chunks] == ["Intro", "Gradient descent"]
+        assert chunks[1].page_content.startswith("## Gradient descent")
+        _assert_covers(text, chunks)
+
+    def test_slide_numbers_end_chunks(self):
+        """Test that chunks end after a slide number instead of mid-slide."""
+        slides = [f"Slide {n} title\n{SENTENCE * 3}\n{n}\n" for n in range(1, 7)]
+        chunker = TokenChunker(chunk_size=100, chunk_overlap=16)
+        chunks = chunker.split_text("".join(slides))
+
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert chunk.startswith("Slide ")
+            assert chunk.splitlines()[-1].isdigit()
+
+    def test_oversized_text_is_cut(self):
+        """Test that text without any breaks is cut into overlapping token windows."""
+        text = "word " * 1000
+        chunker = TokenChunker(chunk_size=100, chunk_overlap=10)
+        chunks = chunker.split_documents([Document(page_content=text)])
+
+        # Windows of 90 new tokens, each chunk repeating the last 10 of the one before
+        assert len(chunks) == 12
+        assert all(chunker.tokenizer.count(c.page_content) <= 100 for c in chunks)
+        _assert_covers(text, chunks)
+        for first, second in zip(chunks, chunks[1:]):
+            end = first.metadata['start_index'] + len(first.page_content)
+            shared = text[second.metadata['start_index']:end]
+            assert chunker.tokenizer.count(shared) == 10
+
+    def test_long_sentences_overlap_by_tokens(self):
+        """Test that sentences larger than the overlap still carry a tail of tokens."""
+        long_sentence = "Each gradient step " + "moves the weights a little " * 6 + "downhill. "
+        text = "\n\n".join(long_sentence * 4 for _ in range(10))
+        chunker = TokenChunker(chunk_size=64, chunk_overlap=12)
+        chunks = chunker.split_documents([Document(page_content=text)])
+
+        assert len(chunks) > 5
+        _assert_covers(text, chunks)
+        for first, second in zip(chunks, chunks[1:]):
+            end = first.metadata['start_index'] + len(first.page_content)
+            shared = text[second.metadata['start_index']:end]
+            assert 0 < chunker.tokenizer.count(shared) <= 12 + 2
+
+    def test_rejects_overlap_as_large_as_chunk(self):
+        """Test that the overlap must be smaller than a chunk."""
+        with pytest.raises(ValueError):
+            TokenChunker(chunk_size=32, chunk_overlap=32)
+
+
+class TestMakeTextSplitter:
+    """Tests for choosing the splitter."""
+
+    def test_chunker_selection(self):
+        """Test that the configured chunker is built, and unknown ones rejected."""
+        assert isinstance(make_text_splitter(256, 32, "tokens"), TokenChunker)
+        assert not isinstance(make_text_splitter(1000, 200), TokenChunker)
+        with pytest.raises(ValueError):
+            make_text_splitter(256, 32, "sentences")
@@ -0,0 +1,84 @@
+"""
+Tests for chunk deduplication.
+"""
+
+from src.dashboard.dedup import ChunkDeduplicator, MinHasher, content_id
+
+LECTURE = (
+    "Gradient descent updates each parameter in the direction that most reduces "
+    "the loss. The learning rate controls the step size: too large and training "
+    "diverges, too small and it crawls. Stochastic gradient descent estimates the "
+    "gradient from a mini-batch, trading noise for speed, and momentum smooths the "
+    "updates by accumulating an exponentially decaying average of past gradients. "
+    "Adaptive methods such as Adam scale each step by running estimates of the "
+    "first and second moments of the gradient."
+)
+
+
+class TestContentId:
+    """Tests for content-derived chunk ids."""
+
+    def test_ignores_whitespace_and_location(self):
+        """Test that re-flowed copies share an id and other text does not."""
+        assert content_id(LECTURE) == content_id(LECTURE.replace(" ", "\n  "))
+        assert content_id(LECTURE) != content_id(LECTURE + " Questions?")
+        assert content_id(LECTURE, '{"course": "cs101"}') != content_id(LECTURE, '{"course": "cs202"}')
+
+
+class TestMinHasher:
+    """Tests for MinHash similarity estimates."""
+
+    def test_similarity_tracks_overlap(self):
+        """Test that near copies score high and unrelated text low."""
+        hasher = MinHasher()
+        original = hasher.signature(LECTURE)
+        edited = hasher.signature(LECTURE.replace("crawls", "barely moves"))
+        unrelated = hasher.signature("The final exam is worth 40% of your grade. " * 5)
+
+        assert hasher.similarity(original, original) == 1.0
+        assert hasher.similarity(original, edited) > 0.7
+        assert hasher.similarity(original, unrelated) < 0.1
+
+
+class TestChunkDeduplicator:
+    """Tests for exact and near-duplicate detection."""
+
+    def test_exact_duplicate_returns_same_id(self):
+        """Test that a repeated chunk maps to the kept one."""
+        dedup = ChunkDeduplicator()
+
+        assert dedup.check("a", LECTURE) is None
+        assert dedup.check("a", LECTURE) == "a"
+        assert dedup.stats()["exact_duplicates"] == 1
+
+    def test_near_duplicate_maps_to_kept_chunk(self):
+        """Test that extraction noise does not cause a second embedding."""
+        dedup = ChunkDeduplicator(threshold=0.8, near_duplicates=True)
+        noisy = LECTURE.replace("Adam", "ADAM").replace(". ", ".  ") + " 12"
+
+        assert dedup.check("a", LECTURE) is None
+        assert dedup.check("b", noisy) == "a"
+        assert dedup.check("c", "Office hours are on Tuesdays from 2-4 PM.") is None
+
+    def test_near_duplicates_only_match_within_scope(self):
+        """Test that a near copy tagged with another course is kept."""
+        dedup = ChunkDeduplicator(threshold=0.8, near_duplicates=True)
+
+        assert dedup.check("a", LECTURE, scope="cs101") is None
+        assert dedup.check("b", LECTURE + " 12", scope="cs202") is None
+        assert dedup.check("c", LECTURE + " 12", scope="cs101") == "a"
+
+    def test_near_duplicates_are_opt_in(self):
+        """Test that only exact copies are dropped by default."""
+        dedup = ChunkDeduplicator()
+        noisy = LECTURE + " 12"
+
+        assert dedup.check("a", LECTURE) is None
+        assert dedup.check("b", noisy) is None
+
+    def test_registered_chunks_are_matched(self):
+        """Test that chunks already stored are seeded with add()."""
+        dedup = ChunkDeduplicator(threshold=0.8, near_duplicates=True)
+        dedup.add("stored", LECTURE)
+
+        assert dedup.check("new", LECTURE + " 12") == "stored"
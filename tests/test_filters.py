@@ -0,0 +1,65 @@
+"""
+Tests for retrieval metadata filters.
+"""
+
+import pytest
+
+from src.dashboard.filters import (
+    chroma_where,
+    filter_key,
+    filters_from_tags,
+    lecture_tag,
+    normalize_filters,
+    path_metadata,
+)
+
+
+class TestPathMetadata:
+    """Tests for deriving course and lecture from file paths."""
+
+    def test_lecture_tags(self):
+        """Test that common lecture and assignment names normalize to one tag."""
+        assert lecture_tag("L02-s24 - Tagged") == "lecture2"
+        assert lecture_tag("Lecture 10 slides") == "lecture10"
+        assert lecture_tag("Homework 03") == "hw3"
+        assert lecture_tag("hw3") == "hw3"
+        assert lecture_tag("html5 notes") is None
+        assert lecture_tag("syllabus") is None
+
+    def test_course_and_lecture(self):
+        """Test that folders never name a course and the file name wins over folders."""
+        assert path_metadata("homework/hw4/Problem 1.md") == {"lecture": "hw4"}
+        assert path_metadata("lectures/L01-intro.pdf") == {"lecture": "lecture1"}
+        assert path_metadata("syllabus.txt") == {}
+        # A course's own data directory names the course for every file
+        assert path_metadata("lectures/L01-intro.pdf", "dsci552") == {
+            "course": "dsci552", "lecture": "lecture1"
+        }
+
+
+class TestFilters:
+    """Tests for normalizing and applying filters."""
+
+    def test_normalize(self):
+        """Test that values are canonical and empty fields dropped."""
+        assert normalize_filters({"lecture": "HW 3", "file_type": [".PDF", "md"], "course": []}) == {
+            "lecture": ("hw3",), "file_type": ("md", "pdf")
+        }
+        assert normalize_filters(None) == {}
+        assert filter_key({"file_type": "pdf"}) == filter_key({"file_type": [".pdf"]})
+        assert filter_key({}) == ""
+        with pytest.raises(ValueError):
+            normalize_filters({"author": "me"})
+
+    def test_chroma_where(self):
+        """Test that filters become Chroma where clauses."""
+        assert chroma_where(None) is None
+        assert chroma_where({"lecture": "hw3"}) == {"lecture": "hw3"}
+        assert chroma_where({"lecture": "hw3", "file_type": ["md", "pdf"]}) == {
+            "$and": [{"lecture": "hw3"}, {"file_type": {"$in": ["md", "pdf"]}}]
+        }
+
+    def test_filters_from_piazza_folders(self):
+        """Test that Piazza folders naming a lecture become a lecture filter."""
+        assert filters_from_tags(["hw3", "logistics", "lecture 5"]) == {"lecture": ["hw3", "lecture5"]}
+        assert filters_from_tags(["other"]) == {}
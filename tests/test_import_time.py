@@ -0,0 +1,75 @@
+"""
+Tests for the import-time cost of the RAG pipeline module.
+
+Every dashboard page imports src.dashboard.llm, so its heavy dependencies
+are imported on first use. These tests import it in a fresh interpreter.
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+
+# Seconds; about twice the measured cost, and well under what importing
+# chromadb and the LangChain chains eagerly adds. Override on slow machines.
+IMPORT_BUDGET = float(os.getenv("TALKER_IMPORT_BUDGET", "0.9"))
+
+DEFERRED_MODULES = [
+    "chromadb",
+    "langchain_chroma",
+    "langchain.chains",
+    "langchain.memory",
+    "langchain.retrievers",
+    "langchain_community.document_loaders",
+    "pypdf",
+    "scipy",
+]
+
+
+def _python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+
+class TestImportTime:
+    """Tests for keeping src.dashboard.llm cheap to import."""
+
+    def test_heavy_dependencies_are_deferred(self):
+        """Test that importing the module loads none of the deferred dependencies."""
+        result = _python("-c", (
+            "import sys, json, src.dashboard.llm; "
+            f"print(json.dumps([m for m in {DEFERRED_MODULES!r} if m in sys.modules]))"
+        ))
+
+        assert json.loads(result.stdout.strip().splitlines()[-1]) == []
+
+    def test_deferred_names_resolve(self):
+        """Test that deferred names are still attributes of the module."""
+        result = _python("-c", (
+            "import src.dashboard.llm as llm; "
+            "print(llm.Chroma.__name__, llm.BM25Index.__name__)"
+        ))
+
+        assert result.stdout.split() == ["Chroma", "BM25Index"]
+
+    def test_cold_import_within_budget(self):
+        """Test that a cold import stays within the time budget (best of three)."""
+        timings = []
+        for _ in range(3):
+            result = _python("-X", "importtime", "-c", "import src.dashboard.llm")
+            match = re.search(r"\|\s*(\d+)\s*\|\s*src\.dashboard\.llm$", result.stderr, re.MULTILINE)
+            timings.append(int(match.group(1)) / 1e6)
+
+        if min(timings) > IMPORT_BUDGET:
+            pytest.fail(
+                f"Importing src.dashboard.llm took {min(timings):.2f}s, over the "
+                f"{IMPORT_BUDGET:.2f}s budget; run python -X importtime -c "
+                f"'import src.dashboard.llm' to find the new eager import"
+            )
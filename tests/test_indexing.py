@@ -0,0 +1,175 @@
+"""
+Tests for the per-file index manifest.
+"""
+
+from src.dashboard.indexing import (
+    FileRecord,
+    IndexManifest,
+    IndexVersions,
+    iter_data_files,
+    scan_files,
+)
+
+
+class TestIterDataFiles:
+    """Tests for data directory scanning."""
+
+    def test_skips_hidden_and_unsupported(self, sample_text_files, temp_data_dir):
+        """Test that hidden dirs and unsupported extensions are ignored."""
+        hidden = temp_data_dir / ".chroma_db"
+        hidden.mkdir()
+        (hidden / "notes.txt").write_text("internal state")
+        (temp_data_dir / "image.png").write_bytes(b"\x89PNG")
+
+        names = [path.name for path in iter_data_files(temp_data_dir)]
+
+        assert sorted(names) == ["lecture1.txt", "syllabus.txt"]
+
+    def test_skips_text_copies_of_pdfs(self, temp_data_dir):
+        """Test that text extracted from a PDF by earlier uploads is not indexed twice."""
+        for name in ("slides.pdf", "slides.txt", "Notes.PDF", "notes.pdf.txt", "notes.txt"):
+            (temp_data_dir / name).write_bytes(b"x")
+
+        names = [path.name for path in iter_data_files(temp_data_dir)]
+
+        assert names == ["Notes.PDF", "slides.pdf"]
+
+
+class TestScanFiles:
+    """Tests for content snapshots."""
+
+    def test_scan_records_relative_paths(self, sample_text_files, temp_data_dir):
+        """Test that records are keyed by path relative to the data dir."""
+        sub = temp_data_dir / "lectures"
+        sub.mkdir()
+        (sub / "week2.md").write_text("# Week 2")
+
+        records = scan_files(temp_data_dir)
+
+        assert set(records) == {"syllabus.txt", "lecture1.txt", "lectures/week2.md"}
+        assert all(r.content_hash for r in records.values())
+
+    def test_scan_reuses_hash_for_untouched_files(self, sample_text_files, temp_data_dir):
+        """Test that unchanged size/mtime reuses the stored hash."""
+        records = scan_files(temp_data_dir)
+        records["syllabus.txt"].content_hash = "stored"
+        previous = IndexManifest("model", records)
+
+        rescanned = scan_files(temp_data_dir, previous=previous)
+
+        assert rescanned["syllabus.txt"].content_hash == "stored"
+
+
+class TestIndexManifest:
+    """Tests for manifest diffing and persistence."""
+
+    @staticmethod
+    def _record(path, content_hash, chunk_ids=None):
+        return FileRecord(path, content_hash, 10, 1.0, chunk_ids or [])
+
+    def test_diff_detects_added_changed_removed(self):
+        """Test that diff classifies every kind of change."""
+        manifest = IndexManifest("model", {
+            "a.txt": self._record("a.txt", "h1"),
+            "b.txt": self._record("b.txt", "h2"),
+            "c.txt": self._record("c.txt", "h3"),
+        })
+        current = {
+            "a.txt": self._record("a.txt", "h1"),
+            "b.txt": self._record("b.txt", "changed"),
+            "d.txt": self._record("d.txt", "h4"),
+        }
+
+        diff = manifest.diff(current)
+
+        assert diff.added == ["d.txt"]
+        assert diff.changed == ["b.txt"]
+        assert diff.removed == ["c.txt"]
+
+    def test_empty_diff_is_falsy(self):
+        """Test that an unchanged directory yields an empty diff."""
+        manifest = IndexManifest("model", {"a.txt": self._record("a.txt", "h1")})
+
+        assert not manifest.diff({"a.txt": self._record("a.txt", "h1")})
+
+    def test_chunk_ids_for(self):
+        """Test collecting chunk ids of several files."""
+        manifest = IndexManifest("model", {
+            "a.txt": self._record("a.txt", "h1", ["a1", "a2"]),
+            "b.txt": self._record("b.txt", "h2", ["b1"]),
+        })
+
+        assert manifest.chunk_ids_for(["a.txt", "b.txt", "missing.txt"]) == [
+            "a1", "a2", "b1"
+        ]
+
+    def test_fingerprint_depends_on_model(self):
+        """Test that the fingerprint changes with the embedding model."""
+        files = {"a.txt": self._record("a.txt", "h1")}
+
+        assert (
+            IndexManifest("model-a", files).fingerprint
+            != IndexManifest("model-b", files).fingerprint
+        )
+
+    def test_save_and_load_roundtrip(self, temp_data_dir):
+        """Test that a saved manifest loads back identically."""
+        persist_dir = temp_data_dir / ".chroma_db"
+        manifest = IndexManifest("model", {
+            "a.txt": self._record("a.txt", "h1", ["a1"]),
+        })
+
+        manifest.save(persist_dir)
+        loaded = IndexManifest.load(persist_dir)
+
+        assert loaded == manifest
+
+    def test_load_missing_or_corrupt(self, temp_data_dir):
+        """Test that missing or corrupt manifests load as None."""
+        assert IndexManifest.load(temp_data_dir) is None
+
+        (temp_data_dir / "manifest.json").write_text("{not json")
+        assert IndexManifest.load(temp_data_dir) is None
+
+
+class TestIndexVersions:
+    """Tests for the blue/green version pointer."""
+
+    def test_activate_keeps_one_previous(self, temp_data_dir):
+        """Test that each activation retires the version before the previous."""
+        versions = IndexVersions(temp_data_dir)
+        built = []
+        retired = []
+        for _ in range(3):
+            version = versions.begin_build()
+            built.append(version)
+            retired.append(versions.activate(version))
+
+        assert len(set(built)) == 3
+        assert retired == [[], [], [built[0]]]
+        assert (versions.active, versions.previous) == (built[2], built[1])
+        assert IndexVersions.load(temp_data_dir) == versions
+
+    def test_interrupted_build_is_resumed(self, temp_data_dir):
+        """Test that an unfinished build is continued, not restarted."""
+        version = IndexVersions(temp_data_dir).begin_build()
+
+        versions = IndexVersions.load(temp_data_dir)
+        assert versions.begin_build() == version
+        assert versions.active is None
+
+    def test_rollback_swaps_active_and_previous(self, temp_data_dir):
+        """Test rollback and that it needs a previous version."""
+        versions = IndexVersions(temp_data_dir)
+        first = versions.begin_build()
+        versions.activate(first)
+        assert versions.rollback() is None
+
+        second = versions.begin_build()
+        versions.activate(second)
+        assert versions.rollback() == first
+        assert IndexVersions.load(temp_data_dir).previous == second
+
+    def test_load_missing_pointer(self, temp_data_dir):
+        """Test that a fresh directory has no active version."""
+        assert IndexVersions.load(temp_data_dir / "missing").active is None
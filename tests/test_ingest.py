@@ -0,0 +1,126 @@
+"""
+Tests for parallel document ingestion.
+"""
+
+import pytest
+
+from langchain.schema import Document
+
+from src.dashboard.ingest import (
+    BatchWriter,
+    FileChunks,
+    iter_file_chunks,
+    load_and_split,
+)
+
+
+class TestLoadAndSplit:
+    """Tests for per-file parsing."""
+
+    def test_chunks_carry_ids_and_metadata(self, sample_text_files):
+        """Test that chunks get source metadata and stable ids."""
+        result = load_and_split(str(sample_text_files[0]), chunk_size=100, chunk_overlap=20)
+
+        assert result.error is None
+        assert len(result.chunks) > 1
+        assert all(c.metadata['source_file'] == "syllabus.txt" for c in result.chunks)
+        ids = [c.metadata['chunk_id'] for c in result.chunks]
+        assert len(set(ids)) == len(ids)
+        assert ids == [
+            c.metadata['chunk_id']
+            for c in load_and_split(str(sample_text_files[0]), 100, 20).chunks
+        ]
+
+    def test_pdf_chunks_keep_page_numbers(self, sample_pdf, temp_data_dir):
+        """Test that PDFs are chunked per page through the page cache."""
+        cache_dir = temp_data_dir / ".pdf_cache"
+        result = load_and_split(str(sample_pdf), 100, 20, pdf_cache_dir=cache_dir)
+
+        assert result.error is None
+        assert [c.metadata['page'] for c in result.chunks] == [0, 1, 2]
+        assert all(c.metadata['file_type'] == "pdf" for c in result.chunks)
+        assert len(list(cache_dir.glob("*.json"))) == 1
+
+    def test_errors_are_returned_not_raised(self, temp_data_dir):
+        """Test that a broken file is reported instead of aborting ingestion."""
+        broken = temp_data_dir / "broken.pdf"
+        broken.write_bytes(b"not a pdf")
+
+        result = load_and_split(str(broken), chunk_size=100, chunk_overlap=20)
+
+        assert result.chunks == []
+        assert result.error
+
+
+class TestIterFileChunks:
+    """Tests for streaming, parallel ingestion."""
+
+    def test_parallel_matches_serial(self, temp_data_dir):
+        """Test that worker processes produce the same chunks as inline parsing."""
+        paths = []
+        for i in range(6):
+            path = temp_data_dir / f"notes{i}.txt"
+            path.write_text(f"Lecture {i}. " * 50)
+            paths.append(path)
+
+        serial = {r.file_path: r.chunks for r in iter_file_chunks(paths, 200, 20, max_workers=1)}
+        parallel = {r.file_path: r.chunks for r in iter_file_chunks(paths, 200, 20, max_workers=2)}
+
+        assert parallel == serial
+        assert len(parallel) == 6
+
+
+class TestBatchWriter:
+    """Tests for concurrent batched writes."""
+
+    @staticmethod
+    def _files(sizes):
+        return [
+            FileChunks(f"file{i}.txt", [
+                Document(page_content=f"{i}-{j}", metadata={"chunk_id": f"{i}-{j}"})
+                for j in range(size)
+            ])
+            for i, size in enumerate(sizes)
+        ]
+
+    def test_files_reported_only_when_fully_written(self):
+        """Test that a file is done only after all of its batches are stored."""
+        import random
+        import threading
+        import time
+
+        stored = set()
+        lock = threading.Lock()
+
+        def write_batch(batch):
+            time.sleep(random.uniform(0, 0.02))  # Complete out of order
+            with lock:
+                stored.update(doc.metadata["chunk_id"] for doc in batch)
+
+        reported = []
+
+        def on_file_done(item):
+            with lock:
+                assert {doc.metadata["chunk_id"] for doc in item.chunks} <= stored
+            reported.append(item.file_path)
+
+        files = self._files([5, 1, 0, 7, 3])
+        written = BatchWriter(write_batch, batch_size=3, concurrency=3).write(files, on_file_done)
+
+        assert written == 16
+        assert len(stored) == 16
+        assert reported == [f.file_path for f in files]
+
+    def test_failed_batch_raises_and_stops_reporting(self):
+        """Test that files after a failed batch are not reported done."""
+        def write_batch(batch):
+            if batch[0].metadata["chunk_id"].startswith("1-"):
+                raise RuntimeError("quota exhausted")
+
+        reported = []
+        writer = BatchWriter(write_batch, batch_size=2, concurrency=1)
+
+        with pytest.raises(RuntimeError):
+            writer.write(self._files([2, 2, 2]), lambda item: reported.append(item.file_path))
+
+        assert reported == ["file0.txt"]
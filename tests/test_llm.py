@@ -160,6 +160,7 @@ class TestDocumentLoading:
 
     def test_load_documents_from_directory(self, sample_text_files, temp_data_dir):
         """Test loading documents from a directory."""
+        from src.dashboard.indexing import iter_data_files
         from src.dashboard.llm import LlmChain
 
         with patch('src.dashboard.llm.OpenAIEmbeddings'):
@@ -169,11 +170,11 @@ class TestDocumentLoading:
                     chain.data_dir = temp_data_dir
                     chain.persist_dir = temp_data_dir / ".chroma_db"
 
-                    documents = chain._load_documents()
+                    files = list(chain._iter_chunks(iter_data_files(temp_data_dir)))
 
-                    assert len(documents) == 2
+                    assert len(files) == 2
                     # Check metadata is added
-                    for doc in documents:
+                    for doc in (chunk for item in files for chunk in item.chunks):
                         assert 'source_file' in doc.metadata
                         assert 'file_type' in doc.metadata
 
@@ -341,3 +342,845 @@ class TestErrorHandling:
                     response = chain.get_response("Test question")
 
                     assert "error" in response.lower()
+
+
+class TestIncrementalIndexing:
+    """Tests for manifest-based incremental index updates."""
+
+    @pytest.fixture
+    def chain(self, make_chain, temp_data_dir):
+        return make_chain(data_dir=str(temp_data_dir))
+
+    @staticmethod
+    def _build(chain):
+        """Build the index into a mock collection."""
+        with patch('src.dashboard.llm.Chroma', return_value=MagicMock()):
+            chain.build_index()
+
+    def test_sync_only_touches_changed_files(self, chain, sample_text_files, temp_data_dir):
+        """Test that sync re-embeds changed files and drops removed ones."""
+        from src.dashboard.indexing import IndexManifest
+
+        self._build(chain)
+        syllabus_ids = chain.manifest.files["syllabus.txt"].chunk_ids
+        lecture_ids = chain.manifest.files["lecture1.txt"].chunk_ids
+
+        (temp_data_dir / "syllabus.txt").unlink()
+        (temp_data_dir / "lecture1.txt").write_text("Lecture 1 was rewritten.")
+        (temp_data_dir / "new.md").write_text("# Brand new notes")
+
+        vectorstore = MagicMock()
+        assert chain._sync_index(vectorstore) is True
+
+        vectorstore.delete.assert_called_once_with(ids=lecture_ids + syllabus_ids)
+        added_sources = sorted({
+            doc.metadata['source_file']
+            for call in vectorstore.add_documents.call_args_list
+            for doc in call.args[0]
+        })
+        assert added_sources == ["lecture1.txt", "new.md"]
+        assert set(chain.manifest.files) == {"lecture1.txt", "new.md"}
+        assert IndexManifest.load(chain.index_dir) == chain.manifest
+
+    def test_sync_noop_when_unchanged(self, chain, sample_text_files):
+        """Test that an unchanged data dir does not touch the collection."""
+        self._build(chain)
+
+        vectorstore = MagicMock()
+        assert chain._sync_index(vectorstore) is False
+        vectorstore.delete.assert_not_called()
+        vectorstore.add_documents.assert_not_called()
+
+    def test_build_inserts_in_batches(self, chain, sample_text_files):
+        """Test that a full build streams chunks to Chroma in bounded batches."""
+        from src.dashboard.indexing import IndexManifest
+
+        chain.config.insert_batch_size = 2
+        vectorstore = MagicMock()
+
+        with patch('src.dashboard.llm.Chroma', return_value=vectorstore):
+            assert chain.build_index() is vectorstore
+
+        batches = [call.args[0] for call in vectorstore.add_documents.call_args_list]
+        assert all(len(batch) <= 2 for batch in batches)
+        inserted = [doc.metadata['chunk_id'] for batch in batches for doc in batch]
+        assert sorted(inserted) == sorted(
+            chunk_id
+            for record in chain.manifest.files.values()
+            for chunk_id in record.chunk_ids
+        )
+        assert len(chain.bm25_index) == len(inserted)
+        assert IndexManifest.load(chain.index_dir) == chain.manifest
+
+    def test_interrupted_build_resumes_from_checkpoint(self, chain, sample_text_files):
+        """Test that a crashed build keeps finished files and skips them on retry."""
+        from src.dashboard.indexing import CHECKPOINT_FILENAME, IndexManifest, IndexVersions
+
+        chain.config.insert_batch_size = 1
+        chain.config.embedding_concurrency = 1
+
+        inserted = []
+
+        def fail_on_second_file(batch, ids):
+            source = batch[0].metadata['source_file']
+            if inserted and inserted[0][0] != source:
+                raise RuntimeError("Rate limit exceeded")
+            inserted.extend((source, chunk_id) for chunk_id in ids)
+
+        vectorstore = MagicMock()
+        vectorstore.add_documents.side_effect = fail_on_second_file
+        with patch('src.dashboard.llm.Chroma', return_value=vectorstore):
+            with pytest.raises(RuntimeError):
+                chain.build_index()
+
+        first_file = inserted[0][0]
+        versions = IndexVersions.load(chain.persist_dir)
+        build_dir = versions.path(versions.building)
+        checkpoint = IndexManifest.load(build_dir, CHECKPOINT_FILENAME)
+        assert set(checkpoint.files) == {first_file}
+
+        inserted.clear()
+        vectorstore.add_documents.side_effect = lambda batch, ids: inserted.extend(
+            (doc.metadata['source_file'], chunk_id) for doc, chunk_id in zip(batch, ids)
+        )
+        with patch('src.dashboard.llm.Chroma', return_value=vectorstore):
+            with patch('src.dashboard.llm.chromadb') as chromadb:
+                chain.build_index()
+
+        chromadb.PersistentClient.return_value.delete_collection.assert_not_called()
+        assert inserted
+        assert first_file not in {source for source, _ in inserted}
+        assert not (build_dir / CHECKPOINT_FILENAME).exists()
+        assert chain.index_dir == build_dir
+        assert set(chain.manifest.files) == {"syllabus.txt", "lecture1.txt"}
+
+    def test_failed_rebuild_keeps_serving(self, chain, sample_text_files):
+        """Test that a rebuild swaps versions only once it has succeeded."""
+        from src.dashboard.indexing import IndexVersions
+
+        vectorstore = MagicMock()
+
+        with patch('src.dashboard.llm.Chroma', return_value=vectorstore):
+            with patch.object(chain, 'get_conversation_chain', side_effect=lambda vs: object()):
+                assert chain.rebuild_index() is True
+                first_version = chain.index_version
+                serving = chain.conversation_chain
+
+                vectorstore.add_documents.side_effect = RuntimeError("Provider down")
+                assert chain.rebuild_index() is False
+
+                assert chain.conversation_chain is serving
+                assert chain.index_version == first_version
+                assert IndexVersions.load(chain.persist_dir).active == first_version
+
+                vectorstore.add_documents.side_effect = None
+                assert chain.rebuild_index() is True
+
+        versions = IndexVersions.load(chain.persist_dir)
+        assert versions.active == chain.index_version != first_version
+        assert versions.previous == first_version
+        assert versions.building is None
+
+    def test_rollback_restores_previous_version(self, chain, sample_text_files, temp_data_dir):
+        """Test that rollback serves the version the last rebuild replaced."""
+        from src.dashboard.indexing import IndexVersions
+
+        with patch('src.dashboard.llm.Chroma'), patch('src.dashboard.llm.chromadb'):
+            with patch.object(chain, 'get_conversation_chain', side_effect=lambda vs: object()):
+                assert chain.rollback_index() is False
+
+                chain.rebuild_index()
+                first_version = chain.index_version
+                first_index = chain.bm25_index
+                (temp_data_dir / "lecture2.txt").write_text("Lecture 2: Neural networks.")
+                chain.rebuild_index()
+                assert "lecture2.txt" in chain.manifest.files
+                second_index = chain.bm25_index
+
+                assert chain.rollback_index() is True
+
+        # Swapped-out versions release their memory-mapped files
+        assert first_index.matrix is None and second_index.matrix is None
+        assert chain.bm25_index.search("neural networks", 1) == []
+        assert chain.index_version == first_version
+        assert "lecture2.txt" not in chain.manifest.files
+        versions = IndexVersions.load(chain.persist_dir)
+        assert versions.active == first_version
+        assert versions.previous is not None
+
+    def test_sync_index_refreshes_served_chain(self, chain, sample_text_files, temp_data_dir):
+        """Test that a new upload becomes searchable without a rebuild."""
+        stored = {}
+        vectorstore = MagicMock()
+        vectorstore.add_documents.side_effect = lambda batch, ids: stored.update(zip(ids, batch))
+        vectorstore.delete.side_effect = lambda ids: [stored.pop(i, None) for i in ids]
+        vectorstore.get.side_effect = lambda include: {
+            'documents': [doc.page_content for doc in stored.values()],
+            'metadatas': [doc.metadata for doc in stored.values()],
+        }
+
+        with patch('src.dashboard.llm.Chroma', return_value=vectorstore):
+            with patch.object(chain, 'get_conversation_chain', side_effect=lambda vs: object()):
+                assert chain.sync_index() is True  # Empty index: full build
+                version = chain.index_version
+                serving = chain.conversation_chain
+                assert chain.sync_index() is False
+
+                (temp_data_dir / "lecture2.txt").write_text("Lecture 2: Backpropagation.")
+                with patch.object(chain, '_stored_documents') as stored_documents:
+                    assert chain.sync_index() is True
+
+        # Exact dedup seeds from ids alone, and the rebuilt index is served from disk
+        stored_documents.assert_not_called()
+        assert chain.documents == []
+        assert chain.index_version == version
+        assert chain.conversation_chain is not serving
+        assert "lecture2.txt" in chain.manifest.files
+        best, _ = chain.bm25_index.search("backpropagation", 1)[0]
+        assert "Backpropagation" in chain.bm25_index.get_document(best).page_content
+
+    def test_copies_are_embedded_once(self, chain, sample_text_files, temp_data_dir):
+        """Test that a duplicated file shares chunks and survives the copy's removal."""
+        (temp_data_dir / "copies").mkdir()
+        (temp_data_dir / "copies" / "syllabus.txt").write_text(
+            (temp_data_dir / "syllabus.txt").read_text()
+        )
+        vectorstore = MagicMock()
+
+        with patch('src.dashboard.llm.Chroma', return_value=vectorstore):
+            chain.build_index()
+
+        inserted = [
+            chunk_id
+            for call in vectorstore.add_documents.call_args_list
+            for chunk_id in call.kwargs['ids']
+        ]
+        files = chain.manifest.files
+        assert len(inserted) == len(set(inserted))
+        assert files["copies/syllabus.txt"].chunk_ids == files["syllabus.txt"].chunk_ids
+        assert len(chain.bm25_index) == len(inserted)
+
+        (temp_data_dir / "copies" / "syllabus.txt").unlink()
+        vectorstore.reset_mock()
+        assert chain._sync_index(vectorstore) is True
+        vectorstore.delete.assert_not_called()
+
+        (temp_data_dir / "syllabus.txt").unlink()
+        assert chain._sync_index(vectorstore) is True
+        vectorstore.delete.assert_called_once_with(ids=files["syllabus.txt"].chunk_ids)
+
+    def test_copies_with_other_tags_are_kept(self, chain, sample_text_files, temp_data_dir):
+        """Test that a copy filed under another lecture is stored and filterable."""
+        for lecture in ("lecture1", "lecture2"):
+            (temp_data_dir / lecture).mkdir()
+            (temp_data_dir / lecture / "policies.md").write_text("Late work loses 10% per day.")
+        vectorstore = MagicMock()
+
+        with patch('src.dashboard.llm.Chroma', return_value=vectorstore):
+            chain.build_index()
+
+        files = chain.manifest.files
+        assert files["lecture1/policies.md"].chunk_ids != files["lecture2/policies.md"].chunk_ids
+        assert {"lecture1", "lecture2"} <= set(chain.filter_values()["lecture"])
+
+    def test_course_folders_are_indexed_once(self, chain, make_chain, sample_text_files, temp_data_dir):
+        """Test that the default index leaves courses/ to the course's own pipeline."""
+        (temp_data_dir / "courses" / "cs101").mkdir(parents=True)
+        (temp_data_dir / "courses" / "cs101" / "L01-intro.md").write_text("Lecture 1: welcome.")
+        cs101 = make_chain(data_dir=str(temp_data_dir), course="cs101")
+
+        assert set(chain._scan_files()) == {"syllabus.txt", "lecture1.txt"}
+        assert set(cs101._scan_files()) == {"L01-intro.md"}
+
+    def test_filters_reach_keyword_and_semantic_search(self, chain, sample_text_files, temp_data_dir):
+        """Test that chunks are tagged from their path and filters reach both retrievers."""
+        from src.dashboard.bm25 import BM25Index, BM25IndexRetriever
+
+        (temp_data_dir / "homework").mkdir()
+        (temp_data_dir / "homework" / "Homework 3.md").write_text(
+            "Homework 3: implement gradient descent for linear regression."
+        )
+        vectorstore = MagicMock()
+        vectorstore.as_retriever.return_value = BM25IndexRetriever(index=BM25Index.build([]))
+
+        with patch('src.dashboard.llm.Chroma', return_value=vectorstore):
+            chain.build_index()
+
+        # Folders of the default index are not courses
+        assert "course" not in chain.filter_values()
+        assert "hw3" in chain.filter_values()["lecture"]
+
+        keyword, _ = chain._create_hybrid_retriever(vectorstore, filters={"lecture": "HW 3"}).retrievers
+        docs = keyword.invoke("homework gradient descent regression course")
+        assert docs and all(doc.metadata["source_file"] == "Homework 3.md" for doc in docs)
+        search_kwargs = vectorstore.as_retriever.call_args.kwargs["search_kwargs"]
+        assert search_kwargs["filter"] == {"lecture": "hw3"}
+
+    def test_embedding_model_change_forces_rebuild(self, chain, sample_text_files):
+        """Test that a manifest from another embedding model is not reused."""
+        from src.dashboard.indexing import IndexManifest, IndexVersions
+
+        versions = IndexVersions(chain.persist_dir)
+        version = versions.begin_build()
+        versions.activate(version)
+
+        IndexManifest(chain.config.embedding_model, {}, chain.chunking).save(versions.path(version))
+        assert chain._should_rebuild_index() is False
+
+        IndexManifest("some-other-model", {}, chain.chunking).save(versions.path(version))
+        assert chain._should_rebuild_index() is True
+
+    def test_chunking_change_forces_rebuild(self, chain, sample_text_files):
+        """Test that an index chunked with other settings is rebuilt."""
+        from src.dashboard.indexing import IndexVersions
+        from src.dashboard.ingest import make_text_splitter
+
+        versions = IndexVersions(chain.persist_dir)
+        version = versions.begin_build()
+        versions.activate(version)
+
+        chain.manifest = chain._new_manifest()
+        chain.index_version = version
+        chain._save_manifest()
+        assert chain._should_rebuild_index() is False
+
+        chain.config.chunker = "characters"
+        chain.text_splitter = make_text_splitter(*chain._chunking_args())
+        assert chain._should_rebuild_index() is True
+
+    def test_failed_provider_switch_keeps_embeddings(self, chain, sample_text_files):
+        """Test that a failed rebuild leaves the served index with its own embeddings."""
+        self._build(chain)
+        serving = chain.embeddings
+        model = chain.config.embedding_model
+
+        with patch.object(chain, '_create_embeddings', return_value=MagicMock()):
+            with patch.object(chain, 'build_index', side_effect=Exception("quota exceeded")):
+                assert chain.switch_provider(embedding_model="nomic-embed-text") is False
+
+        assert chain.embeddings is serving
+        assert chain.config.embedding_model == model
+
+
+class TestBackgroundLoading:
+    """Tests for loading components in background threads."""
+
+    def test_returns_before_index_loads(self):
+        """Test that the chain is usable at once and reports what is still loading."""
+        import threading
+        from src.dashboard.llm import LlmChain, RAGConfig
+
+        release = threading.Event()
+        with patch('src.dashboard.llm.EmbeddingFactory'):
+            with patch.object(LlmChain, '_setup_chain', side_effect=lambda: release.wait(5)):
+                chain = LlmChain(config=RAGConfig(use_reranker=False, background_loading=True))
+
+                assert chain.loading_status() == {"index": "loading"}
+                assert chain.wait_until_ready(timeout=0.01) is False
+                release.set()
+                assert chain.wait_until_ready(timeout=5) is True
+
+        assert chain.loading_status() == {"index": "ready"}
+        assert {"tokenizer", "embeddings", "index"} <= set(chain.load_times)
+
+    def test_first_query_waits_for_index(self):
+        """Test that a question asked during loading is answered from the loaded index."""
+        import time
+        from src.dashboard.llm import LlmChain, RAGConfig
+
+        def slow_setup(chain):
+            time.sleep(0.2)
+            chain.conversation_chain = MagicMock()
+            chain.conversation_chain.invoke.return_value = {
+                "answer": "Loaded answer", "source_documents": []
+            }
+
+        with patch('src.dashboard.llm.EmbeddingFactory'):
+            with patch.object(LlmChain, '_setup_chain', autospec=True, side_effect=slow_setup):
+                chain = LlmChain(config=RAGConfig(
+                    use_reranker=False, use_answer_cache=False, background_loading=True
+                ))
+                answer = chain.get_response("What is covered?", memory=chain.new_memory())
+
+        assert answer == "Loaded answer"
+
+
+class TestSessionMemory:
+    """Tests for sharing one chain across sessions."""
+
+    def test_history_is_per_memory(self, make_chain):
+        """Test that each session's memory only sees its own turns."""
+        chain = make_chain()
+        chain.conversation_chain = MagicMock()
+        chain.conversation_chain.invoke.return_value = {
+            "answer": "An answer", "source_documents": []
+        }
+        alice, bob = chain.new_memory(), chain.new_memory()
+
+        chain.get_response("First question", memory=alice)
+        chain.get_response("Other question", memory=bob)
+
+        last_call = chain.conversation_chain.invoke.call_args.args[0]
+        assert last_call["question"] == "Other question"
+        assert last_call["chat_history"] == []
+        assert len(alice.load_memory_variables({})["chat_history"]) == 2
+        assert len(bob.load_memory_variables({})["chat_history"]) == 2
+
+    def test_conversation_chain_reranks_before_generation(self, make_chain, sample_documents):
+        """Test that the chain's retriever passes only final_k chunks on."""
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+        from src.dashboard.bm25 import BM25Index, BM25IndexRetriever
+        from src.dashboard.retrievers import RerankingRetriever
+
+        chain = make_chain()
+        chain.config.use_query_expansion = False
+        candidates = BM25IndexRetriever(index=BM25Index.build(sample_documents), k=5)
+
+        with patch('src.dashboard.llm.LLMFactory') as factory:
+            factory.create.return_value = FakeListChatModel(responses=["ok"])
+            with patch.object(chain, '_create_hybrid_retriever', return_value=candidates):
+                conversation_chain = chain.get_conversation_chain(MagicMock())
+
+        retriever = conversation_chain.retriever
+        assert isinstance(retriever, RerankingRetriever)
+        assert retriever.base_retriever is candidates
+        assert retriever.top_k == chain.config.final_k
+
+    def test_last_sources_are_thread_local(self, make_chain):
+        """Test that concurrent sessions do not see each other's sources."""
+        import threading
+        from src.dashboard.llm import RetrievalResult
+
+        chain = make_chain()
+        chain._last_sources = [RetrievalResult("c", "main.pdf", 1, 0.5, "id")]
+        seen = []
+
+        thread = threading.Thread(target=lambda: seen.append(chain.get_last_sources()))
+        thread.start()
+        thread.join()
+
+        assert seen == [[]]
+        assert chain.get_last_sources()[0].source == "main.pdf"
+
+
+class TestStreamingCallbackHandler:
+    """Tests for the blocking token channel."""
+
+    @staticmethod
+    def _produce(handler, tokens, delay=0.01):
+        """Emit tokens from a background thread, like a streaming LLM."""
+        import threading
+        import time
+
+        def run():
+            for token in tokens:
+                time.sleep(delay)
+                handler.on_llm_new_token(token)
+            handler.on_llm_end(None)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread
+
+    def test_get_tokens_yields_in_order(self):
+        """Test that consumers receive every token, then stop at the end."""
+        from src.dashboard.llm import StreamingCallbackHandler
+
+        handler = StreamingCallbackHandler()
+        thread = self._produce(handler, ["The ", "exam ", "is ", "Friday."])
+
+        assert "".join(handler.get_tokens(timeout=5)) == "The exam is Friday."
+        thread.join()
+
+    def test_waiting_does_not_spin(self):
+        """Test that blocking for tokens uses no measurable CPU."""
+        import time
+        from src.dashboard.llm import StreamingCallbackHandler
+
+        handler = StreamingCallbackHandler()
+        thread = self._produce(handler, ["slow"], delay=0.5)
+
+        start = time.process_time()
+        assert list(handler.get_tokens(timeout=5)) == ["slow"]
+        thread.join()
+
+        assert time.process_time() - start < 0.1
+
+    def test_timeout(self):
+        """Test that a stalled generation raises TimeoutError."""
+        from src.dashboard.llm import StreamingCallbackHandler
+
+        handler = StreamingCallbackHandler()
+
+        with pytest.raises(TimeoutError):
+            next(handler.get_tokens(timeout=0.05))
+
+    def test_cancel_releases_consumer_and_aborts_generation(self):
+        """Test that cancel stops consumers and the next token raises."""
+        import threading
+        from src.dashboard.llm import StreamingCallbackHandler, GenerationCancelled
+
+        handler = StreamingCallbackHandler()
+        received = []
+        consumer = threading.Thread(
+            target=lambda: received.extend(handler.get_tokens(timeout=5))
+        )
+        consumer.start()
+
+        handler.cancel()
+        consumer.join(timeout=1)
+
+        assert not consumer.is_alive()
+        assert received == []
+        with pytest.raises(GenerationCancelled):
+            handler.on_llm_new_token("late")
+
+    def test_llm_error_propagates(self):
+        """Test that a failed generation raises in the consumer."""
+        from src.dashboard.llm import StreamingCallbackHandler
+
+        handler = StreamingCallbackHandler()
+        handler.on_llm_new_token("partial")
+        handler.on_llm_error(RuntimeError("provider down"))
+
+        tokens = handler.get_tokens(timeout=1)
+        assert next(tokens) == "partial"
+        with pytest.raises(RuntimeError, match="provider down"):
+            next(tokens)
+
+    async def test_async_iteration(self):
+        """Test consuming tokens from an event loop."""
+        from src.dashboard.llm import StreamingCallbackHandler
+
+        handler = StreamingCallbackHandler()
+        thread = self._produce(handler, ["a", "b", "c"])
+
+        tokens = [token async for token in handler]
+        thread.join()
+
+        assert tokens == ["a", "b", "c"]
+
+    async def test_async_cancel(self):
+        """Test that cancel ends an async consumer waiting for tokens."""
+        import asyncio
+        from src.dashboard.llm import StreamingCallbackHandler
+
+        handler = StreamingCallbackHandler()
+
+        async def consume():
+            return [token async for token in handler.aget_tokens(timeout=5)]
+
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.05)
+        handler.cancel()
+
+        assert await asyncio.wait_for(task, 1) == []
+
+
+class TestStreamingResponse:
+    """Tests for token streaming through LlmChain."""
+
+    @pytest.fixture
+    def streaming_chain(self, make_chain, sample_documents):
+        """LlmChain over a fake streaming LLM and an in-memory BM25 retriever."""
+        from langchain.chains import ConversationalRetrievalChain
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+        from src.dashboard.bm25 import BM25Index, BM25IndexRetriever
+
+        def make(responses):
+            chain = make_chain(final_k=2)
+            chain.conversation_chain = ConversationalRetrievalChain.from_llm(
+                llm=FakeListChatModel(responses=responses),
+                retriever=BM25IndexRetriever(index=BM25Index.build(sample_documents), k=3),
+                return_source_documents=True,
+            )
+            return chain
+
+        return make
+
+    def test_yields_tokens_then_sources(self, streaming_chain):
+        """Test that tokens stream before the reranked sources."""
+        from src.dashboard.llm import RetrievalResult
+
+        chain = streaming_chain(["The final is 40%."])
+        memory = chain.new_memory()
+
+        items = list(chain.stream_response("final exam grade", memory=memory))
+
+        *tokens, sources = items
+        assert all(isinstance(token, str) for token in tokens)
+        assert len(tokens) > 1
+        assert "".join(tokens) == "The final is 40%."
+        assert all(isinstance(src, RetrievalResult) for src in sources)
+        assert 0 < len(sources) <= 2
+        assert sources[0].content.startswith("The final exam")
+        assert chain.get_last_sources() == sources
+        history = memory.load_memory_variables({})["chat_history"]
+        assert history[-1].content == "The final is 40%."
+
+    def test_condenses_follow_up_questions(self, streaming_chain):
+        """Test that a follow-up is rephrased against the history first."""
+        chain = streaming_chain(["When are office hours?", "Tuesdays, 2-4 PM."])
+        memory = chain.new_memory()
+        memory.save_context({"question": "Who teaches?"}, {"answer": "Dr. Smith"})
+
+        *tokens, sources = chain.stream_response("And when can I see them?", memory=memory)
+
+        assert "".join(tokens) == "Tuesdays, 2-4 PM."
+        assert sources[0].content.startswith("Office hours")
+
+    def test_closing_stream_cancels_generation(self, streaming_chain):
+        """Test that abandoning the stream does not record a partial answer."""
+        chain = streaming_chain(["A long answer " * 20])
+        memory = chain.new_memory()
+
+        stream = chain.stream_response("final exam", memory=memory)
+        assert isinstance(next(stream), str)
+        stream.close()
+
+        assert memory.load_memory_variables({})["chat_history"] == []
+
+    def test_without_materials(self, make_chain):
+        """Test the guidance message when no index exists."""
+        from src.dashboard.llm import NO_MATERIALS_MESSAGE
+
+        chain = make_chain()
+
+        assert list(chain.stream_response("anything")) == [NO_MATERIALS_MESSAGE, []]
+
+
+class TestAsyncResponse:
+    """Tests for the async LlmChain API."""
+
+    @pytest.fixture
+    def fake_llm_chain(self, make_chain):
+        """LlmChain over fake LLMs, with the production retrieval stages."""
+        from langchain.chains import ConversationalRetrievalChain
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+        def make(retriever, responses, expansions=None, **config):
+            chain = make_chain(**config)
+            if expansions is not None:
+                chain._expansion_llm = FakeListChatModel(responses=[expansions])
+            chain.conversation_chain = ConversationalRetrievalChain.from_llm(
+                llm=FakeListChatModel(responses=responses),
+                retriever=chain._build_retriever(retriever),
+                return_source_documents=True,
+            )
+            return chain
+
+        return make
+
+    async def test_astream_yields_tokens_then_sources(self, fake_llm_chain, sample_documents):
+        """Test that async streaming matches the sync protocol."""
+        from src.dashboard.bm25 import BM25Index, BM25IndexRetriever
+
+        retriever = BM25IndexRetriever(index=BM25Index.build(sample_documents), k=3)
+        chain = fake_llm_chain(retriever, ["Tuesdays."], use_query_expansion=False)
+        memory = chain.new_memory()
+
+        items = [item async for item in chain.astream_response("office hours", memory=memory)]
+
+        *tokens, sources = items
+        assert "".join(tokens) == "Tuesdays."
+        assert sources[0].content.startswith("Office hours")
+        assert len(memory.load_memory_variables({})["chat_history"]) == 2
+
+    async def test_expanded_queries_retrieved_concurrently(self, fake_llm_chain, sample_documents):
+        """Test that expansion fan-out overlaps slow retrievals."""
+        import time
+        from langchain_core.retrievers import BaseRetriever
+
+        queries = []
+
+        class SlowRetriever(BaseRetriever):
+            def _get_relevant_documents(self, query, *, run_manager):
+                queries.append(query)
+                time.sleep(0.3)
+                return sample_documents[:2]
+
+        chain = fake_llm_chain(
+            SlowRetriever(),
+            ["An answer."],
+            expansions="alt one\nalt two\nalt three",
+            use_query_expansion=True,
+        )
+
+        start = time.perf_counter()
+        response = await chain.aget_structured_response("exam weight")
+        elapsed = time.perf_counter() - start
+
+        assert response.answer == "An answer."
+        assert sorted(queries) == ["alt one", "alt three", "alt two", "exam weight"]
+        assert elapsed < 0.9  # Four sequential retrievals would take 1.2s
+        assert len(response.sources) == 2
+
+    async def test_aget_response_without_materials(self, make_chain):
+        """Test the guidance message when no index exists."""
+        from src.dashboard.llm import NO_MATERIALS_MESSAGE
+
+        chain = make_chain()
+
+        assert await chain.aget_response("anything") == NO_MATERIALS_MESSAGE
+
+
+
+class TestQueryExpansion:
+    """Tests for multi-query retrieval with cached expansions."""
+
+    @pytest.fixture
+    def expanding_chain(self, make_chain):
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+        def make(**config):
+            chain = make_chain(**config)
+            chain._expansion_llm = MagicMock(wraps=FakeListChatModel(
+                responses=["When is the final?\nFinal exam date\nExam schedule"]
+            ))
+            return chain
+
+        return make
+
+    def test_expansions_are_cached_per_normalized_question(self, expanding_chain):
+        """Test that a repeated question reuses its expansions."""
+        chain = expanding_chain()
+
+        first = chain._expand_query("When is the final exam?")
+        second = chain._expand_query("  when is the FINAL exam ")
+
+        assert first == ["When is the final exam?", "When is the final?",
+                         "Final exam date", "Exam schedule"]
+        assert second[1:] == first[1:]
+        assert second[0] == "  when is the FINAL exam "
+        assert chain._expansion_llm.invoke.call_count == 1
+        assert chain.get_provider_status()["expansion_cache"]["hits"] == 1
+
+    def test_expansion_client_is_reused(self, expanding_chain):
+        """Test that expansion does not construct an LLM per query."""
+        chain = expanding_chain()
+        chain._expansion_llm = None
+
+        with patch('src.dashboard.llm.LLMFactory') as factory:
+            factory.create.return_value.invoke.return_value.content = "a\nb"
+            chain._expand_query("first question")
+            chain._expand_query("second question")
+
+        assert factory.create.call_count == 1
+
+    def test_failed_expansion_falls_back_and_is_not_cached(self, expanding_chain):
+        """Test that an expansion error retrieves with the question alone."""
+        chain = expanding_chain()
+        chain._expansion_llm = MagicMock()
+        chain._expansion_llm.invoke.side_effect = Exception("rate limited")
+
+        assert chain._expand_query("office hours") == ["office hours"]
+        assert len(chain.expansion_cache) == 0
+
+    def test_retriever_fuses_expanded_queries(self, expanding_chain, sample_documents):
+        """Test that the pipeline retrieves every expansion and fuses them."""
+        from src.dashboard.bm25 import BM25Index, BM25IndexRetriever
+        from src.dashboard.retrievers import MultiQueryFusionRetriever
+
+        chain = expanding_chain(final_k=3)
+        candidates = BM25IndexRetriever(index=BM25Index.build(sample_documents), k=2)
+
+        retriever = chain._build_retriever(candidates)
+        docs = retriever.invoke("grading")
+
+        assert isinstance(retriever.base_retriever, MultiQueryFusionRetriever)
+        assert docs[0].page_content.startswith("The final exam")
+        assert len(docs) <= 3
+
+    def test_expansion_disabled_skips_stage(self, expanding_chain, sample_documents):
+        """Test that without expansion only reranking wraps the candidates."""
+        from src.dashboard.bm25 import BM25Index, BM25IndexRetriever
+
+        chain = expanding_chain(use_query_expansion=False)
+        candidates = BM25IndexRetriever(index=BM25Index.build(sample_documents), k=2)
+
+        assert chain._build_retriever(candidates).base_retriever is candidates
+
+
+
+class TestAnswerCache:
+    """Tests for serving repeated questions from the answer cache."""
+
+    @pytest.fixture
+    def chain(self, make_chain):
+        from src.dashboard.indexing import IndexManifest, FileRecord
+
+        chain = make_chain()
+        # Questions about lateness embed close together, others elsewhere
+        chain.embeddings = MagicMock()
+        chain.embeddings.embed_query.side_effect = lambda q: (
+            [1.0, 0.05 * len(q) / 40] if "late" in q.lower() else [0.0, 1.0]
+        )
+        chain.manifest = IndexManifest(
+            "text-embedding-3-large", {"syllabus.txt": FileRecord("syllabus.txt", "h1", 1, 0.0)}
+        )
+        chain.conversation_chain = MagicMock()
+        chain.conversation_chain.invoke.return_value = {
+            "answer": "10% per day.",
+            "source_documents": [Document(
+                page_content="Late Policy: 10% penalty per day",
+                metadata={"source_file": "syllabus.txt", "relevance_score": 0.9}
+            )],
+        }
+        return chain
+
+    def test_repeated_question_skips_generation(self, chain):
+        """Test that a similar standalone question is answered from cache."""
+        first = chain.get_response("What is the late policy?", memory=chain.new_memory())
+        second = chain.get_response("what's the late policy", memory=chain.new_memory())
+
+        assert first == second == "10% per day."
+        assert chain.conversation_chain.invoke.call_count == 1
+        assert chain.get_last_sources()[0].source == "syllabus.txt"
+        assert chain.get_provider_status()["answer_cache"]["hit_rate"] == 0.5
+
+    def test_follow_up_questions_bypass_cache(self, chain):
+        """Test that questions asked with history are always generated."""
+        memory = chain.new_memory()
+
+        chain.get_response("What is the late policy?", memory=memory)
+        chain.get_response("What is the late policy?", memory=memory)
+
+        assert chain.conversation_chain.invoke.call_count == 2
+
+    def test_index_change_invalidates(self, chain):
+        """Test that a new content hash drops cached answers."""
+        from src.dashboard.indexing import IndexManifest, FileRecord
+
+        chain.get_response("What is the late policy?", memory=chain.new_memory())
+
+        chain.manifest = IndexManifest(
+            "text-embedding-3-large", {"syllabus.txt": FileRecord("syllabus.txt", "h2", 1, 0.0)}
+        )
+        chain.get_response("What is the late policy?", memory=chain.new_memory())
+
+        assert chain.conversation_chain.invoke.call_count == 2
+
+    def test_filtered_questions_are_cached_separately(self, chain):
+        """Test that answers retrieved under other filters are not reused."""
+        with patch.object(chain, '_chain_for', return_value=chain.conversation_chain) as chain_for:
+            chain.get_response("What is the late policy?", memory=chain.new_memory())
+            for lecture in ("hw3", "HW 3"):
+                chain.get_response(
+                    "What is the late policy?", memory=chain.new_memory(), filters={"lecture": lecture}
+                )
+            # The filtered lookups left the unfiltered answer in place
+            chain.get_response("What is the late policy?", memory=chain.new_memory())
+
+        assert chain.conversation_chain.invoke.call_count == 2
+        chain_for.assert_any_call({"lecture": "hw3"})
+
+    def test_errors_are_not_cached(self, chain):
+        """Test that a failed generation is retried next time."""
+        chain.conversation_chain.invoke.side_effect = [Exception("timeout"), {
+            "answer": "10% per day.", "source_documents": []
+        }]
+
+        chain.get_response("What is the late policy?", memory=chain.new_memory())
+        answer = chain.get_response("What is the late policy?", memory=chain.new_memory())
+
+        assert answer == "10% per day."
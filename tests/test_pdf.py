@@ -0,0 +1,60 @@
+"""
+Tests for cached, page-level PDF extraction.
+"""
+
+from unittest.mock import patch
+
+from src.dashboard.pdf import CachedPdfLoader, PageCache, extract_pages
+
+
+class TestExtractPages:
+    """Tests for page extraction."""
+
+    def test_one_text_per_page(self, sample_pdf):
+        """Test that each page is extracted separately, in order."""
+        pages = extract_pages(str(sample_pdf))
+
+        assert len(pages.texts) == 3
+        assert "Gradient descent" in pages.texts[0]
+        assert "Backpropagation" in pages.texts[1]
+        assert pages.labels == ["1", "2", "3"]
+
+    def test_large_files_split_across_workers(self, pdf_writer, temp_data_dir):
+        """Test that parallel page ranges reassemble in page order."""
+        path = pdf_writer(temp_data_dir / "deck.pdf", [f"Slide {i}" for i in range(8)])
+
+        with patch('src.dashboard.pdf.MIN_PARALLEL_PAGES', 4):
+            pages = extract_pages(str(path), max_workers=2)
+
+        assert pages.texts == [f"Slide {i}" for i in range(8)]
+
+
+class TestCachedPdfLoader:
+    """Tests for the page cache."""
+
+    def test_pages_carry_numbers(self, sample_pdf, temp_data_dir):
+        """Test that documents keep page numbers for citations."""
+        docs = CachedPdfLoader(str(sample_pdf), temp_data_dir / ".pdf_cache").load()
+
+        assert [doc.metadata['page'] for doc in docs] == [0, 1, 2]
+        assert all(doc.metadata['total_pages'] == 3 for doc in docs)
+
+    def test_second_load_reads_cache(self, sample_pdf, temp_data_dir):
+        """Test that a PDF is parsed once, even after being renamed."""
+        cache_dir = temp_data_dir / ".pdf_cache"
+        first = CachedPdfLoader(str(sample_pdf), cache_dir).load()
+        renamed = sample_pdf.rename(temp_data_dir / "week1.pdf")
+
+        with patch('src.dashboard.pdf.extract_pages') as extract:
+            second = CachedPdfLoader(str(renamed), cache_dir).load()
+
+        extract.assert_not_called()
+        assert [d.page_content for d in second] == [d.page_content for d in first]
+
+    def test_stale_extractor_is_reparsed(self, sample_pdf, temp_data_dir):
+        """Test that text cached by another pypdf version is not trusted."""
+        cache = PageCache(temp_data_dir / ".pdf_cache")
+        CachedPdfLoader(str(sample_pdf), cache.cache_dir).load()
+
+        with patch('src.dashboard.pdf._extractor_version', return_value="pypdf-0"):
+            assert cache.get(next(cache.cache_dir.glob("*.json")).stem) is None
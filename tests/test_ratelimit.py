@@ -0,0 +1,159 @@
+"""
+Tests for embedding rate limiting.
+"""
+
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.dashboard.ratelimit import (
+    RateLimiter,
+    RateLimitedEmbeddings,
+    call_with_retry,
+    is_rate_limit_error,
+)
+
+
+class _FakeClock:
+    """Manual clock whose sleep advances time."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class _RateLimitError(Exception):
+    status_code = 429
+
+
+class TestRateLimiter:
+    """Tests for the requests/tokens per minute budget."""
+
+    def test_requests_budget(self):
+        """Test that calls past the per-minute budget wait for a refill."""
+        clock = _FakeClock()
+        limiter = RateLimiter(requests_per_minute=60, clock=clock, sleep=clock.sleep)
+
+        for _ in range(60):
+            limiter.acquire()
+        assert clock.slept == []
+
+        limiter.acquire()
+        assert clock.slept == [pytest.approx(1.0)]
+
+    def test_tokens_budget(self):
+        """Test that a large batch waits until enough tokens accrue."""
+        clock = _FakeClock()
+        limiter = RateLimiter(tokens_per_minute=6000, clock=clock, sleep=clock.sleep)
+
+        limiter.acquire(tokens=6000)
+        limiter.acquire(tokens=3000)
+
+        assert sum(clock.slept) == pytest.approx(30.0)
+
+    def test_unlimited_never_waits(self):
+        """Test that local models are not paced."""
+        clock = _FakeClock()
+        limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+
+        for _ in range(10_000):
+            limiter.acquire(tokens=10_000)
+
+        assert clock.slept == []
+
+    async def test_async_acquire_shares_the_budget(self):
+        """Test that async callers draw on the same buckets without blocking."""
+        limiter = RateLimiter(requests_per_minute=6000)
+
+        limiter.acquire()
+        start = time.monotonic()
+        await limiter.aacquire()
+        await limiter.aacquire()
+
+        assert limiter._requests == pytest.approx(5997, abs=1)
+        assert time.monotonic() - start < 0.5
+
+
+class TestRetry:
+    """Tests for retrying rate-limited calls."""
+
+    def test_retries_rate_limit_errors(self):
+        """Test that 429s are retried with growing delays."""
+        calls = MagicMock(side_effect=[_RateLimitError(), _RateLimitError(), "ok"])
+        delays = []
+
+        assert call_with_retry(calls, sleep=delays.append) == "ok"
+        assert len(delays) == 2
+        assert delays[1] > delays[0] / 2
+
+    def test_other_errors_raise_immediately(self):
+        """Test that non-rate-limit errors are not retried."""
+        calls = MagicMock(side_effect=ValueError("bad input"))
+
+        with pytest.raises(ValueError):
+            call_with_retry(calls, sleep=lambda s: None)
+        assert calls.call_count == 1
+
+    def test_gives_up_after_max_retries(self):
+        """Test that a persistent 429 is eventually raised."""
+        calls = MagicMock(side_effect=_RateLimitError())
+
+        with pytest.raises(_RateLimitError):
+            call_with_retry(calls, max_retries=2, sleep=lambda s: None)
+        assert calls.call_count == 3
+
+    def test_detects_rate_limit_messages(self):
+        """Test detection of providers that only report 429 in the message."""
+        assert is_rate_limit_error(Exception("Error code: 429 - Too Many Requests"))
+        assert not is_rate_limit_error(Exception("invalid api key"))
+
+
+class TestRateLimitedEmbeddings:
+    """Tests for the embeddings wrapper."""
+
+    def test_budgets_by_estimated_tokens(self):
+        """Test that each provider call acquires its estimated token count."""
+        underlying = MagicMock()
+        underlying.embed_documents.return_value = [[0.1], [0.2]]
+        limiter = MagicMock()
+
+        embeddings = RateLimitedEmbeddings(underlying, limiter)
+        result = embeddings.embed_documents(["a" * 40, "b" * 40])
+
+        assert result == [[0.1], [0.2]]
+        limiter.acquire.assert_called_once_with(22)
+
+    def test_queries_skip_the_budget(self):
+        """Test that live queries never wait behind ingest batches."""
+        underlying = MagicMock()
+        underlying.embed_query.return_value = [0.3]
+        limiter = MagicMock()
+
+        embeddings = RateLimitedEmbeddings(underlying, limiter)
+
+        assert embeddings.embed_query("late policy") == [0.3]
+        limiter.acquire.assert_not_called()
+
+    async def test_async_calls_stay_native(self):
+        """Test that async batches await the limiter and the provider's async client."""
+        underlying = MagicMock()
+        underlying.aembed_documents = AsyncMock(return_value=[[0.1]])
+        underlying.aembed_query = AsyncMock(return_value=[0.2])
+        limiter = MagicMock()
+        limiter.aacquire = AsyncMock()
+
+        embeddings = RateLimitedEmbeddings(underlying, limiter)
+
+        assert await embeddings.aembed_documents(["a" * 40]) == [[0.1]]
+        assert await embeddings.aembed_query("q") == [0.2]
+        limiter.aacquire.assert_awaited_once_with(11)
+        underlying.embed_documents.assert_not_called()
+        underlying.embed_query.assert_not_called()
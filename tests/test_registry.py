@@ -0,0 +1,193 @@
+"""
+Tests for the process-wide pipeline registry.
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.dashboard.llm import RAGConfig
+from src.dashboard.registry import PipelineRegistry, config_key
+from src.dashboard.indexing import course_dir, list_courses
+
+
+def _counting_factory():
+    """Factory returning a new mock per call and recording the configs."""
+    built = []
+
+    def factory(config):
+        time.sleep(0.01)  # Widen the window for racing builds
+        built.append(config)
+        pipeline = MagicMock()
+        pipeline.config = config
+        return pipeline
+
+    return factory, built
+
+
+def _join_evictors():
+    for thread in threading.enumerate():
+        if thread.name == "pipeline-evictor":
+            thread.join(5)
+
+
+class TestConfigKey:
+    """Tests for configuration keys."""
+
+    def test_equal_configs_share_key(self):
+        """Test that equal configurations produce the same key."""
+        assert config_key(RAGConfig(final_k=3)) == config_key(RAGConfig(final_k=3))
+
+    def test_nested_provider_config_in_key(self):
+        """Test that provider settings are part of the key."""
+        a = RAGConfig()
+        b = RAGConfig()
+        b.llm_model = "gpt-4o-mini"
+
+        assert config_key(a) != config_key(b)
+
+
+class TestPipelineRegistry:
+    """Tests for shared pipeline lookup."""
+
+    def test_same_config_returns_same_pipeline(self):
+        """Test that sessions with equal configs share one pipeline."""
+        factory, built = _counting_factory()
+        registry = PipelineRegistry(factory)
+
+        first = registry.get(RAGConfig())
+        second = registry.get(RAGConfig())
+
+        assert first is second
+        assert len(built) == 1
+
+    def test_different_configs_get_different_pipelines(self):
+        """Test that pipelines are keyed by configuration."""
+        factory, _ = _counting_factory()
+        registry = PipelineRegistry(factory)
+
+        assert registry.get(RAGConfig(final_k=3)) is not registry.get(RAGConfig(final_k=5))
+        assert len(registry) == 2
+
+    def test_concurrent_first_requests_build_once(self):
+        """Test that racing sessions do not build duplicate pipelines."""
+        factory, built = _counting_factory()
+        registry = PipelineRegistry(factory)
+        results = []
+
+        threads = [
+            threading.Thread(target=lambda: results.append(registry.get()))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(built) == 1
+        assert all(result is results[0] for result in results)
+
+    def test_caller_mutation_does_not_leak(self):
+        """Test that the pipeline owns a private copy of the config."""
+        factory, built = _counting_factory()
+        registry = PipelineRegistry(factory)
+        config = RAGConfig()
+
+        registry.get(config)
+        config.final_k = 99
+
+        assert built[0].final_k == 5
+
+    def test_reconfigure_replaces_default(self):
+        """Test that reconfigure switches the default and drops old pipelines."""
+        factory, _ = _counting_factory()
+        registry = PipelineRegistry(factory)
+        old = registry.get()
+
+        new = registry.reconfigure(RAGConfig(final_k=8))
+
+        assert registry.get() is new
+        assert new is not old
+        assert len(registry) == 1
+        old.close.assert_called_once()
+        new.close.assert_not_called()
+
+
+class TestCourses:
+    """Tests for serving several courses from one registry."""
+
+    def test_each_course_gets_its_own_pipeline(self):
+        """Test that courses are keyed separately and share the default settings."""
+        factory, built = _counting_factory()
+        registry = PipelineRegistry(factory)
+        registry.default_config.final_k = 7
+
+        ml = registry.get_course("cs229")
+
+        assert registry.get_course("cs229") is ml
+        assert registry.get_course("cs231n") is not ml
+        assert [(c.course, c.final_k) for c in built] == [("cs229", 7), ("cs231n", 7)]
+
+    def test_least_recently_used_is_evicted(self):
+        """Test that the pipeline unused the longest is closed past max_pipelines."""
+        factory, built = _counting_factory()
+        registry = PipelineRegistry(factory, max_pipelines=2)
+
+        a = registry.get_course("a")
+        b = registry.get_course("b")
+        registry.get_course("a")
+        registry.get_course("c")
+
+        assert len(registry) == 2
+        b.close.assert_called_once()
+        a.close.assert_not_called()
+        # Evicted courses are loaded again on their next query
+        assert registry.get_course("b") is not b
+        assert len(built) == 4
+
+    def test_evicts_under_memory_pressure(self):
+        """Test that memory is measured once the new pipeline is ready, evicting only the oldest."""
+        factory, _ = _counting_factory()
+        registry = PipelineRegistry(factory, max_memory_mb=100)
+        with patch("src.dashboard.registry.resident_memory_mb", return_value=50):
+            oldest, older = [registry.get_course(name) for name in ("a", "b")]
+            _join_evictors()
+        ready = threading.Event()
+
+        def wait_until_ready():
+            ready.wait(5)
+            return True
+
+        def build(config):
+            pipeline = factory(config)
+            pipeline.wait_until_ready.side_effect = wait_until_ready
+            return pipeline
+
+        registry._factory = build
+        with patch("src.dashboard.registry.resident_memory_mb", return_value=500):
+            newest = registry.get_course("c")
+            assert len(registry) == 3  # Still loading: nothing measured yet
+            ready.set()
+            _join_evictors()
+
+        assert len(registry) == 2
+        oldest.close.assert_called_once()
+        older.close.assert_not_called()
+        newest.close.assert_not_called()
+
+    def test_course_directories(self, tmp_path):
+        """Test that courses are the visible folders of courses/ and names cannot escape."""
+        assert list_courses(tmp_path) == []
+        for name in ("cs229", "cs231n", ".chroma_db"):
+            (tmp_path / "courses" / name).mkdir(parents=True)
+        (tmp_path / "lectures").mkdir()
+        (tmp_path / "syllabus.md").write_text("x")
+
+        assert list_courses(tmp_path) == ["cs229", "cs231n"]
+        assert course_dir(tmp_path, "cs229") == tmp_path / "courses" / "cs229"
+        assert course_dir(tmp_path) == tmp_path
+        for bad in ("", "..", ".chroma_db", "a/b"):
+            with pytest.raises(ValueError):
+                course_dir(tmp_path, bad)
@@ -0,0 +1,161 @@
+"""
+Tests for the reranking service and its ONNX backend.
+"""
+
+import sys
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+from langchain.schema import Document
+
+from src.dashboard.reranking import OnnxCrossEncoder, RerankingService
+from src.dashboard.retrievers import rerank_documents
+
+
+class RecordingModel:
+    """Cross-encoder stand-in scoring a pair by its text length."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+
+    def predict(self, pairs, batch_size=32):
+        time.sleep(self.delay)
+        self.calls.append(list(pairs))
+        return [float(len(text)) for _, text in pairs]
+
+
+def _docs(*texts):
+    return [Document(page_content=text, metadata={"chunk_id": text}) for text in texts]
+
+
+class TestRerankingService:
+    """Tests for scoring through the service."""
+
+    def test_concurrent_requests_share_batches(self):
+        """Test that pairs of concurrent requests are scored in one forward pass."""
+        model = RecordingModel()
+        service = RerankingService(model, max_batch_size=64, max_wait_ms=200)
+        results = {}
+
+        def ask(i):
+            results[i] = service.predict([[f"q{i}", "x" * i], [f"q{i}", "y"]])
+
+        threads = [threading.Thread(target=ask, args=(i,)) for i in range(1, 7)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == {i: [float(i), 1.0] for i in range(1, 7)}
+        assert len(model.calls) < 6
+        assert sum(len(call) for call in model.calls) == 12
+
+    def test_full_batch_does_not_wait(self):
+        """Test that a request filling a batch is scored without waiting out the window."""
+        service = RerankingService(RecordingModel(), max_batch_size=2, max_wait_ms=5000)
+
+        start = time.monotonic()
+        assert service.predict([["q", "ab"], ["q", "c"]]) == [2.0, 1.0]
+        assert time.monotonic() - start < 1
+
+    def test_scores_are_cached_per_query_and_chunk(self):
+        """Test that only chunks not yet scored for a query reach the model."""
+        model = RecordingModel()
+        service = RerankingService(model, max_wait_ms=0)
+
+        assert service.score("q", _docs("aaa", "b")) == [3.0, 1.0]
+        assert service.score("q", _docs("b", "cc")) == [1.0, 2.0]
+        service.score("other", _docs("b"))
+
+        assert model.calls == [[["q", "aaa"], ["q", "b"]], [["q", "cc"]], [["other", "b"]]]
+        assert service.stats()["hits"] == 1
+
+    def test_model_errors_reach_the_caller(self):
+        """Test that a failed batch raises in every waiting request."""
+        model = RecordingModel()
+        model.predict = lambda pairs, batch_size: 1 / 0
+        service = RerankingService(model, max_wait_ms=0)
+
+        with pytest.raises(ZeroDivisionError):
+            service.predict([["q", "a"]])
+
+    def test_configure_retunes_the_service(self):
+        """Test that new settings apply to the existing service."""
+        service = RerankingService(RecordingModel(), max_wait_ms=5000)
+
+        service.configure(max_batch_size=8, max_wait_ms=0, cache_size=10, num_threads=1)
+
+        start = time.monotonic()
+        assert service.predict([["q", "a"]]) == [1.0]
+        assert time.monotonic() - start < 1
+        assert service.scores.max_entries == 10
+        assert service.stats()["threads"] == 1
+
+    def test_rerank_documents_uses_service(self):
+        """Test that reranking through the service keeps the best chunks."""
+        service = RerankingService(RecordingModel(), max_wait_ms=0)
+
+        reranked = rerank_documents(service, "q", _docs("a", "ccc", "bb"), top_k=2)
+
+        assert [doc.page_content for doc in reranked] == ["ccc", "bb"]
+        assert reranked[0].metadata["relevance_score"] == 3.0
+
+
+class TestOnnxCrossEncoder:
+    """Tests for the ONNX Runtime backend."""
+
+    def _encoder(self):
+        encoder = OnnxCrossEncoder.__new__(OnnxCrossEncoder)
+        encoder.input_names = {"input_ids", "attention_mask"}
+        encoder.tokenizer = lambda queries, texts, **kwargs: {
+            "input_ids": np.ones((len(texts), 3), dtype=np.int32),
+            "attention_mask": np.ones((len(texts), 3), dtype=np.int32),
+            "token_type_ids": np.zeros((len(texts), 3), dtype=np.int32),
+        }
+        encoder.session = MagicMock()
+        encoder.session.run.side_effect = lambda _, feeds: [
+            np.zeros((len(feeds["input_ids"]), 1), dtype=np.float32)
+        ]
+        return encoder
+
+    def test_predict_batches_and_applies_sigmoid(self):
+        """Test that pairs are scored in batches like CrossEncoder, as probabilities."""
+        encoder = self._encoder()
+
+        scores = encoder.predict([["q", "a"], ["q", "b"], ["q", "c"]], batch_size=2)
+
+        assert scores.tolist() == [0.5, 0.5, 0.5]
+        assert encoder.session.run.call_count == 2
+        feeds = encoder.session.run.call_args[0][1]
+        # Only inputs the exported graph declares are fed, as int64
+        assert set(feeds) == {"input_ids", "attention_mask"}
+        assert feeds["input_ids"].dtype == np.int64
+
+    def test_unknown_backend_is_rejected(self):
+        """Test that a misspelled backend fails instead of silently using PyTorch."""
+        from src.dashboard.llm import _load_cross_encoder
+
+        with pytest.raises(ValueError):
+            _load_cross_encoder.__wrapped__("model", "tensorrt")
+
+    def test_failed_export_falls_back_to_the_shared_torch_model(self):
+        """Test that an ONNX export error falls back to the torch instance, loaded once."""
+        from src.dashboard.llm import _load_cross_encoder
+
+        torch_module = MagicMock()
+        _load_cross_encoder.cache_clear()
+        try:
+            with patch.dict(sys.modules, {"sentence_transformers": torch_module}):
+                with patch.object(OnnxCrossEncoder, "from_pretrained",
+                                  side_effect=RuntimeError("export failed")):
+                    onnx = _load_cross_encoder("model", "onnx")
+                torch = _load_cross_encoder("model", "torch")
+        finally:
+            _load_cross_encoder.cache_clear()
+
+        assert onnx is torch is torch_module.CrossEncoder.return_value
+        torch_module.CrossEncoder.assert_called_once_with("model")
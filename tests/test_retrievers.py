@@ -0,0 +1,236 @@
+"""
+Tests for shared retrieval building blocks.
+"""
+
+from unittest.mock import MagicMock, patch
+
+from langchain.schema import Document
+
+from src.dashboard.retrievers import (
+    AdaptiveDepth,
+    MultiQueryFusionRetriever,
+    RerankingRetriever,
+    RerankStats,
+    reciprocal_rank_fusion,
+    rerank_documents,
+)
+
+
+def _doc(chunk_id):
+    return Document(page_content=f"text {chunk_id}", metadata={"chunk_id": chunk_id})
+
+
+class TestReciprocalRankFusion:
+    """Tests for merging ranked result lists."""
+
+    def test_documents_found_by_several_lists_rank_first(self):
+        """Test that agreement between lists outweighs a single top hit."""
+        fused = reciprocal_rank_fusion([
+            [_doc("a"), _doc("b")],
+            [_doc("c"), _doc("b")],
+            [_doc("b")],
+        ])
+
+        assert [doc.metadata["chunk_id"] for doc in fused] == ["b", "a", "c"]
+
+    def test_deduplicates_by_chunk_id(self):
+        """Test that a chunk appears once, keeping its first instance."""
+        first = _doc("a")
+
+        fused = reciprocal_rank_fusion([[first], [_doc("a")]])
+
+        assert fused == [first]
+        assert fused[0] is first
+
+    def test_falls_back_to_content_without_chunk_id(self):
+        """Test deduplication of chunks lacking ids."""
+        fused = reciprocal_rank_fusion([
+            [Document(page_content="same")],
+            [Document(page_content="same"), Document(page_content="other")],
+        ])
+
+        assert [doc.page_content for doc in fused] == ["same", "other"]
+
+
+class TestRerankingRetriever:
+    """Tests for the rerank-before-generation stage."""
+
+    @staticmethod
+    def _base_retriever(documents):
+        from src.dashboard.bm25 import BM25Index, BM25IndexRetriever
+
+        return BM25IndexRetriever(index=BM25Index.build(documents), k=len(documents))
+
+    def test_keeps_top_k_by_reranker_score(self, sample_documents):
+        """Test that only the best-scored candidates reach the LLM."""
+        reranker = MagicMock()
+        reranker.predict.side_effect = lambda pairs: [
+            1.0 if "Office" in text else 0.1 * i for i, (_, text) in enumerate(pairs)
+        ]
+        retriever = RerankingRetriever(
+            base_retriever=self._base_retriever(sample_documents),
+            reranker=reranker,
+            top_k=2,
+        )
+
+        docs = retriever.invoke("the of a on")
+
+        assert len(docs) == 2
+        assert docs[0].page_content.startswith("Office hours")
+        assert docs[0].metadata["relevance_score"] == 1.0
+
+    def test_does_not_mutate_candidates(self, sample_documents):
+        """Test that scores are set on copies, not the indexed documents."""
+        reranker = MagicMock()
+        reranker.predict.side_effect = lambda pairs: [0.5] * len(pairs)
+
+        reranked = rerank_documents(reranker, "query", sample_documents, top_k=3)
+
+        assert all(doc.metadata["relevance_score"] == 0.5 for doc in reranked)
+        assert all("relevance_score" not in doc.metadata for doc in sample_documents)
+
+    def test_adaptive_depth_stops_when_top_is_clear(self):
+        """Test that a dominant first stage ends reranking early."""
+        documents = [Document(page_content=f"doc {i}") for i in range(20)]
+        reranker = MagicMock()
+        reranker.predict.side_effect = lambda pairs: [
+            0.9 if text in ("doc 0", "doc 1") else 0.2 for _, text in pairs
+        ]
+        stats = RerankStats()
+
+        reranked = rerank_documents(
+            reranker, "q", documents, top_k=2, depth=AdaptiveDepth(first_stage=4), stats=stats
+        )
+
+        assert [doc.page_content for doc in reranked] == ["doc 0", "doc 1"]
+        assert reranker.predict.call_count == 1
+        assert stats.summary()["mean_pairs_scored"] == 4
+        assert stats.summary()["early_exit_rate"] == 1.0
+
+    def test_adaptive_depth_goes_deeper_when_flat(self):
+        """Test that flat scores widen the stages until the top settles."""
+        documents = [Document(page_content=str(i)) for i in range(20)]
+        reranker = MagicMock()
+        # Later candidates keep beating earlier ones by small margins
+        reranker.predict.side_effect = lambda pairs: [int(text) / 100 for _, text in pairs]
+
+        reranked = rerank_documents(
+            reranker, "q", documents, top_k=2, depth=AdaptiveDepth(first_stage=4)
+        )
+
+        assert [doc.page_content for doc in reranked] == ["19", "18"]
+        assert [len(call.args[0]) for call in reranker.predict.call_args_list] == [4, 4, 8, 4]
+
+    def test_without_reranker_truncates(self, sample_documents):
+        """Test that retrieval order is kept when no reranker loaded."""
+        assert rerank_documents(None, "query", sample_documents, top_k=3) == sample_documents[:3]
+
+    async def test_async_matches_sync(self, sample_documents):
+        """Test that the async path reranks identically."""
+        reranker = MagicMock()
+        reranker.predict.side_effect = lambda pairs: list(range(len(pairs)))
+        retriever = RerankingRetriever(
+            base_retriever=self._base_retriever(sample_documents),
+            reranker=reranker,
+            top_k=3,
+        )
+
+        assert await retriever.ainvoke("exam hours") == retriever.invoke("exam hours")
+
+
+class TestMultiQueryFusionRetriever:
+    """Tests for concurrent multi-query retrieval."""
+
+    @staticmethod
+    def _slow_retriever(seen):
+        import time
+        from langchain_core.retrievers import BaseRetriever
+
+        class SlowRetriever(BaseRetriever):
+            def _get_relevant_documents(self, query, *, run_manager):
+                seen.append(query)
+                time.sleep(0.2)
+                return [_doc(query), _doc("shared")]
+
+        return SlowRetriever()
+
+    def test_queries_run_concurrently_and_fuse(self):
+        """Test that expansions overlap and shared hits rank first."""
+        import time
+
+        seen = []
+        retriever = MultiQueryFusionRetriever(
+            base_retriever=self._slow_retriever(seen),
+            expander=lambda q: [q, "alt 1", "alt 2", q],
+            max_results=3,
+        )
+
+        start = time.perf_counter()
+        docs = retriever.invoke("question")
+        elapsed = time.perf_counter() - start
+
+        assert sorted(seen) == ["alt 1", "alt 2", "question"]
+        assert elapsed < 0.5  # Three sequential retrievals take 0.6s
+        assert docs[0].metadata["chunk_id"] == "shared"
+        assert len(docs) == 3
+
+    async def test_async_uses_async_expander(self):
+        """Test the async path with an async expander."""
+        seen = []
+
+        async def expand(query):
+            return [query, "alt"]
+
+        retriever = MultiQueryFusionRetriever(
+            base_retriever=self._slow_retriever(seen),
+            expander=lambda q: [q],
+            aexpander=expand,
+        )
+
+        docs = await retriever.ainvoke("question")
+
+        assert sorted(seen) == ["alt", "question"]
+        assert {doc.metadata["chunk_id"] for doc in docs} == {"question", "alt", "shared"}
+
+    def test_bm25_branch_is_scored_in_one_batch(self, sample_documents):
+        """Test that fused queries share one BM25 search and match per-query ensembles."""
+        from langchain.retrievers import EnsembleRetriever
+        from src.dashboard.bm25 import BM25Index, BM25IndexRetriever
+
+        seen = []
+        index = BM25Index.build(sample_documents)
+        ensemble = EnsembleRetriever(
+            retrievers=[BM25IndexRetriever(index=index, k=3), self._slow_retriever(seen)],
+            weights=[0.3, 0.7],
+        )
+        queries = ["final exam", "office hours", "late policy"]
+        expected = reciprocal_rank_fusion([ensemble.invoke(q) for q in queries])
+        seen.clear()
+        retriever = MultiQueryFusionRetriever(base_retriever=ensemble, expander=lambda q: queries)
+
+        with patch.object(index, "search_batch", wraps=index.search_batch) as search_batch:
+            docs = retriever.invoke("final exam")
+
+        search_batch.assert_called_once_with(queries, 3, None)
+        assert sorted(seen) == sorted(queries)
+        assert [doc.page_content for doc in docs] == [doc.page_content for doc in expected]
+
+    async def test_async_bm25_branch_is_scored_in_one_batch(self, sample_documents):
+        """Test the async path batches BM25 the same way."""
+        from langchain.retrievers import EnsembleRetriever
+        from src.dashboard.bm25 import BM25Index, BM25IndexRetriever
+
+        index = BM25Index.build(sample_documents)
+        ensemble = EnsembleRetriever(
+            retrievers=[BM25IndexRetriever(index=index, k=3), self._slow_retriever([])],
+            weights=[0.3, 0.7],
+        )
+        retriever = MultiQueryFusionRetriever(
+            base_retriever=ensemble, expander=lambda q: [q, "office hours"]
+        )
+
+        with patch.object(index, "search_batch", wraps=index.search_batch) as search_batch:
+            docs = await retriever.ainvoke("final exam")
+
+        search_batch.assert_called_once_with(["final exam", "office hours"], 3, None)
+        assert docs[0].metadata["chunk_id"] == "shared"
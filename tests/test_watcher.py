@@ -0,0 +1,124 @@
+"""
+Tests for the background data directory watcher.
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.dashboard.watcher import DataDirWatcher, snapshot_files
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def polling_watcher(temp_data_dir):
+    """Polling watcher with short intervals that records its callbacks."""
+    calls = []
+    watcher = DataDirWatcher(
+        temp_data_dir,
+        lambda: calls.append(snapshot_files(temp_data_dir)),
+        debounce=0.1,
+        poll_interval=0.05,
+        use_watchdog=False
+    )
+    watcher.start()
+    yield watcher, calls
+    watcher.stop()
+
+
+class TestSnapshotFiles:
+    """Tests for stat-only directory snapshots."""
+
+    def test_snapshot_skips_hidden_and_unsupported(self, sample_text_files, temp_data_dir):
+        """Test that only course files are tracked."""
+        (temp_data_dir / ".chroma_db").mkdir()
+        (temp_data_dir / ".chroma_db" / "state.txt").write_text("internal")
+        (temp_data_dir / "image.png").write_bytes(b"\x89PNG")
+
+        assert set(snapshot_files(temp_data_dir)) == {"syllabus.txt", "lecture1.txt"}
+
+    def test_snapshot_skips_excluded_folders(self, sample_text_files, temp_data_dir):
+        """Test that top-level folders indexed elsewhere are left out."""
+        (temp_data_dir / "courses" / "cs101").mkdir(parents=True)
+        (temp_data_dir / "courses" / "cs101" / "notes.md").write_text("# Notes")
+
+        assert "courses/cs101/notes.md" in snapshot_files(temp_data_dir)
+        assert set(snapshot_files(temp_data_dir, exclude=["courses"])) == {
+            "syllabus.txt", "lecture1.txt"
+        }
+
+
+class TestDataDirWatcher:
+    """Tests for change detection with the polling backend."""
+
+    def test_runs_once_at_start(self, polling_watcher):
+        """Test that changes made while nothing watched are caught up on."""
+        watcher, calls = polling_watcher
+
+        assert watcher.backend == "polling"
+        assert _wait_until(lambda: len(calls) == 1)
+
+    def test_new_upload_triggers_one_callback(self, polling_watcher, temp_data_dir):
+        """Test that a file written in several steps is reported once."""
+        watcher, calls = polling_watcher
+        assert _wait_until(lambda: len(calls) == 1)
+
+        path = temp_data_dir / "lecture2.txt"
+        with open(path, "w") as f:
+            for _ in range(3):
+                f.write("Neural networks. " * 100)
+                f.flush()
+                time.sleep(0.03)
+
+        assert _wait_until(lambda: len(calls) == 2)
+        time.sleep(0.3)
+        assert len(calls) == 2
+        assert "lecture2.txt" in calls[1]
+
+    def test_ignores_internal_state(self, polling_watcher, temp_data_dir):
+        """Test that writes to hidden directories do not trigger re-indexing."""
+        watcher, calls = polling_watcher
+        assert _wait_until(lambda: len(calls) == 1)
+
+        (temp_data_dir / ".chroma_db").mkdir()
+        (temp_data_dir / ".chroma_db" / "manifest.txt").write_text("{}")
+        time.sleep(0.3)
+
+        assert len(calls) == 1
+
+    def test_callback_errors_do_not_stop_watching(self, temp_data_dir):
+        """Test that a failed re-index is retried on the next change."""
+        calls = []
+
+        def flaky():
+            calls.append(None)
+            if len(calls) == 1:
+                raise RuntimeError("Provider down")
+
+        watcher = DataDirWatcher(
+            temp_data_dir, flaky, debounce=0.05, poll_interval=0.05, use_watchdog=False
+        )
+        watcher.start()
+        try:
+            assert _wait_until(lambda: len(calls) == 1)
+            (temp_data_dir / "notes.md").write_text("# Notes")
+            assert _wait_until(lambda: len(calls) == 2)
+        finally:
+            watcher.stop()
+
+    def test_stop_ends_thread(self, temp_data_dir):
+        """Test that stop joins the worker thread."""
+        watcher = DataDirWatcher(temp_data_dir, lambda: None, use_watchdog=False)
+        watcher.start()
+        watcher.stop()
+
+        assert not any(t.name == "data-dir-watcher" and t.is_alive() for t in threading.enumerate())